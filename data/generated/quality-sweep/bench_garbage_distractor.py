@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark for process_vocab_de.is_garbage_distractor over a whole batch group.
+
+Compares the original per-marker loop (kept below as the reference) with the
+sweep_rules.py engine the fixer now classifies with, cold and memoized, over
+the distractors of every vocab-de batch, checks that both classify every
+distractor identically, and times fix_row over the batches the fixer owns.
+
+Usage:
+    python bench_garbage_distractor.py
+    python bench_garbage_distractor.py --repeat 10
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import process_vocab_de as de
+from jsonl_io import read_jsonl
+
+SWEEP_DIR = Path(__file__).resolve().parent
+
+
+def reference_is_garbage(d: str) -> bool:
+    """The pre-compilation implementation, verbatim in behaviour."""
+    if len(d) > 35:
+        return True
+    german_markers = ["~", "etwas", "Ganz", "oder", "vom ", "Von ", "Zu ",
+                      "einer ", "einem ", "eines ",
+                      "nicht ", "mehr ", "kann ", "wird ", "beim ",
+                      "aber ", "auch ", "fur ", "mit ", "und ", "auf ",
+                      "nach ", "uber ", "unter ", "durch ", "bei ", "von ", "aus ",
+                      "Ü", "ö", "ü", "ä", "ß"]
+    for marker in german_markers:
+        if marker in d:
+            return True
+    topic_noise = set(de.TOPIC_NOISE)  # the old code rebuilt this literal per call
+    if d.lower().strip() in topic_noise:
+        return True
+    paren_match = re.search(r'\(([^)]+)\)', d)
+    if paren_match:
+        inner = paren_match.group(1)
+        if any(c in inner for c in ["ö", "ü", "ä", "ß"]):
+            return True
+        if re.match(r'^[A-Za-z]+~$', inner):
+            return True
+    return False
+
+
+def load_group(group: str, indices=None) -> list[dict]:
+    manifest = json.loads((SWEEP_DIR / "manifest.json").read_text(encoding="utf-8"))
+    rows = []
+    for batch in manifest["batches"]:
+        if batch["group"] == group and (indices is None or batch["index"] in indices):
+            rows.extend(read_jsonl(SWEEP_DIR / batch["file"]))
+    return rows
+
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = load_group(de.GROUP)
+    owned = load_group(de.GROUP, de.BATCHES)
+    # The old fix_row classified each distractor up to three times
+    calls = [d for row in rows for d in row["d"]] * 3
+    unique = set(calls)
+
+    de.ENGINE.clear()
+    mismatches = [d for d in unique if reference_is_garbage(d) != de.is_garbage_distractor(d)]
+    if mismatches:
+        raise SystemExit(f"Classification differs for {len(mismatches)} distractors, e.g. {mismatches[:5]}")
+
+    # The engine classifies a whole row per match(), once per fix_row
+    def engine(clear: bool):
+        if clear:
+            de.ENGINE.clear()
+        for row in rows:
+            [bool(m & de.GARBAGE) for m in de.ENGINE.match(row).d]
+
+    results = {
+        "reference loop":      best_of(lambda: [reference_is_garbage(d) for d in calls], args.repeat),
+        "rule engine, cold":   best_of(lambda: engine(True), args.repeat),
+        "rule engine, warm":   best_of(lambda: engine(False), args.repeat),
+    }
+    fix_rows = best_of(lambda: [de.fix_row(row) for row in owned], args.repeat)
+
+    print(f"{de.GROUP}: {len(rows)} rows, {len(calls)} classifications ({len(unique)} unique distractors)")
+    print(f"All {len(unique)} distractors classified identically to the reference\n")
+    base = results["reference loop"]
+    for name, seconds in results.items():
+        print(f"  {name:<20} {seconds * 1000:8.2f} ms   {base / seconds:5.1f}x")
+    print(f"\n  fix_row, {len(owned)} rows  {fix_rows * 1000:8.2f} ms   ({len(owned) / fix_rows:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Cross-batch distractor index for the quality sweep.
+
+One streaming pass over every batch of every group (manifest.json) that
+    - hashes each row's normalized distractor set, so a generic dump such as
+      process_vocab_de.PREPOSITION_DUMP shows up as one set recurring in
+      hundreds of rows across batches and languages;
+    - counts each normalized distractor string across rows and groups;
+    - records answer/distractor collisions: a distractor equal to the row's
+      own answer.
+
+Normalization: casefold, punctuation to spaces, whitespace collapsed, so
+"To go!" and "to go" are the same string. A set is its sorted normalized
+strings, so order does not matter. Only counters and a few example ids per
+set are kept in memory; collisions stream to a JSONL file.
+
+With --results, each row is indexed as the fixers left it: the result row's
+d when it has one, else the input's. A result file that does not parse is
+skipped and its batch is indexed from the input.
+
+Writes reports/distractor-index.json (summary, top sets, top strings,
+collisions per group) and reports/distractor-collisions.jsonl.
+
+Usage:
+    python distractor_index.py
+    python distractor_index.py --results --group vocab-de --top 50
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+from jsonl_io import JsonlWriter, read_jsonl
+from sweep_delta import result_file
+
+SWEEP_DIR = Path(__file__).resolve().parent
+INDEX_PATH = Path("reports") / "distractor-index.json"
+COLLISIONS_PATH = Path("reports") / "distractor-collisions.jsonl"
+EXAMPLE_IDS = 5
+
+_PUNCT = re.compile(r"[^\w\s]")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_PUNCT.sub(" ", text.casefold()).split())
+
+
+def set_key(normalized: list[str]) -> str:
+    """Stable 64-bit hash of a normalized distractor set (order-independent)."""
+    return hashlib.blake2b("\0".join(sorted(set(normalized))).encode("utf-8"), digest_size=8).hexdigest()
+
+
+# ─── Index ───────────────────────────────────────────────────────────────────
+
+class DistractorIndex:
+    def __init__(self, collisions: JsonlWriter):
+        self.collisions = collisions
+        self.rows = 0
+        self.rows_with_d = 0
+        self.sets: dict[str, dict] = {}         # set hash -> {rows, groups, ids, d}
+        self.strings = Counter()                # normalized distractor -> rows
+        self.string_groups: dict[str, set] = {}
+        self.collisions_by_group = Counter()
+
+    def add(self, row: dict, group: str, batch: int) -> None:
+        self.rows += 1
+        d = [x for x in row.get("d") or [] if isinstance(x, str)]
+        if not d:
+            return
+        self.rows_with_d += 1
+        normalized = [normalize(x) for x in d]
+
+        key = set_key(normalized)
+        entry = self.sets.get(key)
+        if entry is None:
+            entry = self.sets[key] = {"rows": 0, "groups": Counter(), "ids": [], "d": d}
+        entry["rows"] += 1
+        entry["groups"][group] += 1
+        if len(entry["ids"]) < EXAMPLE_IDS:
+            entry["ids"].append(row.get("id"))
+
+        for s in set(normalized):
+            self.strings[s] += 1
+            self.string_groups.setdefault(s, set()).add(group)
+
+        answer = normalize(row.get("a") or "")
+        if answer:
+            for raw, s in zip(d, normalized):
+                if s == answer:
+                    self.collisions_by_group[group] += 1
+                    self.collisions.write({"group": group, "batch": batch, "id": row.get("id"),
+                                           "a": row.get("a"), "d": raw})
+
+    def report(self, top: int) -> dict:
+        repeated = [(k, e) for k, e in self.sets.items() if e["rows"] > 1]
+        repeated.sort(key=lambda ke: -ke[1]["rows"])
+        return {
+            "counts": {
+                "rows": self.rows,
+                "rowsWithDistractors": self.rows_with_d,
+                "uniqueSets": len(self.sets),
+                "repeatedSets": len(repeated),
+                "rowsInRepeatedSets": sum(e["rows"] for _, e in repeated),
+                "uniqueDistractors": len(self.strings),
+                "collisions": sum(self.collisions_by_group.values()),
+            },
+            "topSets": [{"hash": k, "rows": e["rows"], "groups": dict(e["groups"].most_common()),
+                         "ids": e["ids"], "d": e["d"]} for k, e in repeated[:top]],
+            "topDistractors": [{"text": s, "rows": n, "groups": sorted(self.string_groups[s])}
+                               for s, n in self.strings.most_common(top)],
+            "collisionsByGroup": dict(self.collisions_by_group.most_common()),
+        }
+
+
+# ─── Sources ─────────────────────────────────────────────────────────────────
+
+def batch_rows(sweep_dir: Path, batch: dict, results: bool):
+    """Rows of one batch; with results, overlaid with the fixer's d and a."""
+    rows = read_jsonl(sweep_dir / batch["file"])
+    result_path = sweep_dir / result_file(batch)
+    if not results or not result_path.exists():
+        yield from rows
+        return
+    try:
+        fixed = {str(r.get("id")): r for r in read_jsonl(result_path)}
+    except (ValueError, AttributeError) as err:
+        print(f"  [SKIP] {result_file(batch)}: {err}", file=sys.stderr)
+        yield from rows
+        return
+    for row in rows:
+        r = fixed.get(str(row["id"]))
+        if r is not None:
+            row = {**row, "d": r["d"] if isinstance(r.get("d"), list) else row["d"],
+                   "a": r.get("a") if r.get("a") is not None else row.get("a")}
+        yield row
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Index distractor sets and strings across all batches")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR)
+    parser.add_argument("--group", action="append", default=[], help="Restrict to these groups (repeatable)")
+    parser.add_argument("--results", action="store_true", help="Index rows as the result files leave them")
+    parser.add_argument("--top", type=int, default=25, help="Sets and strings to report (default: 25)")
+    args = parser.parse_args()
+
+    sweep_dir = args.sweep_dir.resolve()
+    manifest = json.loads((sweep_dir / "manifest.json").read_text(encoding="utf-8"))
+
+    with JsonlWriter(sweep_dir / COLLISIONS_PATH) as collisions:
+        index = DistractorIndex(collisions)
+        for batch in manifest["batches"]:
+            if args.group and batch["group"] not in args.group:
+                continue
+            for row in batch_rows(sweep_dir, batch, args.results):
+                index.add(row, batch["group"], batch["index"])
+
+    report = index.report(args.top)
+    report = {"source": "results" if args.results else "batches", **report}
+    (sweep_dir / INDEX_PATH).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    c = report["counts"]
+    print(f"Indexed {c['rows']} rows: {c['uniqueSets']} distinct distractor sets, "
+          f"{c['repeatedSets']} of them repeated ({c['rowsInRepeatedSets']} rows), "
+          f"{c['uniqueDistractors']} distinct distractors, {c['collisions']} answer collisions")
+    print("\nMost repeated sets:")
+    for s in report["topSets"][:10]:
+        groups = ", ".join(f"{g} {n}" for g, n in s["groups"].items())
+        print(f"  {s['rows']:>5} rows  [{groups}]  {', '.join(s['d'][:6])}{' …' if len(s['d']) > 6 else ''}")
+    if report["collisionsByGroup"]:
+        print("\nAnswer collisions:")
+        for g, n in report["collisionsByGroup"].items():
+            print(f"  {g:<28} {n:>5}")
+    print(f"\nReport: {INDEX_PATH}, {COLLISIONS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Streaming JSONL reader/writer shared by the quality-sweep scripts.
+
+    for row in read_jsonl(path): ...          # one row at a time
+    with JsonlWriter(path) as out:            # temp file, renamed on success
+        out.write(row)
+
+Rows are parsed and serialized with orjson when it is installed, else with
+the stdlib json module. Both backends write the same compact form
+(no spaces, non-ASCII kept as UTF-8, the same as JSON.stringify in the JS
+pipeline and the batch files), so rows of strings, lists, bools and
+integers come out byte-identical. Floats may not: orjson writes 1e16 and
+1e-7 where the stdlib writes 1e+16 and 1e-07. Integers wider than 64 bits,
+which orjson rejects, fall back to the stdlib in both directions.
+
+A writer that raises is discarded and the previous file stays in place;
+JsonlWriter.digest is the sha256 of what was written.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+BACKEND = "orjson" if orjson else "json"
+
+if orjson:
+    def loads(data: bytes | str) -> Any:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)   # e.g. an integer wider than 64 bits; re-raises if invalid
+
+    def dumps(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except orjson.JSONEncodeError:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+else:
+    loads = json.loads
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def read_jsonl(path: Path | str) -> Iterator[dict]:
+    """Yield the rows of a JSONL file lazily, skipping blank lines."""
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+class JsonlWriter:
+    """Write rows to path.tmp and rename it over path when the block exits cleanly."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.tmp = self.path.with_name(self.path.name + ".tmp")
+        self.rows = 0
+        self._hash = hashlib.sha256()
+        self._file = None
+
+    def __enter__(self) -> "JsonlWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp, "wb")
+        return self
+
+    def write(self, row: Any) -> None:
+        self.write_line(dumps(row))
+
+    def write_line(self, line: str) -> None:
+        """Write an already serialized row (from dumps)."""
+        data = (line + "\n").encode("utf-8")
+        self._file.write(data)
+        self._hash.update(data)
+        self.rows += 1
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    def discard(self) -> None:
+        """Drop what was written; path keeps its previous content."""
+        if self._file and not self._file.closed:
+            self._file.close()
+        if self.tmp.exists():
+            self.tmp.unlink()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.discard()
+            return
+        if self._file.closed:   # discarded inside the block
+            return
+        self._file.close()
+        os.replace(self.tmp, self.path)
+
+
+def write_jsonl(path: Path | str, rows: Iterable[Any]) -> int:
+    """Stream rows to path atomically; returns the number written."""
+    with JsonlWriter(path) as out:
+        for row in rows:
+            out.write(row)
+    return out.rows
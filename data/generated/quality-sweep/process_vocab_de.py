@@ -3,76 +3,81 @@
 German vocabulary quality-sweep processor.
 Fixes distractor quality issues across batches 000-023.
 Writes results to data/generated/quality-sweep/results/vocab-de/
+
+Also a sweep.py fixer plugin: GROUP, BATCHES and fix_row(row); its detection
+rules (RULES) run on the sweep_rules.py engine.
 """
 
-import json
 import os
+import re
 import sys
 
-BATCH_DIR = "/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/batches/vocab-de"
-RESULT_DIR = "/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/results/vocab-de"
+from jsonl_io import JsonlWriter, read_jsonl
+from sweep_rules import Contains, Rule, RuleSet, SHARED_RULES, Words
+
+SWEEP_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_DIR = os.path.join(SWEEP_DIR, "batches", "vocab-de")
+RESULT_DIR = os.path.join(SWEEP_DIR, "results", "vocab-de")
+
+# sweep.py plugin declaration
+GROUP = "vocab-de"
+BATCHES = range(24)
+DEPENDS = ("sweep_rules.py",)
+PROFILE = ("classify_answer", "get_distractor_pool")  # sweep.py --profile
 
 # The generic preposition dump that appears across hundreds of rows
 PREPOSITION_DUMP = ["from", "into", "toward", "until", "at", "by", "through", "with"]
 
+# German phrases or words leaked into English distractors
+GERMAN_MARKERS = ["~", "etwas", "Ganz", "oder", "vom ", "Von ", "Zu ",
+                  "einer ", "einem ", "eines ",
+                  "nicht ", "mehr ", "kann ", "wird ", "beim ",
+                  "aber ", "auch ", "fur ", "mit ", "und ", "auf ",
+                  "nach ", "uber ", "unter ", "durch ", "bei ", "von ", "aus ",
+                  "\u00dc", "\u00f6", "\u00fc", "\u00e4", "\u00df"]
+
+# Topic-irrelevant random words leaked from the fact DB used as distractors
+# for basic vocab questions (nationality/science/institution terms)
+TOPIC_NOISE = frozenset({
+    "arab", "arab (language)", "arabic", "turkish", "greek", "russian",
+    "belgian", "electron", "bacterium", "bundesliga", "semester", "rucksack",
+    "pistol", "philosopher", "architecture", "secretary-general", "secretary general",
+    "sitzen", "thursday", "mayor", "painter", "pilot", "university",
+    "candle", "harbour", "stadium", "museum", "passport",
+    "classical", "twelve", "schoolgirl", "schoolboy", "chain",
+    "interesting",
+    "accompany", "to accompany", "to step back, resign", "to step back",
+    "1) ever, each; 2) the more", "ever, each",
+    "pattern, model, sample (m~)", "pattern, model, sample",
+    "to carry out", "sample, test, rehearsal",
+    "bacterium, bacteria",
+})
+
+# Garbage = the shared long-distractor rule (over 35 characters) or one of
+# these. The marker scan also covers German annotations in parentheses such
+# as "(M~)" or "(fl\u00fc~)": every one of them contains "~" or an umlaut/\u00df.
+RULES = [
+    Rule("de-german-marker", "d", Contains(*GERMAN_MARKERS), "garbage", groups=(GROUP,)),
+    Rule("de-topic-noise", "d", Words(*TOPIC_NOISE), "garbage", groups=(GROUP,)),
+]
+ENGINE = RuleSet(SHARED_RULES + RULES).compile(GROUP)
+GARBAGE = ENGINE.action_mask("garbage")
+
+
 def is_garbage_distractor(d: str) -> bool:
     """Return True if a distractor string is garbage."""
-    if len(d) > 35:
-        return True
-    # German phrases or words leaked into English distractors
-    german_markers = ["~", "etwas", "Ganz", "oder", "vom ", "Von ", "Zu ",
-                      "einer ", "einem ", "eines ",
-                      "nicht ", "mehr ", "kann ", "wird ", "beim ",
-                      "aber ", "auch ", "fur ", "mit ", "und ", "auf ",
-                      "nach ", "uber ", "unter ", "durch ", "bei ", "von ", "aus ",
-                      "\u00dc", "\u00f6", "\u00fc", "\u00e4", "\u00df"]
-    for marker in german_markers:
-        if marker in d:
-            return True
-    # Topic-irrelevant random words leaked from the fact DB used as distractors
-    # for basic vocab questions (nationality/science/institution terms)
-    TOPIC_NOISE = {
-        "arab", "arab (language)", "arabic", "turkish", "greek", "russian",
-        "belgian", "electron", "bacterium", "bundesliga", "semester", "rucksack",
-        "pistol", "philosopher", "architecture", "secretary-general", "secretary general",
-        "sitzen", "thursday", "mayor", "painter", "pilot", "university",
-        "candle", "harbour", "stadium", "museum", "passport",
-        "classical", "twelve", "schoolgirl", "schoolboy", "chain",
-        "interesting",
-        "accompany", "to accompany", "to step back, resign", "to step back",
-        "1) ever, each; 2) the more", "ever, each",
-        "pattern, model, sample (m~)", "pattern, model, sample",
-        "to carry out", "sample, test, rehearsal",
-        "bacterium, bacteria",
-    }
-    d_lower = d.lower().strip()
-    if d_lower in TOPIC_NOISE:
-        return True
-    # Contains parenthetical that looks like a German annotation: (M~) (K~) (Z~) etc.
-    import re
-    paren_match = re.search(r'\(([^)]+)\)', d)
-    if paren_match:
-        inner = paren_match.group(1)
-        if any(c in inner for c in ["\u00f6", "\u00fc", "\u00e4", "\u00df"]):
-            return True
-        # German abbreviation hints like (M~), (K~), (Z~), (fli~), (r~), etc.
-        if re.match(r'^[A-Za-z]+~$', inner):
-            return True
-    return False
+    return bool(ENGINE.value_mask("d", d) & GARBAGE)
 
-def needs_replacement(distractors: list) -> bool:
+def needs_replacement(distractors: list, garbage: list | None = None) -> bool:
     """Return True if the distractor list needs full replacement."""
     if distractors[:4] == PREPOSITION_DUMP[:4]:
         return True
-    garbage_count = sum(1 for d in distractors if is_garbage_distractor(d))
-    if garbage_count >= 3:
+    if garbage is None:
+        garbage = [is_garbage_distractor(d) for d in distractors]
+    if sum(garbage) >= 3:
         return True
     return False
 
-def has_any_garbage(distractors: list) -> bool:
-    """Return True if any individual distractors are garbage."""
-    return any(is_garbage_distractor(d) for d in distractors)
-
 
 # ─── Semantic distractor pools by answer type ─────────────────────────────────
 # These are human-curated semantically appropriate pools organized by category.
@@ -286,89 +291,114 @@ def classify_answer(answer: str, question: str) -> str:
     return "general"
 
 
-def get_distractor_pool(answer: str, question: str, existing_ok: list) -> list:
+# German nouns for answers that are themselves German (die/der/das + noun)
+GERMAN_NOUNS = [
+    "die Zeit", "das Haus", "der Mann", "die Frau", "das Kind", "die Stadt",
+    "der Tag", "das Jahr", "die Welt", "der Mensch", "das Leben", "die Hand",
+    "der Weg", "die Arbeit", "das Land", "die Frage", "der Fall", "das Wort",
+    "die Nacht", "der Abend", "das Geld", "die Schule", "der Freund", "das Auto",
+    "die Familie", "der Staat", "das Recht", "die Kunst", "der Teil", "die Seite",
+    "das Buch", "der Platz", "die Stunde", "das Herz", "der Kopf", "die Hand",
+    "das Ende", "der Name", "die Sprache", "das Feld", "der Grund", "die Natur",
+    "das Volk", "der Raum", "die Kraft", "das Amt", "der Schritt", "die Form",
+    "das Ziel", "der Blick", "die Meinung", "das Ergebnis", "der Bereich",
+    "die Chance", "das Problem", "der Aspekt", "die Lösung", "das System",
+    "der Erfolg", "die Idee", "das Thema", "der Prozess", "die Methode",
+    "die Daten", "der Einfluss", "die Macht", "der Moment", "die Forderung",
+    "die Untersuchung", "der Augenblick", "die Veränderung", "der Begriff",
+]
+
+
+def _ordered_unique(*lists) -> tuple:
+    """Items in first-seen order, deduplicated case-insensitively."""
+    seen, out = set(), []
+    for items in lists:
+        for item in items:
+            low = item.lower()
+            if low not in seen:
+                seen.add(low)
+                out.append(item)
+    return tuple(out)
+
+
+# Candidate distractors per answer class, in preference order
+CLASS_POOLS = {
+    "verb_infinitive":  (VERBS,),
+    "modal":            (MODALS, VERBS),
+    "number":           (NUMBERS,),
+    "pronoun":          (PRONOUNS,),
+    "conjunction_prep": (CONJUNCTIONS, [p for p in PREPOSITIONS if len(p.split()) == 1]),
+    "adjective":        (ADJECTIVES,),
+    "adverb":           (ADVERBS,),
+    "phrase":           (PHRASE_MEANINGS, TIME_EXPRS),
+    "place_phrase":     (PLACE_PHRASES,),
+    "noun":             (NOUNS_BASIC,),
+    "noun_de":          (GERMAN_NOUNS,),
+    "general":          (ADJECTIVES, NOUNS_BASIC, ADVERBS),
+}
+
+# Answer forms excluded besides the full lowercased answer, per class
+CLASS_EXCLUDES = {
+    "verb_infinitive":  ("first", "base"),
+    "modal":            ("first",),
+    "number":           ("base",),
+    "pronoun":          ("base", "first"),
+    "conjunction_prep": ("base", "first"),
+}
+
+
+class PoolIndex:
+    """One answer class's pool: ordered items, their lowercase forms and a set of those."""
+
+    __slots__ = ("items", "lowers", "members")
+
+    def __init__(self, *lists):
+        self.items = _ordered_unique(*lists)
+        self.lowers = tuple(item.lower() for item in self.items)
+        self.members = frozenset(self.lowers)
+
+    def take(self, excluded: set, limit: int | None = None) -> list:
+        """First `limit` items (all if None) whose lowercase form is not excluded."""
+        if limit is None:
+            limit = len(self.items)
+        if limit <= 0:
+            return []
+        # Only exclusions that are actually in the pool can be skipped over, so
+        # the scan stops after limit + len(blocked) items
+        blocked = excluded & self.members
+        out = []
+        for item, low in zip(self.items, self.lowers):
+            if low not in blocked:
+                out.append(item)
+                if len(out) == limit:
+                    break
+        return out
+
+
+POOL_INDEX = {atype: PoolIndex(*lists) for atype, lists in CLASS_POOLS.items()}
+
+
+def get_distractor_pool(answer: str, question: str, existing_ok: list, limit: int | None = None) -> list:
     """
     Return a list of semantically appropriate distractors for this answer.
     existing_ok are existing distractors that are already valid.
+    limit caps the result (callers only ever take the first few).
     """
-    import re as _re
     a_lower = answer.lower().strip()
     # Also get the clean base form (without parentheticals) for exclusion matching
-    a_base = _re.sub(r'\s*\(.*?\)', '', a_lower).strip()
+    a_base = re.sub(r'\s*\(.*?\)', '', a_lower).strip()
     # For comma-separated answers, get the first token
     a_first = a_lower.split(",")[0].strip().split(";")[0].strip()
     # For "1) word; 2) word" style, extract first
-    numbered = _re.match(r'^1\)\s*(.+?)(?:;|$)', a_lower)
+    numbered = re.match(r'^1\)\s*(.+?)(?:;|$)', a_lower)
     if numbered:
         a_first = numbered.group(1).strip()
 
     atype = classify_answer(answer, question)
-
-    if atype == "verb_infinitive":
-        pool = [v for v in VERBS if v.lower() not in (a_lower, a_first, a_base)]
-    elif atype == "modal":
-        pool = [m for m in MODALS if m.lower() not in (a_lower, a_first)]
-        # supplement with other verb constructions that aren't in the answer
-        pool += [v for v in VERBS if v not in pool and v.lower() not in (a_lower, a_first)]
-    elif atype == "number":
-        pool = [n for n in NUMBERS if n.lower() != a_base]
-    elif atype == "pronoun":
-        # Exclude the base pronoun (e.g. "you" from "you (familiar, singular)")
-        pool = [p for p in PRONOUNS if p.lower() not in (a_lower, a_base, a_first)]
-    elif atype == "conjunction_prep":
-        pool = list(CONJUNCTIONS) + [p for p in PREPOSITIONS if len(p.split()) == 1]
-        pool = [x for x in pool if x.lower() not in (a_lower, a_base, a_first)]
-    elif atype == "adjective":
-        pool = [adj for adj in ADJECTIVES if adj != a_lower]
-    elif atype == "adverb":
-        pool = [adv for adv in ADVERBS if adv != a_lower]
-    elif atype == "phrase":
-        pool = [ph for ph in PHRASE_MEANINGS if ph != a_lower]
-        # Also include time expressions for temporal phrases
-        pool += [t for t in TIME_EXPRS if t not in pool and t != a_lower]
-    elif atype == "place_phrase":
-        pool = [pp for pp in PLACE_PHRASES if pp != a_lower]
-    elif atype == "noun":
-        pool = [n for n in NOUNS_BASIC if n != a_lower]
-    elif atype == "noun_de":
-        # Answer IS a German word (die/der/das + noun) — distractors should be German nouns
-        # Use the German forms of common nouns as distractors
-        GERMAN_NOUNS = [
-            "die Zeit", "das Haus", "der Mann", "die Frau", "das Kind", "die Stadt",
-            "der Tag", "das Jahr", "die Welt", "der Mensch", "das Leben", "die Hand",
-            "der Weg", "die Arbeit", "das Land", "die Frage", "der Fall", "das Wort",
-            "die Nacht", "der Abend", "das Geld", "die Schule", "der Freund", "das Auto",
-            "die Familie", "der Staat", "das Recht", "die Kunst", "der Teil", "die Seite",
-            "das Buch", "der Platz", "die Stunde", "das Herz", "der Kopf", "die Hand",
-            "das Ende", "der Name", "die Sprache", "das Feld", "der Grund", "die Natur",
-            "das Volk", "der Raum", "die Kraft", "das Amt", "der Schritt", "die Form",
-            "das Ziel", "der Blick", "die Meinung", "das Ergebnis", "der Bereich",
-            "die Chance", "das Problem", "der Aspekt", "die Lösung", "das System",
-            "der Erfolg", "die Idee", "das Thema", "der Prozess", "die Methode",
-            "die Daten", "der Einfluss", "die Macht", "der Moment", "die Forderung",
-            "die Untersuchung", "der Augenblick", "die Veränderung", "der Begriff",
-        ]
-        pool = [n for n in GERMAN_NOUNS if n.lower() != a_lower]
-    else:
-        # General: mix of adjectives, nouns, adverbs
-        pool = [adj for adj in ADJECTIVES if adj != a_lower]
-        pool += [n for n in NOUNS_BASIC if n not in pool and n != a_lower]
-        pool += [adv for adv in ADVERBS if adv not in pool and adv != a_lower]
-
-    # Remove duplicates and the correct answer
-    seen = set()
-    seen.add(a_lower)
-    # Normalize existing_ok
-    for d in existing_ok:
-        seen.add(d.lower())
-    filtered = []
-    for item in pool:
-        il = item.lower()
-        if il not in seen:
-            filtered.append(item)
-            seen.add(il)
-
-    return filtered
+    forms = {"base": a_base, "first": a_first}
+    excluded = {a_lower, *(forms[f] for f in CLASS_EXCLUDES.get(atype, ()))}
+    excluded.update(d.lower() for d in existing_ok)
+    return POOL_INDEX.get(atype, POOL_INDEX["general"]).take(excluded, limit)
 
 
 def fix_row(row: dict) -> dict:
@@ -387,12 +417,14 @@ def fix_row(row: dict) -> dict:
     new_l2 = None
 
     # ── Distractor Quality Check ────────────────────────────────────────────
-    full_replace = needs_replacement(original_d)
-    partial_fix = not full_replace and has_any_garbage(original_d)
+    # One rule-engine pass classifies every distractor; the checks below reuse the flags
+    garbage = [bool(m & GARBAGE) for m in ENGINE.match(row).d]
+    full_replace = needs_replacement(original_d, garbage)
+    partial_fix = not full_replace and any(garbage)
 
     if full_replace:
         # Build replacement pool
-        pool = get_distractor_pool(row["a"], row["q"], [])
+        pool = get_distractor_pool(row["a"], row["q"], [], limit=8)
         if len(pool) < 6:
             # Fall back to a mixed pool
             pool = (ADJECTIVES + NOUNS_BASIC + ADVERBS)
@@ -404,12 +436,11 @@ def fix_row(row: dict) -> dict:
         changes.append("replaced garbage/template distractors with semantically appropriate alternatives")
     elif partial_fix:
         # Keep good distractors, replace garbage ones
-        good = [d for d in original_d if not is_garbage_distractor(d)]
+        good = [d for d, bad in zip(original_d, garbage) if not bad]
         bad_count = len(original_d) - len(good)
-        pool = get_distractor_pool(row["a"], row["q"], good)
         # How many we need to add
         needed = max(6, 8 - len(good))
-        replacements = pool[:needed]
+        replacements = get_distractor_pool(row["a"], row["q"], good, limit=needed)
         new_d = good + replacements
         new_d = new_d[:8]
         changes.append(f"replaced {bad_count} garbage distractor(s) with semantically coherent alternatives")
@@ -417,8 +448,7 @@ def fix_row(row: dict) -> dict:
         new_d = original_d
         # Ensure 6-8 count
         if len(new_d) < 6:
-            pool = get_distractor_pool(row["a"], row["q"], new_d)
-            new_d = new_d + pool[:8-len(new_d)]
+            new_d = new_d + get_distractor_pool(row["a"], row["q"], new_d, limit=8 - len(new_d))
             changes.append("padded distractors to minimum 6")
         elif len(new_d) > 8:
             new_d = new_d[:8]
@@ -492,24 +522,16 @@ def process_batch(batch_num: int):
         print(f"  SKIP: {input_path} not found")
         return 0, 0
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        rows = [json.loads(line) for line in f if line.strip()]
-
-    output_rows = []
     changed = 0
-    for row in rows:
-        result = fix_row(row)
-        output_rows.append(result)
-        if result["i"]:
-            changed += 1
-
-    os.makedirs(RESULT_DIR, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        for r in output_rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    with JsonlWriter(output_path) as out:
+        for row in read_jsonl(input_path):
+            result = fix_row(row)
+            out.write(result)
+            if result["i"]:
+                changed += 1
 
-    print(f"  batch-{batch_str}: {len(rows)} rows, {changed} modified → {output_path}")
-    return len(rows), changed
+    print(f"  batch-{batch_str}: {out.rows} rows, {changed} modified → {output_path}")
+    return out.rows, changed
 
 
 def main():
@@ -519,7 +541,7 @@ def main():
     total_rows = 0
     total_changed = 0
 
-    for i in range(24):
+    for i in BATCHES:
         rows, changed = process_batch(i)
         total_rows += rows
         total_changed += changed
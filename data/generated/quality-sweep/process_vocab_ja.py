@@ -7,12 +7,27 @@ Rules:
 2. Fix "What is the Japanese word for Y?" questions (rewrite more naturally)
 3. Ensure 6-8 distractors, same semantic field, match answer format
 4. Remove nonsense/placeholder distractors (I, X, Y, 'wonder', 'son-in-law', etc. in kana)
+
+Also a sweep.py fixer plugin: GROUP, BATCHES and fix_row(row); its detection
+rules (RULES) run on the sweep_rules.py engine.
 """
 
-import json
 import os
 import re
 
+from jsonl_io import JsonlWriter, read_jsonl
+from sweep_rules import Contains, Not, Rule, RuleSet, SHARED_RULES, Words
+
+SWEEP_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_DIR = os.path.join(SWEEP_DIR, 'batches', 'vocab-ja')
+RESULT_DIR = os.path.join(SWEEP_DIR, 'results', 'vocab-ja')
+
+# sweep.py plugin declaration
+GROUP = 'vocab-ja'
+BATCHES = range(19)
+DEPENDS = ('sweep_rules.py',)
+PROFILE = ('get_kanji_distractors', 'get_kana_distractors', 'get_grammar_distractors')  # sweep.py --profile
+
 # ─────────────────────────────────────────────
 # Distractor pools by category/answer type
 # ─────────────────────────────────────────────
@@ -200,20 +215,46 @@ def get_grammar_distractors(answer: str, existing_d: list) -> list:
     return result[:8]
 
 
-def needs_distractor_fix(d: list, answer: str, category: str) -> bool:
-    """Check if distractors need replacement."""
+# ─────────────────────────────────────────────
+# Detection rules (sweep_rules.py)
+# ─────────────────────────────────────────────
+
+KANA_OR_KANJI = r'^ja-(kana-hira|kana-kata|kanji)'
+KANA = r'^ja-kana-(hira|kata)'
+GRAMMAR = r'^(?!ja-kana-hira|ja-kana-kata|ja-kanji).*grammar'
+
+RULES = [
+    Rule('ja-placeholder-token', 'd',
+         Words('x-ray', 'x', 'y', 'i', 'on', 'of', 'is', 'be', 'to',
+               'wonder', 'son-in-law', 'home', 'form', 'type', 'class', 'kind'),
+         'placeholder', groups=(GROUP,), ids=KANA_OR_KANJI),
+    # Nonsense kanji distractors like "a type of plant (Genus sp.)"
+    Rule('ja-nonsense-gloss', 'd', Contains('sp.)', 'Genus', 'Rhizoma'),
+         'nonsense', groups=(GROUP,), ids=KANA_OR_KANJI),
+    # Valid kana distractors are known romaji syllables
+    Rule('ja-kana-non-romaji', 'd', Not(Words(*KATA_ROMAJI_ALL, strip=False)),
+         'nonsense', groups=(GROUP,), ids=KANA),
+    Rule('ja-grammar-offtopic', 'd',
+         Words('x-ray', 'x ray', 'home', 'form', 'type', 'class', 'kind',
+               'fairly', 'quite', 'rather', 'likely', 'partly', 'almost',
+               'barely', 'hardly', 'corporal'),
+         'offtopic', groups=(GROUP,), ids=GRAMMAR),
+]
+ENGINE = RuleSet(SHARED_RULES + RULES).compile(GROUP)
+PLACEHOLDER_TOKEN = ENGINE.bit('ja-placeholder-token')
+NONSENSE_GLOSS = ENGINE.bit('ja-nonsense-gloss')
+NON_ROMAJI = ENGINE.bit('ja-kana-non-romaji')
+GRAMMAR_OFFTOPIC = ENGINE.bit('ja-grammar-offtopic')
+TRAILING_SEMICOLON = ENGINE.bit('answer-trailing-semicolon')
+
+
+def needs_distractor_fix(d: list, masks: list) -> bool:
+    """Check if distractors need replacement (masks: ENGINE.match(row).d)."""
     if len(d) < 6:
         return True
-    bad_tokens = {'x-ray', 'x', 'y', 'i', 'on', 'of', 'is', 'be', 'to',
-                  'wonder', 'son-in-law', 'home', 'form', 'type', 'class', 'kind'}
-    bad_count = sum(1 for item in d if item.strip().lower() in bad_tokens)
-    if bad_count >= 2:
+    if sum(1 for m in masks if m & PLACEHOLDER_TOKEN) >= 2:
         return True
-    # Check for nonsense kanji distractors like "a type of plant (Genus sp.)"
-    nonsense_count = sum(1 for item in d if 'sp.)' in item or 'Genus' in item or 'Rhizoma' in item)
-    if nonsense_count >= 1:
-        return True
-    return False
+    return any(m & NONSENSE_GLOSS for m in masks)
 
 
 def fix_question(q: str, answer: str, category: str, fact_id: str) -> tuple[str | None, str]:
@@ -276,6 +317,7 @@ def process_row(row: dict) -> dict:
     new_a = None
     new_d = None
     new_e = None
+    hits = ENGINE.match(row)
 
     # ── Fix specific known bad answers ──
     # ja-grammar-additional-009: answer is "kudaisamasenka" (romaji of くださいませんか)
@@ -284,7 +326,7 @@ def process_row(row: dict) -> dict:
         changes.append('Fixed answer from raw romaji to proper English gloss')
 
     # Fix answers with trailing semicolons
-    if a.endswith(';') and new_a is None:
+    if hits.a & TRAILING_SEMICOLON and new_a is None:
         new_a = a.rstrip(';').strip()
         changes.append('Removed trailing semicolon from answer')
 
@@ -292,25 +334,22 @@ def process_row(row: dict) -> dict:
 
     # ── Fix distractors ──
     if cat in ('hira', 'kata'):
-        if needs_distractor_fix(d, effective_a, cat):
+        if needs_distractor_fix(d, hits.d):
             new_d = get_kana_distractors(effective_a, cat)
             changes.append(f'Replaced nonsense distractors with valid {cat}gana romaji options')
         elif len(d) < 6:
             new_d = get_kana_distractors(effective_a, cat)
             changes.append(f'Padded kana distractors to 6+ (was {len(d)})')
         else:
-            # Check for mixed nonsense items: valid kana romaji are short (1-4 chars, no hyphens)
-            # and must be known romaji syllables
-            valid_romaji_set = set(KATA_ROMAJI_ALL)
-            non_romaji = [item for item in d
-                          if item.lower() not in valid_romaji_set
-                          and item.lower() != effective_a.lower()]
+            # Check for mixed nonsense items: anything that is not a known romaji syllable
+            non_romaji = [item for item, m in zip(d, hits.d)
+                          if m & NON_ROMAJI and item.lower() != effective_a.lower()]
             if non_romaji:
                 new_d = get_kana_distractors(effective_a, cat)
                 changes.append(f'Replaced mixed nonsense distractors with valid romaji options')
 
     elif cat == 'kanji':
-        if needs_distractor_fix(d, effective_a, cat):
+        if needs_distractor_fix(d, hits.d):
             new_d = get_kanji_distractors(effective_a, d)
             changes.append('Replaced placeholder distractors with semantically plausible kanji meanings')
         elif len(d) < 6:
@@ -320,10 +359,7 @@ def process_row(row: dict) -> dict:
 
     elif cat == 'grammar':
         # Grammar distractors: many have mixed quality
-        bad_tokens_in_d = {'x-ray', 'x ray', 'home', 'form', 'type', 'class', 'kind',
-                           'fairly', 'quite', 'rather', 'likely', 'partly', 'almost',
-                           'barely', 'hardly', 'corporal'}
-        bad_count = sum(1 for item in d if item.strip().lower() in bad_tokens_in_d)
+        bad_count = sum(1 for m in hits.d if m & GRAMMAR_OFFTOPIC)
         if bad_count >= 1 or len(d) < 6:
             new_d = get_grammar_distractors(effective_a, d)
             if bad_count >= 1:
@@ -351,31 +387,27 @@ def process_row(row: dict) -> dict:
     return out
 
 
+fix_row = process_row  # sweep.py entry point
+
+
 def process_batch(batch_num: int) -> tuple[int, int, int]:
     """Process one batch. Returns (total, changed, fixed_d)."""
-    in_path = f'/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/batches/vocab-ja/batch-{batch_num:03d}.jsonl'
-    out_path = f'/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/results/vocab-ja/batch-{batch_num:03d}.jsonl'
-
-    with open(in_path) as f:
-        rows = [json.loads(line) for line in f]
+    in_path = os.path.join(BATCH_DIR, f'batch-{batch_num:03d}.jsonl')
+    out_path = os.path.join(RESULT_DIR, f'batch-{batch_num:03d}.jsonl')
 
-    results = []
     changed = 0
     fixed_d = 0
 
-    for row in rows:
-        out = process_row(row)
-        results.append(out)
-        if out['i']:
-            changed += 1
-        if out['d'] != row['d']:
-            fixed_d += 1
-
-    with open(out_path, 'w', encoding='utf-8') as f:
-        for r in results:
-            f.write(json.dumps(r, ensure_ascii=False) + '\n')
+    with JsonlWriter(out_path) as writer:
+        for row in read_jsonl(in_path):
+            out = process_row(row)
+            writer.write(out)
+            if out['i']:
+                changed += 1
+            if out['d'] != row['d']:
+                fixed_d += 1
 
-    return len(rows), changed, fixed_d
+    return writer.rows, changed, fixed_d
 
 
 if __name__ == '__main__':
@@ -383,7 +415,7 @@ if __name__ == '__main__':
     total_changed = 0
     total_fixed_d = 0
 
-    for batch_num in range(19):
+    for batch_num in BATCHES:
         rows, changed, fixed_d = process_batch(batch_num)
         total_rows += rows
         total_changed += changed
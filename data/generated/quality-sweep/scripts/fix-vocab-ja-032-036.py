@@ -11,12 +11,27 @@ Fixes:
 Output format: {"id","q","a","d","e","l1","l2","i"}
   - null means unchanged from source
   - "d" is always the full distractor array (never null)
+
+Also a sweep.py fixer plugin: GROUP, BATCHES and fix_row(record); its detection
+rules (RULES) run on the sweep_rules.py engine.
 """
 
-import json, os, sys
+import os, sys
+
+SWEEP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SWEEP_DIR)
+
+from jsonl_io import JsonlWriter, read_jsonl
+from sweep_rules import (All, AnswerLongerThan, AnswerSuffix, Any, Contains, HasAnswer,
+                         Prefix, Rule, RuleSet, SHARED_RULES, Suffix, Words)
 
-BATCHES_DIR = "/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/batches/vocab-ja"
-RESULTS_DIR = "/Users/damion/CODE/Recall_Rogue/data/generated/quality-sweep/results/vocab-ja"
+BATCHES_DIR = os.path.join(SWEEP_DIR, "batches", "vocab-ja")
+RESULTS_DIR = os.path.join(SWEEP_DIR, "results", "vocab-ja")
+
+# sweep.py plugin declaration
+GROUP = "vocab-ja"
+BATCHES = range(32, 37)
+DEPENDS = ("sweep_rules.py",)
 
 # ─── Replacement distractor sets ─────────────────────────────────────────────
 # Keyed by id → list of 6-8 semantically appropriate English meanings
@@ -384,110 +399,92 @@ REPLACEMENTS = {
 }
 
 
+# ─── Detection rules (sweep_rules.py) ────────────────────────────────────────
+# A record needs a replacement set when any distractor hits one of these.
+
+RULES = [
+    # placeholder variants
+    Rule("ja-option-placeholder", "d", Contains("option-", case=False), "replace", groups=(GROUP,)),
+    Rule("ja-placeholder-term", "d",
+         Words("allied term", "variant meaning", "kindred concept",
+               "parallel concept", "associated meaning", strip=False),
+         "replace", groups=(GROUP,)),
+    # near-synonym derivatives of the answer
+    Rule("ja-near-synonym", "d",
+         All(Any(Contains("similar ", "form of ", "type of ", "variant of ",
+                          "style of ", "example of ", case=False),
+                 Suffix("-like", case=False)),
+             HasAnswer()),
+         "replace", groups=(GROUP,)),
+    # long-form answer + verb particle patterns
+    Rule("ja-particle-variant", "d",
+         All(Suffix(" away", " out", " up", " back", case=False),
+             AnswerLongerThan(6), AnswerSuffix(" away", " out", " up", " back")),
+         "replace", groups=(GROUP,)),
+    Rule("ja-auxiliary-variant", "d",
+         All(AnswerLongerThan(6),
+             Prefix("to continue ", "to help ", "to attempt ", "to cause ", case=False),
+             HasAnswer()),
+         "replace", groups=(GROUP,)),
+    # bad grammar-phrase distractors
+    Rule("ja-filler-phrase", "d",
+         Prefix("and at the same", "in addition to that",
+                "it is not the case", "on the other hand",
+                "when all is said", "in the final analysis",
+                "the key point being", "as far as I know"),
+         "replace", groups=(GROUP,)),
+]
+ENGINE = RuleSet(SHARED_RULES + RULES).compile(GROUP)
+REPLACE = ENGINE.action_mask("replace")
+
+
 def needs_fix(record):
     """Return True if any distractor is a placeholder or derivative pattern."""
-    a = record["a"].lower().strip()
-    for d in record["d"]:
-        dl = d.lower()
-        # placeholder variants
-        if "option-" in dl:
-            return True
-        if dl in ("allied term", "variant meaning", "kindred concept",
-                  "parallel concept", "associated meaning"):
-            return True
-        # near-synonym derivatives
-        if (("similar " in dl and a in dl) or
-            ("form of " in dl and a in dl) or
-            ("type of " in dl and a in dl) or
-            ("variant of " in dl and a in dl) or
-            ("style of " in dl and a in dl) or
-            ("example of " in dl and a in dl) or
-            (dl.endswith("-like") and a in dl)):
-            return True
-        # long-form answer + verb particle patterns
-        if len(a) > 6:
-            for suffix in (" away", " out", " up", " back"):
-                if dl == a + suffix:
-                    return True
-            for prefix in ("to continue ", "to help ", "to attempt ", "to cause "):
-                if dl.startswith(prefix) and a in dl:
-                    return True
-        # bad grammar-phrase distractors
-        if d.startswith((
-            "and at the same", "in addition to that",
-            "it is not the case", "on the other hand",
-            "when all is said", "in the final analysis",
-            "the key point being", "as far as I know"
-        )):
-            return True
-    return False
+    return any(m & REPLACE for m in ENGINE.match(record).d)
+
+
+def fix_row(rec):
+    """Result row for one record: replacement d for known-bad sets, else passed through."""
+    rid = rec["id"]
+    new_d = rec["d"]
+    if needs_fix(rec):
+        if rid in REPLACEMENTS:
+            # Ensure no duplicates and not equal to answer
+            ans_lower = rec["a"].lower().strip()
+            new_d = [x for x in dict.fromkeys(REPLACEMENTS[rid]) if x.lower().strip() != ans_lower]
+        else:
+            # No replacement defined — pass through with existing d (flag for review)
+            print(f"  WARNING: no replacement defined for {rid} ({rec['a']})", file=sys.stderr)
+    return {
+        "id": rid,
+        "q": None,
+        "a": None,
+        "d": new_d,
+        "e": None,
+        "l1": None,
+        "l2": None,
+        "i": None,
+    }
 
 
 def process_batch(batch_num):
     src = f"{BATCHES_DIR}/batch-0{batch_num}.jsonl"
     dst = f"{RESULTS_DIR}/batch-0{batch_num}.jsonl"
 
-    with open(src) as f:
-        records = [json.loads(line) for line in f if line.strip()]
-
-    out_lines = []
     fixed = 0
-    for rec in records:
-        rid = rec["id"]
-        if needs_fix(rec):
-            if rid in REPLACEMENTS:
-                new_d = REPLACEMENTS[rid]
-                # Ensure no duplicates and not equal to answer
-                ans_lower = rec["a"].lower().strip()
-                new_d = [x for x in dict.fromkeys(new_d) if x.lower().strip() != ans_lower]
-                result = {
-                    "id": rid,
-                    "q": None,
-                    "a": None,
-                    "d": new_d,
-                    "e": None,
-                    "l1": None,
-                    "l2": None,
-                    "i": None,
-                }
+    with JsonlWriter(dst) as out:
+        for rec in read_jsonl(src):
+            result = fix_row(rec)
+            if result["d"] is not rec["d"]:
                 fixed += 1
-            else:
-                # No replacement defined — pass through with existing d (flag for review)
-                print(f"  WARNING: no replacement defined for {rid} ({rec['a']})", file=sys.stderr)
-                result = {
-                    "id": rid,
-                    "q": None,
-                    "a": None,
-                    "d": rec["d"],
-                    "e": None,
-                    "l1": None,
-                    "l2": None,
-                    "i": None,
-                }
-        else:
-            # Clean record — emit with full d array (unchanged), all others null
-            result = {
-                "id": rid,
-                "q": None,
-                "a": None,
-                "d": rec["d"],
-                "e": None,
-                "l1": None,
-                "l2": None,
-                "i": None,
-            }
-        out_lines.append(json.dumps(result, ensure_ascii=False))
-
-    os.makedirs(RESULTS_DIR, exist_ok=True)
-    with open(dst, "w") as f:
-        f.write("\n".join(out_lines) + "\n")
-
-    print(f"batch-0{batch_num}: wrote {len(out_lines)} records, fixed {fixed} distractor sets → {dst}")
+            out.write(result)
+
+    print(f"batch-0{batch_num}: wrote {out.rows} records, fixed {fixed} distractor sets → {dst}")
     return fixed
 
 
 if __name__ == "__main__":
     total = 0
-    for n in [32, 33, 34, 35, 36]:
+    for n in BATCHES:
         total += process_batch(n)
     print(f"\nTotal distractor sets replaced: {total}")
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Offline semantic-neighbour distractor service.
+
+Suggests replacement distractors for a row from the other answers (glosses)
+of the same batch group: neighbours of the row's answer in an embedding
+space, of the same part of speech, and inside a similarity band. Too close is
+a synonym (a second correct answer), too far is obviously wrong.
+
+Experimental: no fixer reads it yet. Coverage is low (on the current batches
+about 13k of 47k rows get any suggestion, and in vocab-ja only ~350 of 13k get
+the FIXER_MIN a fixer needs), and knowledge groups get off-type neighbours
+(species binomials such as "Dicaeum trochileum" for "Bird"). main() prints
+coverage per group next to the timing; check it, and spot-check the output,
+before pointing a fixer at this instead of its fixed pools.
+
+Everything is local and NumPy-only; nothing touches the network.
+
+Embeddings
+  Default: word vectors learned from the decks themselves. Each row (answer,
+  source sentence, explanation) is one context. Words get random index
+  vectors, each row sums the IDF-weighted index vectors of its words, and
+  each word sums the vectors of the rows it occurs in: a random projection of
+  the word co-occurrence matrix. The mean and top principal components are
+  removed and the result is reduced to DIM dimensions.
+  --vectors FILE: use pretrained word vectors from a local GloVe/fastText
+  text file instead ("word v1 v2 ..." per line, optional "count dim" header).
+  A gloss is the IDF-weighted mean of its word vectors.
+
+Index
+  One IVF index per group: spherical k-means splits the gloss vectors into
+  ~sqrt(n) lists; a query scans the NPROBE lists whose centroids are closest.
+  Queries are answered in batches, one matrix product per batch for the
+  centroid step.
+
+Output (reports/semantic-distractors.jsonl), one line per row with suggestions:
+    {"id": ..., "a": ..., "pos": "verb", "d": ["...", ...], "sim": [0.61, ...]}
+Fixers read it through load_suggestions().
+
+Usage:
+    python semantic_distractors.py                     # every group, all rows
+    python semantic_distractors.py --group vocab-ja --band 0.4 0.8
+    python semantic_distractors.py --vectors ~/models/glove.6B.100d.txt
+"""
+
+import argparse
+import json
+import math
+import re
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+from jsonl_io import JsonlWriter, read_jsonl
+
+SWEEP_DIR = Path(__file__).resolve().parent
+OUTPUT_PATH = Path("reports") / "semantic-distractors.jsonl"
+
+DIM = 96           # gloss vector size
+INDEX_DIM = 256    # random index vector size (co-occurrence projection)
+DROP_PCS = 2       # dominant directions removed (mostly frequency / template words)
+MIN_COUNT = 2      # words seen in fewer rows get no vector
+NPROBE = 8         # IVF lists scanned per query
+SCAN = 64          # nearest candidates considered per query before filtering
+BAND = (0.45, 0.88)
+K = 8
+FIXER_MIN = 6      # suggestions a fixer needs to refill a row's distractors
+SEED = 1234
+
+WORD_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+POS_RE = re.compile(r"\bis an? (noun|verb|adjective|adverb)\b")
+CLEAN_RE = re.compile(r"[A-Za-z][A-Za-z' ,\-]*[A-Za-z]")
+STOPWORDS = frozenset("""
+a an the to of in on at by for with from and or but not no is are was were be been being
+it its this that these those as so if than then there their they he she his her him we you
+i me my our your one s which who what when where how why do does did has have had will
+would can could may might shall should must about into over up out also such other
+""".split())
+
+
+# ─── Text ────────────────────────────────────────────────────────────────────
+
+def tokens(text: str) -> list[str]:
+    return WORD_RE.findall(text.lower()) if text else []
+
+
+def content_tokens(text: str) -> list[str]:
+    return [t for t in tokens(text) if t not in STOPWORDS]
+
+
+def normalize(gloss: str) -> str:
+    return " ".join(gloss.lower().split())
+
+
+def gloss_pos(gloss: str, explanation: str = "") -> str:
+    """Coarse part of speech: verb, noun, adjective, adverb, phrase, name or word."""
+    g = normalize(gloss)
+    if g.startswith("to "):
+        return "verb"
+    if ";" in g or len(g.split()) >= 3:
+        return "phrase"
+    m = POS_RE.search(explanation or "")
+    if m:
+        return m.group(1)
+    if gloss.strip()[:1].isupper():
+        return "name"
+    return "word"
+
+
+def is_clean(gloss: str) -> bool:
+    """Usable as a distractor as-is: plain words, no dictionary markup or romaji stubs."""
+    return bool(CLEAN_RE.fullmatch(gloss.strip())) and len(gloss.strip()) >= 3
+
+
+# ─── Embeddings ──────────────────────────────────────────────────────────────
+
+class WordVectors:
+    """Unit word vectors plus IDF weights for composing gloss vectors."""
+
+    def __init__(self, vocab: dict[str, int], vectors: np.ndarray, idf: np.ndarray):
+        self.vocab = vocab
+        self.vectors = vectors
+        self.idf = idf
+
+    def embed(self, glosses: list[str]) -> np.ndarray:
+        """IDF-weighted mean of each gloss's word vectors, normalized; zero rows for unknown glosses."""
+        out = np.zeros((len(glosses), self.vectors.shape[1]), dtype=np.float32)
+        for i, gloss in enumerate(glosses):
+            ids = [self.vocab[t] for t in content_tokens(gloss) if t in self.vocab]
+            if ids:
+                out[i] = self.idf[ids] @ self.vectors[ids]
+        return _unit(out)
+
+
+def _unit(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return np.divide(x, norms, out=np.zeros_like(x), where=norms > 0)
+
+
+def _document_frequencies(contexts: list[list[str]]) -> Counter:
+    df = Counter()
+    for ctx in contexts:
+        df.update(set(ctx))
+    return df
+
+
+def _sparse_product(out_idx: np.ndarray, in_idx: np.ndarray, weights: np.ndarray,
+                    dense: np.ndarray, n_out: int, step: int = 1 << 16) -> np.ndarray:
+    """out[o] = Σ weights · dense[in] over the (o, in) pairs; sorted segments summed with reduceat."""
+    order = np.argsort(out_idx, kind="stable")
+    out_idx, in_idx, weights = out_idx[order], in_idx[order], weights[order]
+    out = np.zeros((n_out, dense.shape[1]), dtype=np.float32)
+    for s in range(0, len(out_idx), step):
+        o = out_idx[s:s + step]
+        starts = np.flatnonzero(np.r_[True, o[1:] != o[:-1]])
+        out[o[starts]] += np.add.reduceat(weights[s:s + step, None] * dense[in_idx[s:s + step]], starts, axis=0)
+    return out
+
+
+def learn_vectors(contexts: list[list[str]], dim: int = DIM) -> WordVectors:
+    """Corpus word vectors by random indexing of row co-occurrence (see module docstring)."""
+    df = _document_frequencies(contexts)
+    words = sorted(w for w, n in df.items() if n >= MIN_COUNT)
+    vocab = {w: i for i, w in enumerate(words)}
+    n_docs = len(contexts)
+    idf = np.array([math.log(n_docs / df[w]) for w in words], dtype=np.float32)
+
+    rows, cols = [], []
+    for r, ctx in enumerate(contexts):
+        ids = {vocab[t] for t in ctx if t in vocab}
+        rows.extend([r] * len(ids))
+        cols.extend(ids)
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    weights = idf[cols]
+
+    rng = np.random.default_rng(SEED)
+    index = rng.standard_normal((len(words), INDEX_DIM)).astype(np.float32) / np.sqrt(INDEX_DIM)
+    docs = _sparse_product(rows, cols, weights, index, n_docs)        # A·R
+    context = _sparse_product(cols, rows, weights, docs, len(words))  # Aᵀ·(A·R)
+    context -= idf[:, None] ** 2 * index   # drop each word's co-occurrence with itself
+
+    context = _unit(context)
+    context -= context.mean(axis=0)
+    _, _, vt = np.linalg.svd(context, full_matrices=False)
+    reduced = context @ vt[DROP_PCS:DROP_PCS + dim].T
+    return WordVectors(vocab, _unit(reduced), idf)
+
+
+def load_vectors(path: Path, contexts: list[list[str]]) -> WordVectors:
+    """Pretrained vectors from a GloVe/fastText text file, restricted to words in the decks."""
+    df = _document_frequencies(contexts)
+    n_docs = len(contexts)
+    words, vecs = [], []
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.rstrip().split(" ")
+            if len(parts) <= 2 or parts[0] not in df:   # header line or unused word
+                continue
+            words.append(parts[0])
+            vecs.append(np.asarray(parts[1:], dtype=np.float32))
+    if not words:
+        raise ValueError(f"{path}: no vectors for any deck word")
+    idf = np.array([math.log(n_docs / df[w]) for w in words], dtype=np.float32)
+    return WordVectors({w: i for i, w in enumerate(words)}, _unit(np.stack(vecs)), idf)
+
+
+# ─── IVF index ───────────────────────────────────────────────────────────────
+
+class IVFIndex:
+    """Inverted-file ANN index over unit vectors (cosine similarity)."""
+
+    def __init__(self, vectors: np.ndarray, nlist: int | None = None, iters: int = 12):
+        self.vectors = vectors
+        n = len(vectors)
+        nlist = max(1, min(n, nlist or int(math.sqrt(n))))
+        rng = np.random.default_rng(SEED)
+        centroids = vectors[rng.choice(n, nlist, replace=False)]
+        for _ in range(iters):   # spherical k-means
+            assign = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, vectors)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _unit(sums)
+        self.centroids = centroids
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlist + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(nlist)]
+
+    def search(self, queries: np.ndarray, k: int = SCAN, nprobe: int = NPROBE,
+               batch: int = 2048) -> tuple[np.ndarray, np.ndarray]:
+        """(ids, sims), each (len(queries), k), best first; id -1 pads short results."""
+        nprobe = min(nprobe, len(self.lists))
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        sims = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for s in range(0, len(queries), batch):
+            q = queries[s:s + batch]
+            probes = np.argpartition(-(q @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+            for i, row in enumerate(probes):
+                cand = np.concatenate([self.lists[c] for c in row])
+                scores = self.vectors[cand] @ q[i]
+                top = np.argsort(-scores)[:k]
+                ids[s + i, :len(top)] = cand[top]
+                sims[s + i, :len(top)] = scores[top]
+        return ids, sims
+
+
+# ─── Suggestions ─────────────────────────────────────────────────────────────
+
+def _too_close(taken: set[str], candidate: str) -> bool:
+    """Shares a content word (or a 5-letter stem) with the answer or a picked candidate."""
+    for t in content_tokens(candidate):
+        if t in taken or (len(t) >= 5 and any(len(a) >= 5 and t[:5] == a[:5] for a in taken)):
+            return True
+    return False
+
+
+def suggest_group(rows: list[dict], wv: WordVectors, k: int = K, band=BAND) -> list[dict]:
+    """Suggestions for every row of one group, answered in one batched search."""
+    glosses: dict[str, tuple[str, str]] = {}   # normalized -> (display form, pos)
+    for row in rows:
+        a = row.get("a")
+        if a:
+            glosses.setdefault(normalize(a), (a.strip(), gloss_pos(a, row.get("e", ""))))
+    keys = list(glosses)
+    vecs = wv.embed(keys)
+    known = np.flatnonzero(vecs.any(axis=1))
+    if len(known) < 2:
+        return []
+    index = IVFIndex(vecs[known])
+    ids, sims = index.search(vecs[known])
+
+    lo, hi = band
+    by_gloss: dict[str, tuple[list[str], list[float]]] = {}
+    for qi, gi in enumerate(known):
+        key = keys[gi]
+        pos = glosses[key][1]
+        taken = set(content_tokens(key))   # answer words, then every picked candidate's words
+        picked, scores = [], []
+        for ci, sim in zip(ids[qi], sims[qi]):
+            if ci < 0 or sim < lo:
+                break
+            cand = keys[known[ci]]
+            display, cand_pos = glosses[cand]
+            if sim > hi or cand_pos != pos or not is_clean(display) or _too_close(taken, cand):
+                continue
+            taken.update(content_tokens(cand))
+            picked.append(glosses[cand][0])
+            scores.append(round(float(sim), 3))
+            if len(picked) == k:
+                break
+        by_gloss[key] = (picked, scores)
+
+    out = []
+    for row in rows:
+        a = row.get("a")
+        picked, scores = by_gloss.get(normalize(a), ([], [])) if a else ([], [])
+        if picked:
+            out.append({"id": row["id"], "a": a, "pos": glosses[normalize(a)][1], "d": picked, "sim": scores})
+    return out
+
+
+def load_suggestions(path: Path = SWEEP_DIR / OUTPUT_PATH) -> dict[str, list[str]]:
+    """id -> suggested distractors, from the file this script writes ({} if absent)."""
+    if not path.exists():
+        return {}
+    return {r["id"]: r["d"] for r in read_jsonl(path) if r.get("d")}
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+def load_rows(sweep_dir: Path) -> dict[str, list[dict]]:
+    manifest = json.loads((sweep_dir / "manifest.json").read_text(encoding="utf-8"))
+    groups: dict[str, list[dict]] = defaultdict(list)
+    for batch in manifest["batches"]:
+        groups[batch["group"]].extend(read_jsonl(sweep_dir / batch["file"]))
+    return groups
+
+
+def coverage(n: int, total: int) -> str:
+    return f"{n:>6} ({n / total:6.1%})" if total else f"{n:>6}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Suggest same-POS semantic-neighbour distractors offline")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR)
+    parser.add_argument("--group", action="append", default=[], help="Restrict to these groups (repeatable)")
+    parser.add_argument("--vectors", type=Path, help="Local GloVe/fastText text vectors (default: learn from decks)")
+    parser.add_argument("--band", type=float, nargs=2, default=BAND, metavar=("LO", "HI"),
+                        help=f"Cosine similarity band (default {BAND[0]} {BAND[1]})")
+    parser.add_argument("-k", type=int, default=K, help="Suggestions per row")
+    parser.add_argument("--out", type=Path, default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    groups = load_rows(args.sweep_dir)
+    # Vectors always come from every group, so a --group run matches a full one
+    contexts = [tokens(r.get("a") or "") + tokens(r.get("s") or "") + tokens(r.get("e") or "")
+                for rows in groups.values() for r in rows]
+    wv = load_vectors(args.vectors, contexts) if args.vectors else learn_vectors(contexts)
+    print(f"Embeddings: {len(wv.vocab)} words × {wv.vectors.shape[1]} dims "
+          f"({'from ' + str(args.vectors) if args.vectors else 'learned from decks'}) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    total_rows = total_hits = total_full = 0
+    with JsonlWriter(args.sweep_dir / args.out) as out:
+        for group, rows in sorted(groups.items()):
+            if args.group and group not in args.group:
+                continue
+            t0 = time.perf_counter()
+            suggestions = suggest_group(rows, wv, args.k, tuple(args.band))
+            for s in suggestions:
+                out.write(s)
+            full = sum(len(s["d"]) >= FIXER_MIN for s in suggestions)
+            total_rows += len(rows)
+            total_hits += len(suggestions)
+            total_full += full
+            print(f"  {group:<30} {len(rows):>6} rows  {coverage(len(suggestions), len(rows))} with suggestions  "
+                  f"{coverage(full, len(rows))} with {FIXER_MIN}+  {time.perf_counter() - t0:5.2f}s")
+    print(f"\n{coverage(total_hits, total_rows)} rows with suggestions, {coverage(total_full, total_rows)} "
+          f"with {FIXER_MIN}+ (of {total_rows}) in {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Quality-sweep runner.
+
+Discovers every group and batch from manifest.json and runs the registered
+fixer plugins over them on a process pool. Replaces the per-script serial
+loops (process_vocab_de.py, process_vocab_ja.py, scripts/fix-vocab-ja-*.py).
+
+A fixer plugin is a module listed in FIXERS that declares
+    GROUP    manifest group it fixes, e.g. "vocab-de"
+    BATCHES  batch indices it owns (range or list)
+    fix_row  fix_row(row) -> result row {"id","q","a","d","e","l1","l2","i"}
+Batches no plugin owns are left alone: their results/ files come from the
+sweep workers and are never overwritten here. Two plugins claiming the same
+batch is an error.
+
+Rows stream from the batch file through the fixer into a temp file that is
+renamed into place (jsonl_io.py), so memory stays flat however large a batch
+is and an interrupted run never leaves a half-written result for the apply
+step. All paths are relative to this directory (or --sweep-dir).
+
+Runs are incremental (sweep_cache.py): a batch is only re-processed when its
+input file, its plugin's source (which holds the word lists) and DEPENDS, the
+runner's own code (RUNNER_DEPENDS; plus sweep_delta.py for --delta) or its
+result file changed since the last run. A re-processed batch is compared row by row
+with its previous result; the file is only replaced when its bytes differ, and
+reports/sweep-run.json lists the ids of the rows whose content did.
+
+Fixers that detect with sweep_rules.py expose their compiled ENGINE; its
+per-rule hit counts and evaluation times are summed into the report.
+
+With --delta, owned batches are written to deltas/ in the delta format
+(sweep_delta.py: only changed rows, only changed fields) instead of full
+result files to results/; quality-sweep-db.mjs apply prefers them. A task
+deletes its batch's file in the other format, so apply never picks up one
+left from an earlier run.
+
+With --profile, every task also records wall time per call stack of fix_row,
+the helpers its plugin lists in PROFILE, ENGINE.match and each rule
+(sweep_profile.py). reports/sweep-profile.json sums it per group, batch,
+helper and rule; reports/sweep-profile.folded holds the same stacks in
+collapsed-stack format for flamegraph.pl or speedscope. Combine with --force
+to profile every owned batch rather than the dirty ones.
+
+Usage:
+    python sweep.py                         # every owned batch, all cores
+    python sweep.py --group vocab-ja -j 4
+    python sweep.py --dry-run               # list what would run
+    python sweep.py --force                 # ignore the cache
+    python sweep.py --delta                 # write deltas/ instead of results/
+    python sweep.py --force --profile       # time per batch, helper and rule
+    python sweep.py --mark-done             # every current result -> "done"; then: quality-sweep-db.mjs apply
+"""
+
+import argparse
+import dataclasses
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+
+from jsonl_io import JsonlWriter, dumps, read_jsonl
+from sweep_cache import CACHE_PATH, SweepCache, file_digest
+from sweep_delta import delta_file, result_file, to_delta
+from sweep_profile import by_frame, instrument, merge, write_folded
+from sweep_rules import merge_stats
+
+SWEEP_DIR = Path(__file__).resolve().parent
+MANIFEST_NAME = "manifest.json"
+REPORT_PATH = Path("reports") / "sweep-run.json"
+PROFILE_PATH = Path("reports") / "sweep-profile.json"
+FOLDED_PATH = Path("reports") / "sweep-profile.folded"
+
+# Runner modules whose code shapes every output file; part of each cache key.
+# Delta tasks also depend on sweep_delta.py (the delta format).
+RUNNER_DEPENDS = ("sweep.py", "jsonl_io.py")
+DELTA_DEPENDS = ("sweep_delta.py",)
+
+# Fixer plugin modules, relative to the sweep dir
+FIXERS = (
+    "process_vocab_de.py",
+    "process_vocab_ja.py",
+    "scripts/fix-vocab-ja-032-036.py",
+)
+
+RESULT_FIELDS = ("q", "a", "e", "l1", "l2")
+
+
+@dataclasses.dataclass(frozen=True)
+class Task:
+    sweep_dir: str
+    fixer: str      # plugin path, relative to sweep_dir
+    group: str
+    index: int
+    src: str        # batch file, relative to sweep_dir
+    dst: str        # result or delta file, relative to sweep_dir
+    key: str = ""   # sweep cache key
+    delta: bool = False
+    profile: bool = False
+
+
+# ─── Plugins ─────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def load_fixer(sweep_dir: str, rel_path: str):
+    """Import a plugin by path (file names may contain dashes). Cached per process."""
+    path = Path(sweep_dir) / rel_path
+    name = "sweep_fixer_" + path.stem.replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for attr in ("GROUP", "BATCHES", "fix_row"):
+        if not hasattr(module, attr):
+            raise AttributeError(f"Fixer {rel_path} does not define {attr}")
+    return module
+
+
+# ─── Manifest ────────────────────────────────────────────────────────────────
+
+def read_manifest(sweep_dir: Path) -> dict:
+    return json.loads((sweep_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+
+def write_json_atomic(path: Path, data) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def plan(manifest: dict, sweep_dir: Path, fixers=FIXERS, groups=None,
+         delta: bool = False) -> tuple[list[Task], dict]:
+    """
+    Tasks for every manifest batch owned by a plugin, plus per-group counts of
+    batches nobody owns.
+    """
+    owner: dict[tuple[str, int], str] = {}
+    for rel in fixers:
+        module = load_fixer(str(sweep_dir), rel)
+        for index in module.BATCHES:
+            key = (module.GROUP, index)
+            if key in owner:
+                raise ValueError(f"{module.GROUP} batch {index} claimed by both {owner[key]} and {rel}")
+            owner[key] = rel
+
+    tasks, unowned = [], {}
+    for batch in manifest["batches"]:
+        if groups and batch["group"] not in groups:
+            continue
+        rel = owner.get((batch["group"], batch["index"]))
+        if rel is None:
+            unowned[batch["group"]] = unowned.get(batch["group"], 0) + 1
+            continue
+        dst = delta_file(batch) if delta else result_file(batch)
+        tasks.append(Task(str(sweep_dir), rel, batch["group"], batch["index"],
+                          batch["file"], dst, delta=delta))
+    return tasks, unowned
+
+
+# ─── Worker ──────────────────────────────────────────────────────────────────
+
+def is_changed(row: dict, result: dict) -> bool:
+    return (bool(result.get("i"))
+            or any(result.get(k) is not None for k in RESULT_FIELDS)
+            or result.get("d") != row.get("d"))
+
+
+def previous_rows(path: Path) -> dict[str, int]:
+    """Hash of each row of the last result, by id, in canonical form ({} if there is none)."""
+    out: dict[str, int] = {}
+    if not path.exists():
+        return out
+    try:
+        for row in read_jsonl(path):
+            out[str(row.get("id"))] = hash(dumps(row))
+    except (ValueError, AttributeError):
+        pass  # hand-edited or truncated: the rows from there on count as changed
+    return out
+
+
+def run_task(task: Task) -> dict:
+    start = time.perf_counter()
+    module = load_fixer(task.sweep_dir, task.fixer)
+    fix_row = module.fix_row
+    if task.profile:
+        profiler = instrument(module)
+        fix_row = profiler.wrap("fix_row", fix_row)
+    root = Path(task.sweep_dir)
+    dst = root / task.dst
+
+    previous = previous_rows(dst)
+    old_digest = file_digest(dst) if dst.exists() else None
+    rows = changed = 0
+    rows_changed = []
+    # Rows stream from the batch file through the fixer into the temp file
+    with JsonlWriter(dst) as out:
+        for row in read_jsonl(root / task.src):
+            result = fix_row(row)
+            rows += 1
+            changed += is_changed(row, result)
+            if task.delta:
+                result = to_delta(row, result)
+                if result is None:
+                    if str(row["id"]) in previous:
+                        rows_changed.append(row["id"])
+                    continue
+            line = dumps(result)
+            out.write_line(line)
+            if previous.get(str(result["id"])) != hash(line):
+                rows_changed.append(result["id"])
+        written = out.digest != old_digest
+        if not written:
+            out.discard()
+    (root / (result_file if task.delta else delta_file)({"file": task.src})).unlink(missing_ok=True)
+    return {
+        "group": task.group,
+        "index": task.index,
+        "fixer": task.fixer,
+        "rows": rows,
+        "changed": changed,
+        "written": written,
+        "rowsChanged": rows_changed,
+        "digest": out.digest,
+        "rules": module.ENGINE.take_stats() if hasattr(module, "ENGINE") else {},
+        "profile": profiler.take() if task.profile else {},
+        "seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+def attach_keys(tasks: list[Task], cache: SweepCache) -> list[Task]:
+    """Cache key per task: input batch, plugin source, its DEPENDS and the runner's own code."""
+    keyed = []
+    for t in tasks:
+        root = Path(t.sweep_dir)
+        depends = (*getattr(load_fixer(t.sweep_dir, t.fixer), "DEPENDS", ()),
+                   *RUNNER_DEPENDS, *(DELTA_DEPENDS if t.delta else ()))
+        key = cache.key(root / t.src, cache.fixer_digest(root, t.fixer, depends))
+        keyed.append(dataclasses.replace(t, key=key))
+    return keyed
+
+
+def is_current(t: Task, cache: SweepCache) -> bool:
+    return cache.is_current(t.dst, t.key, Path(t.sweep_dir) / t.dst)
+
+
+def select_dirty(tasks: list[Task], cache: SweepCache, force: bool = False) -> list[Task]:
+    """The keyed tasks whose key or result file changed (all of them with force)."""
+    return [t for t in tasks if force or not is_current(t, cache)]
+
+
+def mark_done(manifest: dict, current: list[Task], written: set[tuple[str, int]]) -> int:
+    """
+    Set status "done" on every owned batch whose result is current, so the
+    apply step picks it up. A batch already "applied" keeps that status unless
+    this run rewrote its result. Returns the number of batches marked.
+    """
+    current_keys = {(t.group, t.index) for t in current}
+    marked = 0
+    for batch in manifest["batches"]:
+        key = (batch["group"], batch["index"])
+        if key in written or (key in current_keys and batch.get("status") != "applied"):
+            marked += batch.get("status") != "done"
+            batch["status"] = "done"
+    return marked
+
+
+def write_mark_done(sweep_dir: Path, manifest: dict, owned: list[Task], cache: SweepCache,
+                    written: set[tuple[str, int]]) -> None:
+    current = [t for t in owned if is_current(t, cache)]
+    marked = mark_done(manifest, current, written)
+    write_json_atomic(sweep_dir / MANIFEST_NAME, manifest)
+    print(f"Marked {marked} batches done in {MANIFEST_NAME} ({len(current)} of {len(owned)} owned results current)")
+
+
+# ─── Profile ─────────────────────────────────────────────────────────────────
+
+def write_profile(sweep_dir: Path, jobs: int, elapsed: float, stats: list[dict],
+                  profiles: list[dict], rules: dict) -> None:
+    """
+    Sum the per-task stacks into reports/sweep-profile.json and the folded
+    stack file. Stacks are rooted at group;fixer; the part of a batch's time
+    outside fix_row (reading, hashing, writing) is its "io" frame.
+    """
+    stacks: dict = {}
+    groups: dict[str, dict] = {}
+    batches = []
+    for s, profile in zip(stats, profiles):
+        prefix = f"{s['group']};{Path(s['fixer']).name};"
+        fix_row = profile.get("fix_row", [0.0, 0])[0]
+        merge(stacks, profile, prefix)
+        merge(stacks, {"io": [max(s["seconds"] - fix_row, 0.0), 1]}, prefix)
+
+        g = groups.setdefault(s["group"], {"batches": 0, "rows": 0, "seconds": 0.0, "fixRowSeconds": 0.0})
+        g["batches"] += 1
+        g["rows"] += s["rows"]
+        g["seconds"] += s["seconds"]
+        g["fixRowSeconds"] += fix_row
+        batches.append({"group": s["group"], "index": s["index"], "fixer": s["fixer"],
+                        "rows": s["rows"], "seconds": s["seconds"],
+                        "frames": {name: f["seconds"] for name, f in by_frame(profile).items()}})
+    for g in groups.values():
+        g["rowsPerSecond"] = round(g["rows"] / g["seconds"]) if g["seconds"] else None
+        g["seconds"] = round(g["seconds"], 4)
+        g["fixRowSeconds"] = round(g["fixRowSeconds"], 4)
+
+    lines = write_folded(sweep_dir / FOLDED_PATH, stacks)
+    frames = by_frame(stacks)
+    write_json_atomic(sweep_dir / PROFILE_PATH, {
+        "generatedAt": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "command": "sweep --profile",
+        "jobs": jobs,
+        "seconds": round(elapsed, 3),
+        "folded": str(FOLDED_PATH),
+        "groups": dict(sorted(groups.items())),
+        "frames": frames,
+        "rules": rules,
+        "batches": sorted(batches, key=lambda b: -b["seconds"]),
+    })
+
+    print(f"\nProfile: {PROFILE_PATH}, {FOLDED_PATH} ({lines} stacks)")
+    for name, f in list(frames.items())[:8]:
+        print(f"  {name:<34} {f['calls']:>7} calls  {f['seconds'] * 1000:9.2f} ms  "
+              f"{f['selfSeconds'] * 1000:9.2f} ms self")
+
+
+# ─── Main ────────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run quality-sweep fixer plugins over manifest batches")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR)
+    parser.add_argument("--group", action="append", default=[], help="Restrict to these groups (repeatable)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--dry-run", action="store_true", help="List the batches that would run")
+    parser.add_argument("--force", action="store_true", help="Re-process every owned batch, ignoring the cache")
+    parser.add_argument("--delta", action="store_true", help="Write delta files to deltas/ instead of results/")
+    parser.add_argument("--mark-done", action="store_true",
+                        help='Set status "done" on every owned batch with a current result, '
+                             'so the apply step picks them up')
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Time batches, helpers and rules into {PROFILE_PATH} and {FOLDED_PATH}")
+    args = parser.parse_args()
+
+    sweep_dir = args.sweep_dir.resolve()
+    manifest = read_manifest(sweep_dir)
+    owned, unowned = plan(manifest, sweep_dir, groups=set(args.group), delta=args.delta)
+    cache = SweepCache(sweep_dir / CACHE_PATH)
+    owned = attach_keys(owned, cache)
+    tasks = select_dirty(owned, cache, args.force)
+    if args.profile:
+        tasks = [dataclasses.replace(t, profile=True) for t in tasks]
+
+    print(f"Manifest: {len(manifest['batches'])} batches, {manifest.get('totalRows', '?')} rows")
+    print(f"Fixers:   {len(owned)} batches owned, {sum(unowned.values())} left to sweep workers")
+    print(f"Cache:    {len(owned) - len(tasks)} up to date, {len(tasks)} dirty")
+    if args.dry_run:
+        for t in tasks:
+            print(f"  {t.group}/batch-{t.index:03d}  <- {t.fixer}")
+        return
+    if not tasks:
+        if args.mark_done:
+            write_mark_done(sweep_dir, manifest, owned, cache, set())
+        return
+
+    start = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            stats = list(pool.map(run_task, tasks, chunksize=max(1, len(tasks) // (args.jobs * 4))))
+    else:
+        stats = [run_task(t) for t in tasks]
+    elapsed = time.perf_counter() - start
+
+    rules = {}
+    profiles = []
+    for t, s in zip(tasks, stats):
+        cache.record(t.dst, t.key, s.pop("digest"))
+        rules = merge_stats(rules, s.pop("rules"))
+        profiles.append(s.pop("profile"))
+    cache.save()
+
+    by_group: dict[str, dict] = {}
+    for s in stats:
+        g = by_group.setdefault(s["group"], {"batches": 0, "rows": 0, "changed": 0, "rowsChanged": 0})
+        g["batches"] += 1
+        g["rows"] += s["rows"]
+        g["changed"] += s["changed"]
+        g["rowsChanged"] += len(s["rowsChanged"])
+    for group, g in sorted(by_group.items()):
+        print(f"  {group:<16} {g['batches']:>4} batches  {g['rows']:>6} rows  {g['changed']:>6} fixed  "
+              f"{g['rowsChanged']:>5} differ from last run")
+
+    total_rows = sum(s["rows"] for s in stats)
+    written = [s for s in stats if s["written"]]
+    print(f"\nDone: {len(stats)} batches, {total_rows} rows in {elapsed:.2f}s ({args.jobs} jobs); "
+          f"{len(written)} result files rewritten")
+    for name, r in list(rules.items())[:3]:
+        print(f"  rule {name:<28} {r['hits']:>6} hits  {r['evaluated']:>6} evaluated  {r['seconds'] * 1000:7.2f} ms")
+
+    if args.mark_done:
+        write_mark_done(sweep_dir, manifest, owned, cache, {(s["group"], s["index"]) for s in written})
+
+    (sweep_dir / REPORT_PATH).parent.mkdir(parents=True, exist_ok=True)
+    if args.profile:
+        write_profile(sweep_dir, args.jobs, elapsed, stats, profiles, rules)
+    write_json_atomic(sweep_dir / REPORT_PATH, {
+        "generatedAt": datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+        "command": "sweep",
+        "jobs": args.jobs,
+        "seconds": round(elapsed, 3),
+        "counts": {"owned": len(owned), "skipped": len(owned) - len(stats),
+                   "batches": len(stats), "written": len(written), "rows": total_rows,
+                   "changed": sum(s["changed"] for s in stats),
+                   "rowsChanged": sum(len(s["rowsChanged"]) for s in stats)},
+        "groups": dict(sorted(by_group.items())),
+        "rules": rules,
+        "batches": stats,
+    })
+
+
+if __name__ == "__main__":
+    sys.exit(main())
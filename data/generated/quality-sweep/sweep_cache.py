@@ -0,0 +1,80 @@
+"""
+Incremental cache for sweep.py.
+
+For every result file the cache records the key it was built from,
+    sha256(cache version, input batch bytes, fixer plugin source, DEPENDS files,
+           runner files)
+and the sha256 of the result file as written. A batch is dirty when its key
+changed or its result file is missing or no longer matches the recorded
+digest (edited or overwritten by something else); clean batches are skipped.
+
+Word-list tables live in the plugin source, so editing one rule or one pool
+re-keys only that plugin's batches. A plugin whose tables live in other files
+lists them in an optional DEPENDS tuple (paths relative to the sweep dir).
+sweep.py adds its own output code (sweep.py, jsonl_io.py, and sweep_delta.py
+for delta files) to every key, so a change to how results are written
+re-keys every batch.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CACHE_VERSION = 1
+CACHE_PATH = Path("cache") / "sweep-cache.json"
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+class SweepCache:
+    """Per-result-file build keys and output digests."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        self._sources: dict[str, str] = {}
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                data = {}
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("results", {})
+
+    # ─── Keys ────────────────────────────────────────────────────────────────
+
+    def fixer_digest(self, sweep_dir: Path, rel: str, depends=()) -> str:
+        """Hash of a plugin's source plus its DEPENDS files (each file read once per run)."""
+        h = hashlib.sha256()
+        for dep in (rel, *depends):
+            if dep not in self._sources:
+                self._sources[dep] = file_digest(sweep_dir / dep)
+            h.update(f"{dep}\0{self._sources[dep]}\0".encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def key(input_path: Path, fixer_digest: str) -> str:
+        h = hashlib.sha256(f"v{CACHE_VERSION}\0{fixer_digest}\0".encode("utf-8"))
+        h.update(input_path.read_bytes())
+        return h.hexdigest()
+
+    # ─── Lookup / record ─────────────────────────────────────────────────────
+
+    def is_current(self, dst: str, key: str, result_path: Path) -> bool:
+        entry = self.entries.get(dst)
+        return (entry is not None and entry.get("key") == key
+                and result_path.exists() and entry.get("digest") == file_digest(result_path))
+
+    def record(self, dst: str, key: str, digest: str) -> None:
+        self.entries[dst] = {"key": key, "digest": digest}
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": CACHE_VERSION,
+                                   "results": dict(sorted(self.entries.items()))}, indent=2),
+                       encoding="utf-8")
+        os.replace(tmp, self.path)
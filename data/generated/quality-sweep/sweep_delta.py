@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Delta result format for the quality sweep.
+
+A full result file repeats every input row, with the whole distractor list and
+a null for every field the fixer left alone:
+    {"id","q","a","d","e","l1","l2","i"}
+A delta file keeps only the rows the fixer changed, and a delta row only the
+fields that changed:
+    {"id":"de-b01-004","d":["in","at","over",...]}
+    {"id":"...","q":"...","e":"...","i":"..."}
+A field is kept when it is set and differs from the input row (d: when the
+list differs). l1 is kept whenever it is set: apply normalizes it to a
+taxonomy id, so an echoed label can still change the DB row. The fixer's note
+"i" rides along with a change but never makes one on its own. A batch without
+changes gets an empty delta file.
+
+Delta files live in deltas/, mirroring results/. quality-sweep-db.mjs apply
+uses a batch's delta file when it is at least as new as its result file and
+the result file otherwise, and only touches the rows a delta lists. sweep.py --delta writes deltas
+directly; this script converts existing result files (e.g. the sweep
+workers').
+
+Usage:
+    python sweep_delta.py                    # results/ -> deltas/, every batch
+    python sweep_delta.py --group vocab-de
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from jsonl_io import JsonlWriter, read_jsonl
+
+SWEEP_DIR = Path(__file__).resolve().parent
+DELTA_FIELDS = ("q", "a", "e", "l2")
+
+
+def _mirror(batch: dict, top: str) -> str:
+    rel = batch["file"]
+    return top + "/" + (rel[len("batches/"):] if rel.startswith("batches/") else rel)
+
+
+def result_file(batch: dict) -> str:
+    """results/ mirrors batches/ (same rule as quality-sweep-db.mjs apply)."""
+    return _mirror(batch, "results")
+
+
+def delta_file(batch: dict) -> str:
+    return _mirror(batch, "deltas")
+
+
+def to_delta(row: dict | None, result: dict) -> dict | None:
+    """The fields of result that change row, or None when nothing does."""
+    if row is None:  # id not in the batch: keep it whole for apply to report
+        return {k: v for k, v in result.items() if v is not None}
+    delta = {"id": result["id"]}
+    for k in DELTA_FIELDS:
+        v = result.get(k)
+        if v is not None and v != row.get(k):
+            delta[k] = v
+    if result.get("l1") is not None:
+        delta["l1"] = result["l1"]
+    d = result.get("d")
+    if isinstance(d, list) and d != row.get("d"):
+        delta["d"] = d
+    if len(delta) == 1:
+        return None
+    if result.get("i"):
+        delta["i"] = result["i"]
+    return delta
+
+
+def write_delta(src: Path, result_path: Path, dst: Path) -> tuple[int, int]:
+    """Convert one full result file; returns (result rows, delta rows)."""
+    rows = {str(row["id"]): row for row in read_jsonl(src)}
+    total = 0
+    with JsonlWriter(dst) as out:
+        for result in read_jsonl(result_path):
+            total += 1
+            delta = to_delta(rows.get(str(result.get("id"))), result)
+            if delta is not None:
+                out.write(delta)
+    return total, out.rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Convert quality-sweep result files to delta files")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR)
+    parser.add_argument("--group", action="append", default=[], help="Restrict to these groups (repeatable)")
+    args = parser.parse_args()
+
+    sweep_dir = args.sweep_dir.resolve()
+    manifest = json.loads((sweep_dir / "manifest.json").read_text(encoding="utf-8"))
+
+    batches = rows = deltas = full_bytes = delta_bytes = 0
+    failed = []
+    for batch in manifest["batches"]:
+        if args.group and batch["group"] not in args.group:
+            continue
+        result_path = sweep_dir / result_file(batch)
+        if not result_path.exists():
+            continue
+        dst = sweep_dir / delta_file(batch)
+        try:
+            n, d = write_delta(sweep_dir / batch["file"], result_path, dst)
+        except (ValueError, KeyError, AttributeError) as err:  # the apply step marks these needs_retry
+            failed.append(f"{batch['group']}/batch-{batch['index']:03d}: {err}")
+            continue
+        batches += 1
+        rows += n
+        deltas += d
+        full_bytes += result_path.stat().st_size
+        delta_bytes += dst.stat().st_size
+
+    print(f"Converted {batches} result files: {rows} rows -> {deltas} delta rows, "
+          f"{full_bytes / 1e6:.1f} MB -> {delta_bytes / 1e6:.1f} MB")
+    for line in failed:
+        print(f"  [SKIP] {line}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
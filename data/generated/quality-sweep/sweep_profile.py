@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Wall-time profiling for sweep.py --profile.
+
+A fixer plugin names the helpers worth timing in PROFILE, e.g.
+    PROFILE = ("classify_answer", "get_distractor_pool")
+instrument() replaces each of them in the module with a timing wrapper, so
+calls from fix_row and from each other (they resolve through the module
+globals) are timed with their call stack. fix_row is timed as the root
+frame, and the module's ENGINE.match is timed too: the engine's per-rule
+seconds before and after each match go to "rule:<name>" frames under the
+stack that called it, so a rule is charged to the helper that ran it.
+
+Stacks are kept as inclusive seconds and call counts per stack and taken per
+batch. write_folded() turns them into self time in the collapsed-stack
+format that flamegraph.pl, speedscope and inferno read:
+    vocab-de;process_vocab_de.py;fix_row;get_distractor_pool;classify_answer 1834
+one line per stack, the value in microseconds.
+
+Instrumentation only happens under --profile; a normal run calls the plain
+functions.
+"""
+
+import time
+from collections import Counter
+from pathlib import Path
+
+RULE_FRAME = "rule:"
+
+
+class Profiler:
+    """Inclusive wall time and call counts per call stack of the wrapped functions."""
+
+    def __init__(self):
+        self._stack: list[str] = []
+        self.seconds = Counter()    # stack tuple -> inclusive seconds
+        self.calls = Counter()      # stack tuple -> calls
+
+    def wrap(self, name: str, fn):
+        stack, seconds, calls = self._stack, self.seconds, self.calls
+
+        def timed(*args, **kwargs):
+            stack.append(name)
+            key = tuple(stack)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                seconds[key] += time.perf_counter() - start
+                calls[key] += 1
+                stack.pop()
+
+        timed.__wrapped__ = fn
+        timed.__name__ = getattr(fn, "__name__", name)
+        return timed
+
+    def wrap_engine(self, engine) -> None:
+        """Time engine.match and charge each rule's share to the calling stack."""
+        match, rules = self.wrap("ENGINE.match", engine.match), engine.rules
+        stack, seconds, calls = self._stack, self.seconds, self.calls
+
+        def timed_match(row):
+            before = [c.seconds for c in rules]
+            result = match(row)
+            key = (*stack, "ENGINE.match")
+            for c, b in zip(rules, before):
+                if c.seconds != b:  # the rule ran (memo hits cost it nothing)
+                    rule_key = (*key, RULE_FRAME + c.rule.name)
+                    seconds[rule_key] += c.seconds - b
+                    calls[rule_key] += 1
+            return result
+
+        engine.match = timed_match
+
+    def take(self) -> dict[str, list]:
+        """{"fix_row;helper": [seconds, calls]} since the last take, then reset."""
+        out = {";".join(k): [s, self.calls[k]] for k, s in self.seconds.items()}
+        self.seconds.clear()
+        self.calls.clear()
+        return out
+
+
+def instrument(module) -> Profiler:
+    """The module's Profiler, installing the wrappers on first use (once per process)."""
+    profiler = getattr(module, "__profiler__", None)
+    if profiler is None:
+        profiler = Profiler()
+        for name in getattr(module, "PROFILE", ()):
+            setattr(module, name, profiler.wrap(name, getattr(module, name)))
+        if hasattr(module, "ENGINE"):
+            profiler.wrap_engine(module.ENGINE)
+        module.__profiler__ = profiler
+    return profiler
+
+
+# ─── Aggregation ─────────────────────────────────────────────────────────────
+
+def merge(total: dict, stacks: dict, prefix: str = "") -> dict:
+    for stack, (s, n) in stacks.items():
+        t = total.setdefault(prefix + stack, [0.0, 0])
+        t[0] += s
+        t[1] += n
+    return total
+
+
+def self_times(stacks: dict) -> dict[str, float]:
+    """Inclusive seconds per stack -> self seconds (inclusive minus direct children)."""
+    own = {stack: s for stack, (s, _) in stacks.items()}
+    for stack, (s, _) in stacks.items():
+        parent = stack.rpartition(";")[0]
+        if parent in own:
+            own[parent] -= s
+    return {stack: max(s, 0.0) for stack, s in own.items()}
+
+
+def by_frame(stacks: dict) -> dict[str, dict]:
+    """Totals per frame name over all stacks; recursive frames are counted once."""
+    out: dict[str, dict] = {}
+    own = self_times(stacks)
+    for stack, (s, n) in stacks.items():
+        frames = stack.split(";")
+        name = frames[-1]
+        f = out.setdefault(name, {"calls": 0, "seconds": 0.0, "selfSeconds": 0.0})
+        if name not in frames[:-1]:
+            f["seconds"] += s
+        f["calls"] += n
+        f["selfSeconds"] += own[stack]
+    for f in out.values():
+        f["seconds"] = round(f["seconds"], 6)
+        f["selfSeconds"] = round(f["selfSeconds"], 6)
+    return dict(sorted(out.items(), key=lambda kv: -kv[1]["seconds"]))
+
+
+def write_folded(path: Path, stacks: dict) -> int:
+    """Write self time per stack in collapsed-stack format (microseconds); returns lines."""
+    lines = [f"{stack} {round(s * 1e6)}" for stack, s in sorted(self_times(stacks).items())
+             if round(s * 1e6) > 0]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return len(lines)
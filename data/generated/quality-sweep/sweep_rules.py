@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Declarative detection rules for the vocab quality sweep.
+
+A rule says what it looks at, what it looks for and what a hit means:
+
+    Rule("de-german-marker", scope="d", pattern=Contains(*GERMAN_MARKERS),
+         action="garbage", groups=("vocab-de",))
+
+    scope    "d" (each distractor), "q" or "a"
+    pattern  Words, Contains, Prefix, Suffix, Regex, LongerThan, IsAnswer,
+             HasAnswer, AnswerSuffix, AnswerLongerThan; All / Any / Not
+    action   label the fixer acts on ("garbage", "replace", ...); "flag" = report only
+    groups   manifest groups the rule is active in (default: every vocab group)
+    ids      optional regex searched in the row id, e.g. r"^ja-kanji"
+
+SHARED_RULES apply to every vocab group; each fixer plugin adds its own as
+RULES and compiles both into one engine for its group:
+
+    ENGINE = RuleSet(SHARED_RULES + RULES).compile(GROUP)
+    m = ENGINE.match(row)            # m.d: one bit mask per distractor; m.q, m.a
+    garbage = [bool(x & ENGINE.action_mask("garbage")) for x in m.d]
+    ENGINE.value_mask("d", value)    # one value, through the same memo; counts no hits
+
+match() covers every active rule in one pass over the row. Each rule is
+evaluated once per unique value per process and memoized as a bit in the
+value's mask; values the memo has not seen are evaluated rule by rule as a
+column. A row therefore costs one dict lookup per value however many rules
+are active, and a new rule adds one evaluation per unique value instead of
+another pass over the rows. Answer-relative patterns (IsAnswer, HasAnswer,
+...) depend on the row, so they run per row, and only on the values that
+passed the value-only conjuncts of their All(...).
+
+Every engine counts hits and evaluation time per rule. sweep.py sums them
+into reports/sweep-run.json; this script runs every rule over every vocab
+batch and writes reports/rule-hits.json:
+
+    python sweep_rules.py
+    python sweep_rules.py --group vocab-ko
+"""
+
+import argparse
+import dataclasses
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+SWEEP_DIR = Path(__file__).resolve().parent
+REPORT_PATH = Path("reports") / "rule-hits.json"
+
+VOCAB_GROUPS = ("vocab-cs", "vocab-de", "vocab-es", "vocab-fr",
+                "vocab-it", "vocab-ja", "vocab-ko", "vocab-nl")
+SCOPES = ("d", "q", "a")
+
+# Compiled test: (value, normalized answer) -> bool
+Test = Callable[[str, str], bool]
+
+
+# ─── Patterns ────────────────────────────────────────────────────────────────
+# Each pattern compiles to a Test. uses_answer marks tests whose result
+# depends on the row's answer; those run per row instead of per unique value.
+
+class Pattern:
+    uses_answer = False
+
+    def compile(self) -> Test:
+        raise NotImplementedError
+
+    def split(self) -> tuple:
+        """(value-only part, answer-relative part); either may be None."""
+        return (None, self) if self.uses_answer else (self, None)
+
+
+class Words(Pattern):
+    """The whole value (lowercased, stripped unless strip=False) is one of words."""
+
+    def __init__(self, *words: str, strip: bool = True):
+        self.words = frozenset(w.lower() for w in words)
+        self.strip = strip
+
+    def compile(self) -> Test:
+        words = self.words
+        if self.strip:
+            return lambda v, a: v.lower().strip() in words
+        return lambda v, a: v.lower() in words
+
+
+def _alternation(items, case: bool) -> re.Pattern:
+    return re.compile("|".join(map(re.escape, items)), 0 if case else re.IGNORECASE)
+
+
+class Contains(Pattern):
+    """Any of the substrings occurs in the value (one regex scan)."""
+
+    def __init__(self, *subs: str, case: bool = True):
+        self.subs, self.case = subs, case
+
+    def compile(self) -> Test:
+        search = _alternation(self.subs, self.case).search
+        return lambda v, a: search(v) is not None
+
+
+class Prefix(Pattern):
+    def __init__(self, *prefixes: str, case: bool = True):
+        self.prefixes = prefixes if case else tuple(p.lower() for p in prefixes)
+        self.case = case
+
+    def compile(self) -> Test:
+        prefixes = self.prefixes
+        if self.case:
+            return lambda v, a: v.startswith(prefixes)
+        return lambda v, a: v.lower().startswith(prefixes)
+
+
+class Suffix(Pattern):
+    def __init__(self, *suffixes: str, case: bool = True):
+        self.suffixes = suffixes if case else tuple(s.lower() for s in suffixes)
+        self.case = case
+
+    def compile(self) -> Test:
+        suffixes = self.suffixes
+        if self.case:
+            return lambda v, a: v.endswith(suffixes)
+        return lambda v, a: v.lower().endswith(suffixes)
+
+
+class Regex(Pattern):
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern, self.flags = pattern, flags
+
+    def compile(self) -> Test:
+        search = re.compile(self.pattern, self.flags).search
+        return lambda v, a: search(v) is not None
+
+
+class LongerThan(Pattern):
+    def __init__(self, n: int):
+        self.n = n
+
+    def compile(self) -> Test:
+        n = self.n
+        return lambda v, a: len(v) > n
+
+
+class IsAnswer(Pattern):
+    """The value is the answer itself (case and surrounding space ignored)."""
+    uses_answer = True
+
+    def compile(self) -> Test:
+        return lambda v, a: bool(a) and v.lower().strip() == a
+
+
+class HasAnswer(Pattern):
+    """The answer occurs inside the value (case ignored)."""
+    uses_answer = True
+
+    def compile(self) -> Test:
+        return lambda v, a: a in v.lower()
+
+
+class AnswerSuffix(Pattern):
+    """The value is the answer plus one of the suffixes, e.g. "give" -> "give up"."""
+    uses_answer = True
+
+    def __init__(self, *suffixes: str):
+        self.suffixes = suffixes
+
+    def compile(self) -> Test:
+        suffixes = self.suffixes
+        return lambda v, a: any(v.lower() == a + s for s in suffixes)
+
+
+class AnswerLongerThan(Pattern):
+    uses_answer = True
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def compile(self) -> Test:
+        n = self.n
+        return lambda v, a: len(a) > n
+
+
+def _chain(tests, both: bool) -> Test:
+    """Short-circuit and/or over compiled tests, left to right."""
+    test = tests[0]
+    for nxt in tests[1:]:
+        if both:
+            test = (lambda f, g: lambda v, a: f(v, a) and g(v, a))(test, nxt)
+        else:
+            test = (lambda f, g: lambda v, a: f(v, a) or g(v, a))(test, nxt)
+    return test
+
+
+class All(Pattern):
+    def __init__(self, *patterns: Pattern):
+        self.patterns = patterns
+        self.uses_answer = any(p.uses_answer for p in patterns)
+
+    def compile(self) -> Test:
+        return _chain([p.compile() for p in self.patterns], both=True)
+
+    def split(self) -> tuple:
+        # The value-only conjuncts are memoized per value and filter which
+        # values the answer-relative ones run on
+        values = [p for p in self.patterns if not p.uses_answer]
+        answers = [p for p in self.patterns if p.uses_answer]
+        def join(ps):
+            return None if not ps else ps[0] if len(ps) == 1 else All(*ps)
+        return join(values), join(answers)
+
+
+class Any(Pattern):
+    def __init__(self, *patterns: Pattern):
+        self.patterns = patterns
+        self.uses_answer = any(p.uses_answer for p in patterns)
+
+    def compile(self) -> Test:
+        return _chain([p.compile() for p in self.patterns], both=False)
+
+
+class Not(Pattern):
+    def __init__(self, pattern: Pattern):
+        self.pattern = pattern
+        self.uses_answer = pattern.uses_answer
+
+    def compile(self) -> Test:
+        test = self.pattern.compile()
+        return lambda v, a: not test(v, a)
+
+
+# ─── Rules ───────────────────────────────────────────────────────────────────
+
+@dataclasses.dataclass(frozen=True)
+class Rule:
+    name: str
+    scope: str                  # "d", "q" or "a"
+    pattern: Pattern
+    action: str = "flag"
+    groups: tuple = VOCAB_GROUPS
+    ids: str | None = None      # regex searched in the row id
+
+
+class RowMatch(NamedTuple):
+    d: list     # hit mask per distractor
+    q: int
+    a: int
+
+
+@dataclasses.dataclass
+class _Compiled:
+    rule: Rule
+    bit: int
+    pre: Test | None        # value-only part, memoized per value
+    test: Test | None       # answer-relative part, run per row
+    ids: re.Pattern | None
+    hits: int = 0
+    evaluated: int = 0
+    seconds: float = 0.0
+
+
+class RuleSet:
+    def __init__(self, rules):
+        names = [r.name for r in rules]
+        dupes = sorted(n for n, c in Counter(names).items() if c > 1)
+        if dupes:
+            raise ValueError(f"Duplicate rule names: {', '.join(dupes)}")
+        for r in rules:
+            if r.scope not in SCOPES:
+                raise ValueError(f"Rule {r.name}: unknown scope {r.scope!r}")
+        self.rules = tuple(rules)
+
+    def compile(self, group: str) -> "RuleEngine":
+        return RuleEngine([r for r in self.rules if group in r.groups])
+
+
+class RuleEngine:
+    """The rules active in one group, compiled into per-scope bit masks."""
+
+    def __init__(self, rules):
+        self.rules = []
+        for i, r in enumerate(rules):
+            pre, test = r.pattern.split()
+            self.rules.append(_Compiled(r, 1 << i, pre and pre.compile(), test and test.compile(),
+                                        re.compile(r.ids) if r.ids else None))
+        self._by_name = {c.rule.name: c for c in self.rules}
+        self._always = sum(c.bit for c in self.rules if c.ids is None)
+        self._filtered = [c for c in self.rules if c.ids is not None]
+        # Per scope: rules with a memoized part, the bits of rules that have
+        # none (answer-only patterns), and rules with an answer-relative part
+        self._pre_rules, self._no_pre, self._answer_rules = {}, {}, {}
+        for scope in SCOPES:
+            in_scope = [c for c in self.rules if c.rule.scope == scope]
+            self._pre_rules[scope] = [c for c in in_scope if c.pre]
+            self._no_pre[scope] = sum(c.bit for c in in_scope if not c.pre)
+            self._answer_rules[scope] = [c for c in in_scope if c.test]
+        self._has_q = any(c.rule.scope == "q" for c in self.rules)
+        self._has_a = any(c.rule.scope == "a" for c in self.rules)
+        self._hit_masks = Counter()
+        self.clear()
+
+    # ─── Masks ───────────────────────────────────────────────────────────────
+
+    def bit(self, name: str) -> int:
+        return self._by_name[name].bit
+
+    def action_mask(self, action: str) -> int:
+        return sum(c.bit for c in self.rules if c.rule.action == action)
+
+    # ─── Evaluation ──────────────────────────────────────────────────────────
+
+    def clear(self) -> None:
+        """Drop the memo (stats are kept)."""
+        # value -> bits of the rules whose value-only part matches it
+        self._memo = {scope: {} for scope in SCOPES}
+
+    def _active(self, row_id: str) -> int:
+        active = self._always
+        for c in self._filtered:
+            if c.ids.search(row_id):
+                active |= c.bit
+        return active
+
+    def _evaluate(self, scope: str, values) -> None:
+        """Memoize the value-only part of every rule of scope, rule by rule as a column."""
+        masks = dict.fromkeys(values, self._no_pre[scope])
+        for c in self._pre_rules[scope]:
+            start = time.perf_counter()
+            test, bit = c.pre, c.bit
+            for v in masks:
+                if test(v, ""):
+                    masks[v] |= bit
+            c.seconds += time.perf_counter() - start
+            c.evaluated += len(masks)
+        self._memo[scope].update(masks)
+
+    def _masks(self, scope: str, values: list, answer: str, active: int) -> list:
+        memo = self._memo[scope]
+        masks = [memo.get(v) for v in values]
+        if None in masks:
+            self._evaluate(scope, [v for v, m in zip(values, masks) if m is None])
+            masks = [memo[v] for v in values]
+        if self._filtered:
+            masks = [m & active for m in masks]
+        # Answer-relative parts only run on the values the memoized part let through
+        for c in self._answer_rules[scope]:
+            bit = c.bit
+            candidates = [i for i, m in enumerate(masks) if m & bit]
+            if not candidates:
+                continue
+            start = time.perf_counter()
+            test = c.test
+            for i in candidates:
+                if not test(values[i], answer):
+                    masks[i] &= ~bit
+            c.seconds += time.perf_counter() - start
+            c.evaluated += len(candidates)
+        return masks
+
+    def _one(self, scope: str, value: str, answer: str, active: int) -> int:
+        """_masks for a single value (the "q" and "a" scopes, or value_mask)."""
+        if self._answer_rules[scope]:
+            return self._masks(scope, [value], answer, active)[0]
+        memo = self._memo[scope]
+        mask = memo.get(value)
+        if mask is None:
+            self._evaluate(scope, [value])
+            mask = memo[value]
+        return mask & active
+
+    def value_mask(self, scope: str, value: str, answer: str = "", row_id: str = "") -> int:
+        """Bits of the rules of scope that match one value, through the memo; no hits are counted."""
+        active = self._active(row_id) if self._filtered else self._always
+        return self._one(scope, value, answer.lower().strip(), active)
+
+    def match(self, row: dict) -> RowMatch:
+        active = self._active(str(row.get("id", ""))) if self._filtered else self._always
+        answer = (row.get("a") or "").lower().strip()
+        hit_masks = self._hit_masks
+        d = self._masks("d", row.get("d") or [], answer, active)
+        for m in d:
+            if m:
+                hit_masks[m] += 1
+        q = self._one("q", row.get("q") or "", answer, active) if self._has_q else 0
+        a = self._one("a", row.get("a") or "", answer, active) if self._has_a else 0
+        if q:
+            hit_masks[q] += 1
+        if a:
+            hit_masks[a] += 1
+        return RowMatch(d, q, a)
+
+    # ─── Stats ───────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        for mask, n in self._hit_masks.items():
+            for c in self.rules:
+                if mask & c.bit:
+                    c.hits += n
+        self._hit_masks.clear()
+        return {c.rule.name: {"scope": c.rule.scope, "action": c.rule.action,
+                              "hits": c.hits, "evaluated": c.evaluated,
+                              "seconds": round(c.seconds, 6)}
+                for c in self.rules}
+
+    def take_stats(self) -> dict:
+        """stats(), then reset the counters (sweep.py collects them per task)."""
+        out = self.stats()
+        for c in self.rules:
+            c.hits = c.evaluated = 0
+            c.seconds = 0.0
+        return out
+
+
+def merge_stats(total: dict, stats: dict) -> dict:
+    for name, s in stats.items():
+        t = total.setdefault(name, {"scope": s["scope"], "action": s["action"],
+                                    "hits": 0, "evaluated": 0, "seconds": 0.0})
+        t["hits"] += s["hits"]
+        t["evaluated"] += s["evaluated"]
+        t["seconds"] = round(t["seconds"] + s["seconds"], 6)
+    return dict(sorted(total.items(), key=lambda kv: -kv[1]["seconds"]))
+
+
+# ─── Shared rules ────────────────────────────────────────────────────────────
+# Active in every vocab group. Same placeholder list as isPlaceholderDistractor
+# in scripts/content-pipeline/qa/shared.mjs, which rejects these at apply time.
+
+PLACEHOLDER_RE = (
+    r"^(alternative option \d+|alternative \d+|option [a-z\d]+|distractor \d+|unknown option \d*"
+    r"|unknown option|not applicable|invalid answer|unrelated concept|incorrect claim|false statement"
+    r"|similar concept|related term|alternative word|different word|misleading choice|incorrect term"
+    r"|unrelated option|alternative theory|related concept|other meaning|alternative sense|another option"
+    r"|additional meaning|related idea|another word|different meaning|similar term|plausible option.*"
+    r"|wrong answer|test option|placeholder|sample answer|alternative|unrelated|incorrect|invalid"
+    r"|misleading|sample|unknown)$"
+)
+
+SHARED_RULES = [
+    Rule("placeholder-distractor", "d", Regex(PLACEHOLDER_RE, re.IGNORECASE), "placeholder"),
+    Rule("long-distractor", "d", LongerThan(35), "garbage"),
+    Rule("answer-trailing-semicolon", "a", Suffix(";"), "trim"),
+    Rule("vague-question", "q", Regex(r"^\s*What does this mean\?\s*$")),
+]
+
+
+# ─── Report ──────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    from jsonl_io import read_jsonl
+    from sweep import FIXERS, load_fixer, read_manifest
+
+    parser = argparse.ArgumentParser(description="Run every vocab rule over every vocab batch")
+    parser.add_argument("--sweep-dir", type=Path, default=SWEEP_DIR)
+    parser.add_argument("--group", action="append", default=[], help="Restrict to these groups (repeatable)")
+    args = parser.parse_args()
+
+    sweep_dir = args.sweep_dir.resolve()
+    rules = list(SHARED_RULES)
+    for rel in FIXERS:
+        rules.extend(getattr(load_fixer(str(sweep_dir), rel), "RULES", ()))
+    ruleset = RuleSet(rules)
+
+    manifest = read_manifest(sweep_dir)
+    groups = [g for g in VOCAB_GROUPS if not args.group or g in args.group]
+    report, total = {}, {}
+    for group in groups:
+        engine = ruleset.compile(group)
+        rows = 0
+        start = time.perf_counter()
+        for batch in manifest["batches"]:
+            if batch["group"] == group:
+                for row in read_jsonl(sweep_dir / batch["file"]):
+                    engine.match(row)
+                    rows += 1
+        stats = engine.take_stats()
+        report[group] = {"rows": rows, "rules": len(engine.rules),
+                         "seconds": round(time.perf_counter() - start, 4),
+                         "hits": {k: v["hits"] for k, v in stats.items() if v["hits"]}}
+        total = merge_stats(total, stats)
+        print(f"  {group:<10} {rows:>6} rows  {len(engine.rules):>3} rules  {report[group]['seconds']:.3f}s")
+
+    print(f"\n  {'rule':<28} {'action':<12} {'hits':>7} {'evaluated':>10} {'ms':>8}")
+    for name, s in total.items():
+        print(f"  {name:<28} {s['action']:<12} {s['hits']:>7} {s['evaluated']:>10} {s['seconds'] * 1000:8.2f}")
+
+    path = sweep_dir / REPORT_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"groups": report, "rules": total}, indent=2, ensure_ascii=False) + "\n",
+                    encoding="utf-8")
+    print(f"\nReport: {REPORT_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -428,6 +428,47 @@ function validateOutputRow(outputRow, inputRow, group = '') {
   return reasons
 }
 
+/**
+ * The full result row a delta row stands for: fields it leaves out are null
+ * (keep existing), and the distractors are the input's unless it replaces
+ * them, so a changed answer is checked against the distractors it keeps.
+ */
+function expandDeltaRow(deltaRow, inputRow) {
+  return {
+    q: null, a: null, e: null, l1: null, l2: null,
+    ...deltaRow,
+    d: Array.isArray(deltaRow.d) ? deltaRow.d : inputRow.d,
+  }
+}
+
+/**
+ * Check the manifest's own counts before trusting it for per-batch checks:
+ * group rows/batches and totalRows must add up to the batch entries.
+ * Returns a list of problems (empty = consistent).
+ */
+function manifestCountProblems(manifest) {
+  const problems = []
+  const byGroup = new Map()
+  let total = 0
+  for (const batch of manifest.batches) {
+    const g = byGroup.get(batch.group) || { rows: 0, batches: 0 }
+    g.rows += batch.rows
+    g.batches++
+    byGroup.set(batch.group, g)
+    total += batch.rows
+  }
+  if (manifest.totalRows !== undefined && manifest.totalRows !== total) {
+    problems.push(`totalRows is ${manifest.totalRows} but batches add up to ${total}`)
+  }
+  for (const [group, expected] of Object.entries(manifest.groups || {})) {
+    const actual = byGroup.get(group) || { rows: 0, batches: 0 }
+    if (actual.rows !== expected.rows || actual.batches !== expected.batches) {
+      problems.push(`${group}: manifest says ${expected.rows} rows in ${expected.batches} batches, batch entries have ${actual.rows} in ${actual.batches}`)
+    }
+  }
+  return problems
+}
+
 async function cmdApply(rawArgs) {
   const args = {
     db: 'public/facts.db',
@@ -445,6 +486,12 @@ async function cmdApply(rawArgs) {
 
   const manifest = await readManifest(outputDir)
   const resultsDir = path.join(outputDir, 'results')
+  const deltasDir = path.join(outputDir, 'deltas')
+
+  const manifestProblems = manifestCountProblems(manifest)
+  if (manifestProblems.length > 0) {
+    throw new Error(`manifest.json counts are inconsistent:\n  ${manifestProblems.join('\n  ')}`)
+  }
 
   // Find all done batches that have result files
   const doneBatches = manifest.batches.filter((b) => b.status === 'done')
@@ -456,19 +503,17 @@ async function cmdApply(rawArgs) {
 
   console.log(`Found ${doneBatches.length} done batches. Loading results...`)
 
-  const Database2 = loadBetterSqlite()
-  const db = new Database2(dbPath)
+  const db = new Database(dbPath)
   const columnSet = ensureAnswerCheckColumns(db)
   const now = Date.now()
 
-  // Prepare statements
-  const selectStmt = db.prepare(`
+  // Current values for a whole batch in one query (ids passed as a JSON array)
+  const selectBatchStmt = db.prepare(`
     SELECT id, quiz_question, correct_answer, explanation, distractors, category_l1, category_l2
-    FROM facts WHERE id = ?
+    FROM facts WHERE id IN (SELECT value FROM json_each(?))
   `)
 
-  // We'll build the update per-row since columns differ
-  const updateBase = `
+  const updateStmt = db.prepare(`
     UPDATE facts SET
       quiz_question = @q,
       correct_answer = @a,
@@ -483,20 +528,32 @@ async function cmdApply(rawArgs) {
       answer_check_fixed_at = @fixedAt,
       answer_check_fixed_by = @fixedBy
     WHERE id = @id
-  `
-  const updateStmt = db.prepare(updateBase)
+  `)
 
-  let totalApplied = 0
   let totalRejected = 0
+  let totalExtra = 0
   let totalMissing = 0
-  let totalBatchesProcessed = 0
+  let totalUnchanged = 0
+  let manifestRows = 0
+  let deltaBatches = 0
   const rejectionReasons = {}
   const updatedManifestBatches = [...manifest.batches]
+  const findEntry = (batch) => updatedManifestBatches.find((b) => b.group === batch.group && b.index === batch.index)
+
+  // Pass 1: validate every done batch and collect its updates
+  const allUpdates = []
+  const processedBatches = []
 
   for (const batch of doneBatches) {
-    // batch.file includes "batches/" prefix — strip it for result path
+    // batch.file includes "batches/" prefix — strip it for result path.
+    // A delta file (only changed rows and fields) wins over the full result file,
+    // unless the result file was rewritten after it (a later full sweep or worker run).
     const batchRelative = batch.file.replace(/^batches\//, '')
-    const resultFile = path.join(resultsDir, batchRelative)
+    const deltaFile = path.join(deltasDir, batchRelative)
+    const fullFile = path.join(resultsDir, batchRelative)
+    const isDelta = fssync.existsSync(deltaFile) &&
+      (!fssync.existsSync(fullFile) || fssync.statSync(deltaFile).mtimeMs >= fssync.statSync(fullFile).mtimeMs)
+    const resultFile = isDelta ? deltaFile : fullFile
     const inputFile = path.join(outputDir, batch.file)
 
     // Check result file exists
@@ -513,7 +570,15 @@ async function cmdApply(rawArgs) {
     } catch (err) {
       console.error(`  [ERROR] Failed to load batch ${batch.group}/${batch.index}: ${err.message}`)
       // Mark as needs_retry in manifest
-      const batchEntry = updatedManifestBatches.find((b) => b.group === batch.group && b.index === batch.index)
+      const batchEntry = findEntry(batch)
+      if (batchEntry) batchEntry.status = 'needs_retry'
+      continue
+    }
+
+    // The input file must still hold the rows the manifest recorded at export
+    if (inputRows.length !== batch.rows) {
+      console.error(`  [ERROR] ${batch.group}/batch-${batch.index}: input has ${inputRows.length} rows, manifest says ${batch.rows}`)
+      const batchEntry = findEntry(batch)
       if (batchEntry) batchEntry.status = 'needs_retry'
       continue
     }
@@ -521,43 +586,62 @@ async function cmdApply(rawArgs) {
     // Build input lookup by id
     const inputById = new Map(inputRows.map((r) => [String(r.id), r]))
 
-    // Row count check (warn but don't fail)
-    if (resultRows.length !== inputRows.length) {
-      console.warn(`  [WARN] ${batch.group}/batch-${batch.index}: row count mismatch (input=${inputRows.length}, result=${resultRows.length})`)
+    // A delta lists only changed rows; a full result should list every input row once,
+    // but worker output can drop, add or repeat rows. Counts are kept per input row:
+    // input rows the result leaves out are unchanged, and ids that are not in the
+    // input or repeat an earlier row are rejected (counted apart as extra rows).
+    if (!isDelta && resultRows.length !== inputRows.length) {
+      console.warn(`  [WARN] ${batch.group}/batch-${batch.index}: row count mismatch (input=${inputRows.length}, result=${resultRows.length}); ` +
+        'absent rows stay unchanged, extra rows are rejected')
     }
 
+    const currentById = new Map(
+      selectBatchStmt.all(JSON.stringify(resultRows.map((r) => String(r.id || '').trim())))
+        .map((r) => [String(r.id), r]),
+    )
+
+    const counts = { rejected: 0, extra: 0, missing: 0 }
+    const reasons = {}
+    const reject = (list, extra = false) => {
+      counts.rejected++
+      if (extra) counts.extra++
+      for (const reason of list) {
+        const short = reason.length > 80 ? reason.slice(0, 80) + '…' : reason
+        reasons[short] = (reasons[short] || 0) + 1
+      }
+    }
     const batchUpdates = []
+    const seen = new Set()
 
     for (const outputRow of resultRows) {
       const id = String(outputRow.id || '').trim()
       if (!id) {
-        totalRejected++
-        const key = 'missing id in output'
-        rejectionReasons[key] = (rejectionReasons[key] || 0) + 1
+        reject(['missing id in output'], true)
         continue
       }
 
       const inputRow = inputById.get(id)
       if (!inputRow) {
-        totalMissing++
+        reject(['id not in input batch'], true)
+        continue
+      }
+      if (seen.has(id)) {
+        reject(['duplicate id in output'], true)
         continue
       }
+      seen.add(id)
 
-      // Validate
-      const rejectionList = validateOutputRow(outputRow, inputRow, batch.group)
+      // Validate a delta row as the full result row it stands for, so both modes check the same fields
+      const rejectionList = validateOutputRow(isDelta ? expandDeltaRow(outputRow, inputRow) : outputRow, inputRow, batch.group)
       if (rejectionList.length > 0) {
-        totalRejected++
-        for (const reason of rejectionList) {
-          const short = reason.length > 80 ? reason.slice(0, 80) + '…' : reason
-          rejectionReasons[short] = (rejectionReasons[short] || 0) + 1
-        }
+        reject(rejectionList)
         continue
       }
 
-      // Read current DB row to merge null-preserved fields
-      const current = selectStmt.get(id)
+      // Current DB row, to merge null-preserved (or, in a delta, absent) fields
+      const current = currentById.get(id)
       if (!current) {
-        totalMissing++
+        counts.missing++
         continue
       }
 
@@ -598,23 +682,50 @@ async function cmdApply(rawArgs) {
       })
     }
 
-    if (!dryRun && batchUpdates.length > 0) {
-      const tx = db.transaction((rows) => {
-        for (const row of rows) updateStmt.run(row)
-      })
-      tx(batchUpdates)
+    // Every input row is accounted for exactly once; a batch that does not add up is not applied
+    const unchanged = inputRows.length - seen.size
+    const accounted = batchUpdates.length + counts.rejected - counts.extra + counts.missing + unchanged
+    if (accounted !== batch.rows) {
+      console.error(`  [ERROR] ${batch.group}/batch-${batch.index}: manifest says ${batch.rows} rows, ` +
+        `applied+rejected+missing+unchanged = ${accounted}`)
+      const batchEntry = findEntry(batch)
+      if (batchEntry) batchEntry.status = 'needs_retry'
+      continue
     }
 
-    totalApplied += batchUpdates.length
-    totalBatchesProcessed++
+    allUpdates.push(...batchUpdates)
+    totalRejected += counts.rejected
+    totalExtra += counts.extra
+    totalMissing += counts.missing
+    totalUnchanged += unchanged
+    for (const [reason, n] of Object.entries(reasons)) rejectionReasons[reason] = (rejectionReasons[reason] || 0) + n
+    if (isDelta) deltaBatches++
+    manifestRows += batch.rows
+    processedBatches.push(batch)
+  }
 
-    // Mark batch as applied in manifest
-    const batchEntry = updatedManifestBatches.find((b) => b.group === batch.group && b.index === batch.index)
-    if (batchEntry) batchEntry.status = 'applied'
+  const totalApplied = allUpdates.length
+
+  // Pass 2: every update in one transaction; any count mismatch rolls it all back
+  if (!dryRun && allUpdates.length > 0) {
+    const tx = db.transaction((rows) => {
+      let changes = 0
+      for (const row of rows) changes += updateStmt.run(row).changes
+      if (changes !== rows.length) {
+        throw new Error(`expected ${rows.length} row updates, DB reported ${changes}; transaction rolled back`)
+      }
+    })
+    tx(allUpdates)
   }
 
   db.close()
 
+  // Mark batches as applied in manifest (only once the transaction committed)
+  for (const batch of processedBatches) {
+    const batchEntry = findEntry(batch)
+    if (batchEntry) batchEntry.status = 'applied'
+  }
+
   // Update manifest
   if (!dryRun) {
     const updatedManifest = { ...manifest, batches: updatedManifestBatches, lastAppliedAt: new Date().toISOString() }
@@ -630,10 +741,14 @@ async function cmdApply(rawArgs) {
     dryRun,
     counts: {
       batchesFound: doneBatches.length,
-      batchesProcessed: totalBatchesProcessed,
+      batchesProcessed: processedBatches.length,
+      deltaBatches,
+      manifestRows,
       applied: totalApplied,
       rejected: totalRejected,
+      extra: totalExtra,
       missing: totalMissing,
+      unchanged: totalUnchanged,
     },
     topRejectionReasons: Object.entries(rejectionReasons)
       .sort((a, b) => b[1] - a[1])
@@ -645,10 +760,11 @@ async function cmdApply(rawArgs) {
   await writeJson(reportPath, report)
 
   console.log(`\nApply complete${dryRun ? ' (DRY RUN — no DB writes)' : ''}.`)
-  console.log(`  Batches processed: ${totalBatchesProcessed} / ${doneBatches.length}`)
+  console.log(`  Batches processed: ${processedBatches.length} / ${doneBatches.length} (${deltaBatches} from deltas/)`)
   console.log(`  Applied:           ${totalApplied}`)
-  console.log(`  Rejected:          ${totalRejected}`)
+  console.log(`  Rejected:          ${totalRejected} (${totalExtra} extra rows: no id, id not in input, or repeated)`)
   console.log(`  Missing in DB:     ${totalMissing}`)
+  console.log(`  Unchanged:         ${totalUnchanged}`)
   if (report.topRejectionReasons.length > 0) {
     console.log('\n  Top rejection reasons:')
     for (const { reason, count } of report.topRejectionReasons.slice(0, 10)) {
@@ -781,7 +897,7 @@ function printHelp() {
     'Commands:',
     '  export     Read all DB facts, group by domain/language, write batch JSONL files + manifest',
     '  status     Show progress summary from the manifest (pending/done/failed counts)',
-    '  apply      Read sweep results from results/ dir, validate, and write back to DB',
+    '  apply      Read sweep results (deltas/, else results/), validate, and write back to DB in one transaction',
     '  verify     Re-scan the entire DB with heuristics and report pre/post improvement',
     '',
     'export options:',
@@ -798,6 +914,8 @@ function printHelp() {
     '  --output-dir <dir>           Output directory (default: data/generated/quality-sweep)',
     '  --dry-run                    Validate and report but do not write to DB',
     '  --fixer <name>               Name recorded in answer_check_fixed_by (default: quality-sweep)',
+    '  A batch\'s delta file (deltas/, see sweep_delta.py) is used instead of its result file when present;',
+    '  only the rows it lists are updated. Input row counts are checked against manifest.json.',
     '',
     'verify options:',
     '  --db <path>                  SQLite DB path (default: public/facts.db)',
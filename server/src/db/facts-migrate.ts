@@ -251,6 +251,22 @@ export function initFactsSchema(): void {
     }
   }
 
+  // ── Fact sprite seeds (sprite-gen/scripts/fact_batch_generate.py) ──────────
+  // pixel_art_seed: seed actually used for the current sprite (reproducible, keyed hash)
+  // pixel_art_seed_variant: bumped by fact_qc.py on rejection so regeneration uses a new seed
+  const spriteSeedColumns: Array<[string, string]> = [
+    ["pixel_art_seed", "INTEGER"],
+    ["pixel_art_seed_variant", "INTEGER NOT NULL DEFAULT 0"],
+  ];
+
+  for (const [column, definition] of spriteSeedColumns) {
+    try {
+      factsDb.exec(`ALTER TABLE facts ADD COLUMN ${column} ${definition}`);
+    } catch {
+      // Column already exists — safe to ignore
+    }
+  }
+
   // ── Phase 32.1: New columns on distractors ───────────────────────────────────
   const newDistractorColumns: Array<[string, string]> = [
     // Cosine similarity to the correct answer (0-1); high similarity = bad distractor
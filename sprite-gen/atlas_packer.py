@@ -0,0 +1,241 @@
+"""
+atlas_packer.py
+---------------
+Bin-packs sprite frames into power-of-two texture pages and writes a
+Phaser 3 multi-atlas JSON (load with this.load.multiatlas(key, json, path)).
+
+Packing uses MaxRects with best-short-side-fit. Frames can optionally be
+trimmed to their opaque bounding box; the original placement is kept in
+spriteSourceSize/sourceSize so Phaser renders them at the untrimmed offset.
+
+Frames that are pure horizontal mirrors of another frame can be written as
+aliases instead of pixels: an alias is an exact copy of the source frame's
+entry (rect, trim offset and all) under the alias name. Phaser draws it
+unmirrored; game code must set sprite.flipX = true while an alias frame is
+shown, and Phaser then mirrors the trim offset itself. The extra "flipX": true
+and "source": <frame name> keys are metadata for that game code and for
+tools; Phaser does not read them.
+
+Used by stitch_miner_sheet.py --atlas.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from PIL import Image
+
+MAX_PAGE_SIZE = 2048   # safe max texture size for low-end mobile GPUs
+PADDING = 1            # transparent gap between frames, avoids filtering bleed
+
+
+@dataclass
+class PackedFrame:
+    name: str
+    image: Image.Image           # trimmed pixels actually placed on the page
+    source_size: tuple[int, int] # untrimmed (w, h)
+    offset: tuple[int, int]      # trimmed image position inside the untrimmed frame
+    x: int = 0
+    y: int = 0
+
+    @property
+    def trimmed(self) -> bool:
+        return self.image.size != self.source_size
+
+
+@dataclass
+class Page:
+    width: int
+    height: int
+    frames: list[PackedFrame] = field(default_factory=list)
+
+    def render(self) -> Image.Image:
+        sheet = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
+        for f in self.frames:
+            sheet.paste(f.image, (f.x, f.y))
+        return sheet
+
+
+class MaxRectsBin:
+    """MaxRects free-rectangle bin (Jukka Jylänki), best-short-side-fit heuristic."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, w: int, h: int) -> tuple[int, int] | None:
+        best = None
+        best_score = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                score = (min(fw - w, fh - h), max(fw - w, fh - h))
+                if best_score is None or score < best_score:
+                    best, best_score = (fx, fy), score
+        if best is None:
+            return None
+        self._split((best[0], best[1], w, h))
+        return best
+
+    def _split(self, used: tuple[int, int, int, int]) -> None:
+        ux, uy, uw, uh = used
+        result = []
+        for fx, fy, fw, fh in self.free:
+            if ux >= fx + fw or ux + uw <= fx or uy >= fy + fh or uy + uh <= fy:
+                result.append((fx, fy, fw, fh))
+                continue
+            if ux > fx:
+                result.append((fx, fy, ux - fx, fh))
+            if ux + uw < fx + fw:
+                result.append((ux + uw, fy, fx + fw - ux - uw, fh))
+            if uy > fy:
+                result.append((fx, fy, fw, uy - fy))
+            if uy + uh < fy + fh:
+                result.append((fx, uy + uh, fw, fy + fh - uy - uh))
+        # Prune rectangles fully contained in another
+        self.free = [
+            r for i, r in enumerate(result)
+            if not any(
+                j != i and _contains(o, r) and (o != r or j < i)
+                for j, o in enumerate(result)
+            )
+        ]
+
+
+def _contains(outer: tuple, inner: tuple) -> bool:
+    ox, oy, ow, oh = outer
+    ix, iy, iw, ih = inner
+    return ix >= ox and iy >= oy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+
+def _next_pow2(n: int) -> int:
+    p = 1
+    while p < n:
+        p *= 2
+    return p
+
+
+def trim_frame(name: str, img: Image.Image) -> PackedFrame:
+    """Crop a frame to its opaque bounding box (fully transparent -> 1×1)."""
+    bbox = img.getchannel('A').getbbox()
+    if bbox is None:
+        bbox = (0, 0, 1, 1)
+    return PackedFrame(name, img.crop(bbox), img.size, (bbox[0], bbox[1]))
+
+
+def _try_pack(frames: list[PackedFrame], width: int, height: int,
+              padding: int) -> tuple[list[PackedFrame], list[PackedFrame]]:
+    """Pack as many frames as fit into one width×height page."""
+    bin_ = MaxRectsBin(width + padding, height + padding)
+    placed, rest = [], []
+    for f in frames:
+        pos = bin_.insert(f.image.width + padding, f.image.height + padding)
+        if pos is None:
+            rest.append(f)
+        else:
+            f.x, f.y = pos
+            placed.append(f)
+    return placed, rest
+
+
+def pack(frames: list[tuple[str, Image.Image]], trim: bool = True,
+         max_size: int = MAX_PAGE_SIZE, padding: int = PADDING) -> list[Page]:
+    """
+    Pack named frames into as few power-of-two pages as possible.
+    Each page starts at the smallest square that could hold the remaining area
+    and grows (width first, then height) up to max_size before spilling.
+    """
+    items = [trim_frame(n, im) if trim else PackedFrame(n, im, im.size, (0, 0))
+             for n, im in frames]
+    for f in items:
+        if f.image.width > max_size or f.image.height > max_size:
+            raise ValueError(f'Frame {f.name} ({f.image.size}) exceeds max page size {max_size}')
+    # Tall/wide frames first: MaxRects packs much tighter in that order
+    items.sort(key=lambda f: (max(f.image.size), f.image.width * f.image.height), reverse=True)
+
+    pages: list[Page] = []
+    remaining = items
+    while remaining:
+        area = sum((f.image.width + padding) * (f.image.height + padding) for f in remaining)
+        side = max(_next_pow2(int(area ** 0.5)),
+                   _next_pow2(max(f.image.width + padding for f in remaining)),
+                   _next_pow2(max(f.image.height + padding for f in remaining)))
+        w = h = min(side, max_size)
+        while True:
+            placed, rest = _try_pack(remaining, w, h, padding)
+            if not rest or (w >= max_size and h >= max_size):
+                break
+            if w <= h and w < max_size:
+                w *= 2
+            else:
+                h *= 2
+        # Shrink to the smallest power of two that still covers the placed frames
+        used_w = max(f.x + f.image.width for f in placed)
+        used_h = max(f.y + f.image.height for f in placed)
+        pages.append(Page(_next_pow2(used_w), _next_pow2(used_h), placed))
+        remaining = rest
+    return pages
+
+
+def phaser_frame(f: PackedFrame) -> dict:
+    return {
+        'filename': f.name,
+        'rotated': False,
+        'trimmed': f.trimmed,
+        'sourceSize': {'w': f.source_size[0], 'h': f.source_size[1]},
+        'spriteSourceSize': {'x': f.offset[0], 'y': f.offset[1],
+                             'w': f.image.width, 'h': f.image.height},
+        'frame': {'x': f.x, 'y': f.y, 'w': f.image.width, 'h': f.image.height},
+    }
+
+
+def flipped_alias(entry: dict, alias: str) -> dict:
+    """
+    Atlas entry for a horizontally mirrored copy of an existing frame entry.
+    spriteSourceSize stays the source's: Phaser mirrors trim offsets itself
+    when the sprite has flipX set, so mirroring it here would apply it twice.
+    """
+    return {
+        **entry,
+        'filename': alias,
+        'flipX': True,
+        'source': entry['filename'],
+    }
+
+
+def write_atlas(pages: list[Page], out_path: Path,
+                postprocess=None, flip_aliases: dict[str, str] | None = None) -> Path:
+    """
+    Save page PNGs next to out_path and a Phaser multi-atlas JSON at
+    out_path.with_suffix('.json'). A single page is saved as out_path itself;
+    several pages as <stem>-0.png, <stem>-1.png, ...
+    postprocess(Image) -> Image is applied to each rendered page (e.g. quantize).
+    flip_aliases maps alias frame name -> packed source frame name; each alias
+    is emitted on the source's page via flipped_alias().
+    Returns the JSON path.
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    textures = []
+    for i, page in enumerate(pages):
+        name = out_path.name if len(pages) == 1 else f'{out_path.stem}-{i}.png'
+        img = page.render()
+        if postprocess is not None:
+            img = postprocess(img)
+        img.save(out_path.parent / name, 'PNG')
+        entries = {f.name: phaser_frame(f) for f in page.frames}
+        for alias, source in (flip_aliases or {}).items():
+            if source in entries:
+                entries[alias] = flipped_alias(entries[source], alias)
+        textures.append({
+            'image': name,
+            'format': 'RGBA8888',
+            'size': {'w': page.width, 'h': page.height},
+            'scale': 1,
+            'frames': [entries[k] for k in sorted(entries)],
+        })
+
+    json_path = out_path.with_suffix('.json')
+    json_path.write_text(json.dumps({
+        'textures': textures,
+        'meta': {'app': 'sprite-gen/atlas_packer.py', 'version': '1.0'},
+    }, indent=2))
+    return json_path
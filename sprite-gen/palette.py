@@ -0,0 +1,236 @@
+"""
+palette.py
+----------
+Alpha-weighted palette quantization for character sheets.
+
+The legacy path (stitch_miner_sheet's MEDIANCUT on the RGB channels) counts
+every transparent pixel's leftover RGB, so large empty areas pull palette
+entries towards black. Here each distinct colour is weighted by
+pixel count × alpha, fully transparent pixels are ignored, and k-means runs
+in CIELAB so the 16 entries are spent where the eye notices.
+
+A palette can be built once from several sheets (or a whole roster) and
+shared, and frames can be converted to indexed uint8 arrays against it.
+
+  build_palette(images, colors)  -> (k, 3) uint8 sRGB palette
+  apply_palette(img, palette)    -> RGBA image, alpha preserved
+  to_indices / from_indices      -> indexed frames (TRANSPARENT for alpha == 0)
+  benchmark(images, colors)      -> time and mean ΔE (CIE76) vs MEDIANCUT
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+KMEANS_ITERS = 24
+KMEANS_SEED = 0
+BIN_BITS = 5        # colours are pre-binned to 5 bits/channel (≤ 32768 k-means points)
+TRANSPARENT = 255   # index value used for fully transparent pixels
+
+
+# ── Colour space ──────────────────────────────────────────────────────────────
+
+_RGB2XYZ = np.array([[0.4124564, 0.3575761, 0.1804375],
+                     [0.2126729, 0.7151522, 0.0721750],
+                     [0.0193339, 0.1191920, 0.9503041]])
+_XYZ2RGB = np.linalg.inv(_RGB2XYZ)
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (…, 3) in 0-255 -> CIELAB (…, 3), D65."""
+    c = rgb.astype(np.float64) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ _RGB2XYZ.T / _WHITE
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def lab_to_rgb(lab: np.ndarray) -> np.ndarray:
+    """CIELAB (…, 3) -> sRGB (…, 3) uint8, clipped to gamut."""
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    xyz = np.where(f > 6 / 29, f ** 3, 3 * (6 / 29) ** 2 * (f - 4 / 29)) * _WHITE
+    c = np.clip(xyz @ _XYZ2RGB.T, 0.0, 1.0)
+    c = np.where(c > 0.0031308, 1.055 * c ** (1 / 2.4) - 0.055, 12.92 * c)
+    return np.round(c * 255).astype(np.uint8)
+
+
+# ── Palette construction ──────────────────────────────────────────────────────
+
+def _weighted_colors(images: list[Image.Image]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Opaque colours across images, binned to BIN_BITS per channel.
+    Returns (weighted mean RGB per occupied bin as float, count×alpha weight per bin).
+    """
+    shift = 8 - BIN_BITS
+    rgb_all, weight_all = [], []
+    for img in images:
+        px = np.asarray(img.convert('RGBA')).reshape(-1, 4)
+        px = px[px[:, 3] > 0]
+        rgb_all.append(px[:, :3].astype(np.float64))
+        weight_all.append(px[:, 3] / 255.0)
+    if not rgb_all or not sum(len(r) for r in rgb_all):
+        return np.zeros((0, 3)), np.zeros(0)
+    rgb = np.concatenate(rgb_all)
+    weights = np.concatenate(weight_all)
+
+    q = rgb.astype(np.int64) >> shift
+    key = (q[:, 0] << (2 * BIN_BITS)) | (q[:, 1] << BIN_BITS) | q[:, 2]
+    uniq, inverse = np.unique(key, return_inverse=True)
+    w = np.bincount(inverse, weights=weights, minlength=len(uniq))
+    mean = np.stack([np.bincount(inverse, weights=rgb[:, c] * weights, minlength=len(uniq))
+                     for c in range(3)], axis=1) / w[:, None]
+    return mean, w
+
+
+def _sq_dist(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Squared distances (N, K) via |p|² - 2p·c + |c|² (no N×K×3 temporary)."""
+    return ((points ** 2).sum(axis=1)[:, None] - 2 * points @ centers.T
+            + (centers ** 2).sum(axis=1)[None, :])
+
+
+def _nearest(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    return _sq_dist(points, centers).argmin(axis=1)
+
+
+def build_palette(images: list[Image.Image], colors: int = 16) -> np.ndarray:
+    """
+    Alpha-weighted k-means (k-means++ seeding, CIELAB) over the opaque pixels
+    of all images. Returns a (k, 3) uint8 sRGB palette, k <= colors.
+    """
+    rgb, w = _weighted_colors(images)
+    if len(rgb) <= colors:
+        return np.round(rgb).astype(np.uint8) if len(rgb) else np.zeros((1, 3), np.uint8)
+
+    lab = rgb_to_lab(rgb)
+    rng = np.random.default_rng(KMEANS_SEED)
+
+    centers = [lab[rng.choice(len(lab), p=w / w.sum())]]
+    min_d = _sq_dist(lab, centers[0][None]).ravel()
+    for _ in range(colors - 1):
+        score = np.maximum(min_d, 0) * w
+        if score.sum() == 0:
+            break
+        centers.append(lab[rng.choice(len(lab), p=score / score.sum())])
+        min_d = np.minimum(min_d, _sq_dist(lab, centers[-1][None]).ravel())
+    centers = np.array(centers)
+
+    for _ in range(KMEANS_ITERS):
+        label = _nearest(lab, centers)
+        totals = np.bincount(label, weights=w, minlength=len(centers))
+        sums = np.stack([np.bincount(label, weights=lab[:, c] * w, minlength=len(centers))
+                         for c in range(3)], axis=1)
+        moved = totals > 0
+        new = centers.copy()
+        new[moved] = sums[moved] / totals[moved, None]
+        if np.allclose(new, centers, atol=1e-3):
+            centers = new
+            break
+        centers = new
+
+    return np.unique(lab_to_rgb(centers), axis=0)
+
+
+# ── Applying a palette ────────────────────────────────────────────────────────
+
+def to_indices(img: Image.Image, palette: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Map every pixel to its nearest palette entry (in CIELAB).
+    Returns (indices uint8 H×W with TRANSPARENT where alpha == 0, alpha uint8 H×W).
+    """
+    if len(palette) >= TRANSPARENT:
+        raise ValueError(f'Palette has {len(palette)} entries; at most {TRANSPARENT - 1} fit with TRANSPARENT')
+    px = np.asarray(img.convert('RGBA'))
+    alpha = px[..., 3].copy()
+    rgb = px[..., :3].reshape(-1, 3)
+
+    # Resolve each distinct colour once; sheets have far fewer colours than pixels
+    packed = (rgb[:, 0].astype(np.uint32) << 16) | (rgb[:, 1].astype(np.uint32) << 8) | rgb[:, 2]
+    uniq, inverse = np.unique(packed, return_inverse=True)
+    uniq_rgb = np.stack([(uniq >> 16) & 255, (uniq >> 8) & 255, uniq & 255], axis=1)
+    lut = _nearest(rgb_to_lab(uniq_rgb), rgb_to_lab(palette)).astype(np.uint8)
+
+    indices = lut[inverse].reshape(alpha.shape)
+    indices[alpha == 0] = TRANSPARENT
+    return indices, alpha
+
+
+def from_indices(indices: np.ndarray, alpha: np.ndarray, palette: np.ndarray) -> Image.Image:
+    """Rebuild an RGBA image from indexed pixels and an alpha plane."""
+    table = np.vstack([palette, np.zeros((256 - len(palette), 3), np.uint8)])
+    rgb = table[indices]
+    return Image.fromarray(np.dstack([rgb, alpha]), 'RGBA')
+
+
+def apply_palette(img: Image.Image, palette: np.ndarray) -> Image.Image:
+    """Quantize an RGBA image to palette, keeping its alpha channel."""
+    return from_indices(*to_indices(img, palette), palette)
+
+
+def quantize_kmeans(img: Image.Image, colors: int = 16) -> Image.Image:
+    """Per-image alpha-weighted k-means quantization (RGBA in, RGBA out)."""
+    return apply_palette(img, build_palette([img], colors))
+
+
+def quantize_mediancut(img: Image.Image, colors: int = 16) -> Image.Image:
+    """Legacy path: MEDIANCUT on RGB (transparent pixels included), alpha re-merged."""
+    # Note: PIL quantize drops alpha; workaround: quantize RGB then restore alpha
+    rgb = img.convert('RGB')
+    quantized_rgb = rgb.quantize(colors=colors, method=Image.Quantize.MEDIANCUT)
+    quantized_rgb = quantized_rgb.convert('RGB')
+    alpha = img.split()[3]
+    return Image.merge('RGBA', (*quantized_rgb.split(), alpha))
+
+
+# ── Shared palette files ──────────────────────────────────────────────────────
+
+def save_palette(palette: np.ndarray, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(['#%02x%02x%02x' % tuple(int(v) for v in c) for c in palette]))
+
+
+def load_palette(path: Path) -> np.ndarray:
+    return np.array([[int(h[i:i + 2], 16) for i in (1, 3, 5)]
+                     for h in json.loads(path.read_text())], dtype=np.uint8)
+
+
+# ── Benchmark ─────────────────────────────────────────────────────────────────
+
+def mean_delta_e(original: Image.Image, quantized: Image.Image) -> float:
+    """Alpha-weighted mean CIE76 ΔE between two RGBA images of equal size."""
+    a = np.asarray(original.convert('RGBA'))
+    b = np.asarray(quantized.convert('RGBA'))
+    w = a[..., 3].astype(np.float64) / 255.0
+    if w.sum() == 0:
+        return 0.0
+    de = np.sqrt(((rgb_to_lab(a[..., :3]) - rgb_to_lab(b[..., :3])) ** 2).sum(axis=-1))
+    return float((de * w).sum() / w.sum())
+
+
+def benchmark(images: list[Image.Image], colors: int = 16) -> dict:
+    """Time and ΔE of MEDIANCUT-per-image vs k-means-per-image vs one shared k-means palette."""
+    report = {}
+    for name, fn in [('mediancut', lambda im: quantize_mediancut(im, colors)),
+                     ('kmeans', lambda im: quantize_kmeans(im, colors))]:
+        t0 = time.perf_counter()
+        out = [fn(im) for im in images]
+        report[name] = {
+            'seconds': round(time.perf_counter() - t0, 4),
+            'mean_delta_e': round(float(np.mean([mean_delta_e(a, b) for a, b in zip(images, out)])), 3),
+        }
+
+    t0 = time.perf_counter()
+    shared = build_palette(images, colors)
+    out = [apply_palette(im, shared) for im in images]
+    report['kmeans_shared'] = {
+        'seconds': round(time.perf_counter() - t0, 4),
+        'mean_delta_e': round(float(np.mean([mean_delta_e(a, b) for a, b in zip(images, out)])), 3),
+        'palette_size': int(len(shared)),
+    }
+    return report
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Autotile Variant Generator
+Derives the edge/corner variant set of a terrain tile offline, so the renderer
+picks a pre-baked frame instead of masking edges on the GPU.
+
+Neighbour bits (set = same terrain on that side):
+    NW=128  N=1   NE=2
+    W=64    .     E=4
+    SW=32   S=16  SE=8
+
+Modes (names as in gen-biome-tiles.mjs autotileMode):
+  bitmask16  4-bit N=1, E=2, S=4, W=8 mask; the variant index is the mask, so it
+             matches MineCell.tileVariant. Exposed sides get a shaded rim and
+             corners between two exposed sides are rounded off.
+  blob47     8-bit mask with a diagonal only counted when both of its adjacent
+             sides are set (47 distinct masks). Adds inner-corner shading where
+             two sides are set but the diagonal between them is open.
+
+All variants of a tile are composited at once: per-side and per-corner weight
+fields are built once per tile size and combined with each variant's exposure
+flags by broadcasting, giving a (variants, H, W) shade and cut-out stack.
+"""
+
+import numpy as np
+from PIL import Image
+
+AUTOTILE_MODES = ("bitmask16", "blob47")
+
+N, NE, E, SE, S, SW, W, NW = 1, 2, 4, 8, 16, 32, 64, 128
+SIDES   = (N, E, S, W)
+CORNERS = ((NE, N, E), (SE, S, E), (SW, S, W), (NW, N, W))   # (diagonal, side a, side b)
+
+RIM_WIDTH     = 0.1875  # shaded rim depth as a fraction of tile size (6 px at 32)
+RIM_SHADE     = 0.55    # brightness multiplier right at an exposed edge
+CORNER_RADIUS = 0.125   # outer-corner rounding radius as a fraction of tile size
+
+
+# ── Masks ─────────────────────────────────────────────────────────────────────
+
+def reduce_blob(mask: int) -> int:
+    """Drop diagonal bits whose two adjacent sides are not both set."""
+    for diag, a, b in CORNERS:
+        if not (mask & a and mask & b):
+            mask &= ~diag
+    return mask
+
+
+def blob47_masks() -> list[int]:
+    masks = sorted({reduce_blob(m) for m in range(256)})
+    assert len(masks) == 47
+    return masks
+
+
+def bitmask16_to_blob(mask4: int) -> int:
+    """4-bit N/E/S/W mask -> 8-bit mask with every eligible diagonal filled (no inner corners)."""
+    mask = sum(bit for i, bit in enumerate(SIDES) if mask4 & (1 << i))
+    for diag, a, b in CORNERS:
+        if mask & a and mask & b:
+            mask |= diag
+    return mask
+
+
+def variant_masks(mode: str) -> list[int]:
+    """Variant index -> neighbour mask (4-bit for bitmask16, 8-bit for blob47)."""
+    if mode == "bitmask16":
+        return list(range(16))
+    if mode == "blob47":
+        return blob47_masks()
+    raise ValueError(f"Unknown autotile mode {mode!r}; expected one of {AUTOTILE_MODES}")
+
+
+# ── Weight fields ─────────────────────────────────────────────────────────────
+
+def _fields(w: int, h: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (side ramps, inner-corner ramps, outer-corner cut-outs), each (4, H, W).
+    Sides are ordered N, E, S, W; corners NE, SE, SW, NW.
+    """
+    y, x = np.mgrid[0:h, 0:w].astype(np.float64) + 0.5
+    rim = max(1.0, RIM_WIDTH * min(w, h))
+    dist_side = np.stack([y, w - x, h - y, x])
+    sides = np.clip(1.0 - dist_side / rim, 0.0, 1.0)
+
+    cx = np.array([w, w, 0, 0], dtype=np.float64)[:, None, None]
+    cy = np.array([0, h, h, 0], dtype=np.float64)[:, None, None]
+    inner = np.clip(1.0 - np.hypot(x - cx, y - cy) / rim, 0.0, 1.0)
+
+    r = max(1.0, CORNER_RADIUS * min(w, h))
+    ox = np.where(cx > 0, cx - r, r)     # centre of each corner's rounding circle
+    oy = np.where(cy > 0, cy - r, r)
+    beyond = (np.abs(x - cx) < r) & (np.abs(y - cy) < r)
+    outer = beyond & (np.hypot(x - ox, y - oy) > r)
+    return sides, inner, outer
+
+
+def _flags(masks8: list[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-variant (exposed sides, inner corners, outer corners), each (V, 4) float."""
+    m = np.array(masks8)[:, None]
+    side_set = (m & np.array(SIDES)) > 0
+    diag_set = (m & np.array([c[0] for c in CORNERS])) > 0
+    a_set    = (m & np.array([c[1] for c in CORNERS])) > 0
+    b_set    = (m & np.array([c[2] for c in CORNERS])) > 0
+    exposed  = ~side_set
+    inner    = a_set & b_set & ~diag_set
+    outer    = ~a_set & ~b_set
+    return exposed.astype(np.float64), inner.astype(np.float64), outer.astype(np.float64)
+
+
+# ── Compositing ───────────────────────────────────────────────────────────────
+
+def autotile_variants(base: Image.Image, mode: str = "bitmask16") -> list[tuple[int, Image.Image]]:
+    """
+    All variants of base for mode, as (mask, RGBA image) in variant-index order.
+    Composited in one vectorized pass over a (V, H, W) stack.
+    """
+    masks = variant_masks(mode)
+    masks8 = [bitmask16_to_blob(m) for m in masks] if mode == "bitmask16" else masks
+
+    px = np.asarray(base.convert("RGBA"), dtype=np.float64)
+    h, w = px.shape[:2]
+    sides, inner, outer = _fields(w, h)
+    exposed, inner_on, outer_on = _flags(masks8)
+
+    # (V, 4) flags × (4, H, W) fields -> (V, H, W), strongest contribution wins
+    shade = np.maximum(
+        (exposed[:, :, None, None] * sides[None]).max(axis=1),
+        (inner_on[:, :, None, None] * inner[None]).max(axis=1),
+    )
+    cut = (outer_on[:, :, None, None] * outer[None]).max(axis=1)
+
+    rgb = px[None, ..., :3] * (1.0 - shade[..., None] * (1.0 - RIM_SHADE))
+    alpha = px[None, ..., 3] * (1.0 - cut)
+    stack = np.concatenate([rgb, alpha[..., None]], axis=-1)
+    stack = np.clip(np.round(stack), 0, 255).astype(np.uint8)
+    return [(mask, Image.fromarray(stack[i], "RGBA")) for i, mask in enumerate(masks)]
@@ -1,18 +1,21 @@
 #!/usr/bin/env python3
 """
 Terra Miner — Batch Sprite Regeneration Pipeline
-Regenerates all 6 game sprites at 256x256 hi-res resolution using the same
-ComfyUI SDXL + pixel-art-xl LoRA pipeline as generate_sprite.py.
+Regenerates the manifest's sprites at their hi-res size (hires_size, 256 by
+default) using the same ComfyUI SDXL + pixel-art-xl LoRA pipeline as
+generate_sprite.py.
 
 Output layout:
-  src/assets/sprites-hires/<category>/<name>.png   — 256x256 hi-res source of truth
+  src/assets/sprites-hires/<category>/<name>.png   — hi-res source of truth
   src/assets/sprites/<category>/<name>.png         — game-ready (64x64 chars, 32x32 items)
   sprite-gen/output/<name>_raw.png                 — raw ComfyUI output
-  sprite-gen/output/<name>_256.png                 — 256x256 intermediate
+  sprite-gen/output/<name>_<hires_size>.png        — hi-res intermediate
   sprite-gen/output/<name>_<size>.png              — game-ready intermediate
 
 Sprites are processed ONE AT A TIME (sequential) because the GPU can only
-handle one generation at a time.
+handle one generation at a time. Each step is a cached stage
+(sprite_pipeline.py), so editing one sprite's game_size re-runs only its
+downscale and save, from the cached background-removed image.
 
 Usage:
     python batch_regenerate.py
@@ -26,70 +29,21 @@ SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
 from generate_sprite import (
-    queue_prompt,
-    wait_for_completion,
-    download_image,
     build_sdxl_workflow,
-    remove_background,
-    trim_transparent,
-    make_square,
-    downscale,
     COMFYUI_URL,
     OUTPUT_DIR,
     SPRITES_DIR,
     HIRES_DIR,
 )
+from sprite_manifest import load_manifest
+from sprite_pipeline import NoImageError, Pipeline, sprite_stages
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-HIRES_SIZE = 256
-
-SPRITES = [
-    {
-        "name": "miner_idle",
-        "category": "characters",
-        "game_size": 64,
-        "prompt": "pixel art, game sprite, mining character with helmet and pickaxe, idle pose, chibi style, 2D side view",
-        "seed": 101,
-    },
-    {
-        "name": "mineral_blue",
-        "category": "items",
-        "game_size": 32,
-        "prompt": "pixel art, game item icon, glowing blue crystal mineral gemstone, shiny faceted",
-        "seed": 201,
-    },
-    {
-        "name": "mineral_green",
-        "category": "items",
-        "game_size": 32,
-        "prompt": "pixel art, game item icon, glowing green emerald crystal mineral, shiny faceted",
-        "seed": 202,
-    },
-    {
-        "name": "mineral_red",
-        "category": "items",
-        "game_size": 32,
-        "prompt": "pixel art, game item icon, glowing red ruby crystal mineral, shiny faceted",
-        "seed": 203,
-    },
-    {
-        "name": "relic_gold",
-        "category": "items",
-        "game_size": 32,
-        "prompt": "pixel art, game item icon, ancient golden artifact relic, ornate metalwork, mysterious glow",
-        "seed": 301,
-    },
-    {
-        "name": "relic_tablet",
-        "category": "items",
-        "game_size": 32,
-        "prompt": "pixel art, game item icon, ancient stone tablet with glowing runes, mysterious carved artifact",
-        "seed": 302,
-    },
-]
+# Sprite definitions live in sprite-gen/sprite-manifest.json (see sprite_manifest.py)
+SPRITES = [e for e in load_manifest() if e["rembg"]]
 
 
 # ---------------------------------------------------------------------------
@@ -105,6 +59,7 @@ def regenerate_sprite(sprite: dict) -> bool:
     """
     name = sprite["name"]
     category = sprite["category"]
+    hires_size = sprite["hires_size"]
     game_size = sprite["game_size"]
     prompt = sprite["prompt"]
     seed = sprite["seed"]
@@ -120,63 +75,24 @@ def regenerate_sprite(sprite: dict) -> bool:
     print(f"  Sprite   : {name}")
     print(f"  Category : {category}")
     print(f"  Prompt   : {prompt}")
-    print(f"  Hi-res   : {HIRES_SIZE}x{HIRES_SIZE}  |  Game: {game_size}x{game_size}  |  Seed: {seed}")
+    print(f"  Hi-res   : {hires_size}x{hires_size}  |  Game: {game_size}x{game_size}  |  Seed: {seed}")
     print(f"{'=' * 64}")
 
     try:
-        # Step 1: Generate via ComfyUI
-        print("  [1/5] Generating with SDXL + pixel-art-xl LoRA...")
+        # generate → rembg → trim → square → downscale as cached stages
+        # (sprite_pipeline.py): re-runs only redo stages whose inputs changed
         workflow = build_sdxl_workflow(prompt, seed=seed)
-        prompt_id = queue_prompt(workflow)
-        result = wait_for_completion(prompt_id, timeout=300)
-
-        # Extract raw image bytes from completion result
-        img_bytes = None
-        for node_output in result.get("outputs", {}).values():
-            if "images" in node_output:
-                img_info = node_output["images"][0]
-                img_bytes = download_image(
-                    img_info["filename"], img_info.get("subfolder", "")
-                )
-                break
-
-        if img_bytes is None:
-            print(f"  ERROR: No image returned from ComfyUI for '{name}'")
-            return False
-
-        # Save raw intermediate
-        raw_path = OUTPUT_DIR / f"{name}_raw.png"
-        raw_path.write_bytes(img_bytes)
-        print(f"  [1/5] Raw saved: {raw_path.name}  ({len(img_bytes) // 1024} KB)")
-
-        # Step 2: Remove background
-        print("  [2/5] Removing background with rembg...")
-        rgba_img = remove_background(img_bytes)
-
-        # Step 3: Trim transparent edges and pad to square
-        print("  [3/5] Trimming and centering on square canvas...")
-        trimmed = trim_transparent(rgba_img)
-        squared = make_square(trimmed)
-
-        # Step 4: Hi-res downscale to 256x256
-        print(f"  [4/5] Downscaling to {HIRES_SIZE}x{HIRES_SIZE} (hi-res, nearest-neighbor)...")
-        hires_img = downscale(squared, HIRES_SIZE)
-        hires_intermediate = OUTPUT_DIR / f"{name}_{HIRES_SIZE}.png"
-        hires_img.save(hires_intermediate)
-        print(f"         Intermediate: {hires_intermediate.name}")
-
-        # Step 5: Game-ready downscale
-        print(f"  [5/5] Downscaling to {game_size}x{game_size} (game-ready, nearest-neighbor)...")
-        game_img = downscale(squared, game_size)
-        game_intermediate = OUTPUT_DIR / f"{name}_{game_size}.png"
-        game_img.save(game_intermediate)
-        print(f"         Intermediate: {game_intermediate.name}")
-
-        # Copy to project asset directories
         hires_asset = hires_cat_dir / f"{name}.png"
         game_asset = sprites_cat_dir / f"{name}.png"
-        hires_img.save(hires_asset)
-        game_img.save(game_asset)
+        stages = sprite_stages(workflow, OUTPUT_DIR / f"{name}_raw.png", [
+            (hires_size, [OUTPUT_DIR / f"{name}_{hires_size}.png", hires_asset]),
+            (game_size, [OUTPUT_DIR / f"{name}_{game_size}.png", game_asset]),
+        ])
+        try:
+            Pipeline(stages).run()
+        except NoImageError:
+            print(f"  ERROR: No image returned from ComfyUI for '{name}'")
+            return False
 
         print(f"\n  Assets written:")
         print(f"    Hi-res     : src/assets/sprites-hires/{category}/{name}.png")
@@ -201,7 +117,6 @@ def main():
     """Regenerate all sprites sequentially, reporting a summary at the end."""
     total = len(SPRITES)
     print(f"\nTerra Miner — Batch Sprite Regeneration")
-    print(f"Hi-res target: {HIRES_SIZE}x{HIRES_SIZE}")
     print(f"Sprites to process: {total}\n")
 
     results = {}
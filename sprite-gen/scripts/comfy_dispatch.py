@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — ComfyUI Endpoint Dispatcher
+Leases work items across several ComfyUI servers (one per GPU box).
+
+Each endpoint runs `depth` worker threads, so at most `depth` jobs are in
+flight on it at once. A job that fails with a transport error, a 5xx or a
+timeout (stalled queue) is re-leased to whichever endpoint frees up next;
+after `max_endpoint_failures` consecutive such errors the endpoint is marked
+dead and its workers stop. A 4xx means the server rejected this item (e.g. a
+bad workflow): the item fails and the endpoint stays in rotation. Results are handed back to the calling thread, which
+stays the single writer for the DB and checkpoint journal.
+
+Endpoint spec: "http://host:8188" or "http://host:8188,2" (queue depth 2).
+"""
+
+import queue
+import socket
+import threading
+import urllib.error
+import urllib.request
+from typing import Callable
+
+# Errors that say "this endpoint is unhealthy", not "this item is bad".
+# HTTPError is a URLError too; _worker sorts it by status code first.
+ENDPOINT_ERRORS = (urllib.error.URLError, ConnectionError, TimeoutError, socket.timeout)
+
+
+def is_endpoint_error(exc: Exception) -> bool:
+    """True for transport errors and 5xx; False for 4xx and everything else."""
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code >= 500
+    return isinstance(exc, ENDPOINT_ERRORS)
+
+
+class Endpoint:
+    """One ComfyUI server and its health counters."""
+
+    def __init__(self, url: str, depth: int = 1):
+        self.url                  = url.rstrip("/")
+        self.depth                = depth
+        self.alive                = True
+        self.consecutive_failures = 0
+        self.completed            = 0
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.url!r}, depth={self.depth})"
+
+
+def parse_endpoint(spec: str) -> Endpoint:
+    """Parse "URL" or "URL,DEPTH" into an Endpoint."""
+    url, _, depth = spec.partition(",")
+    return Endpoint(url.strip(), int(depth) if depth else 1)
+
+
+def probe(url: str, timeout: float = 5.0) -> bool:
+    """True if the ComfyUI server answers /system_stats."""
+    try:
+        urllib.request.urlopen(f"{url}/system_stats", timeout=timeout).read()
+        return True
+    except Exception:
+        return False
+
+
+class Dispatcher:
+    """
+    Run work_fn(item, base_url) -> bool for every item across the endpoints.
+
+    on_result(item, ok, url) is called on the thread that invoked run(), one
+    call per item that was attempted. Items left unleased because every
+    endpoint died are returned from run() so the caller can leave them queued.
+    """
+
+    def __init__(self, endpoints: list[Endpoint],
+                 work_fn: Callable[[dict, str], bool],
+                 max_endpoint_failures: int = 3, max_leases: int = 3):
+        self.endpoints             = endpoints
+        self.work_fn               = work_fn
+        self.max_endpoint_failures = max_endpoint_failures
+        self.max_leases            = max_leases
+        self._work:    queue.Queue = queue.Queue()
+        self._results: queue.Queue = queue.Queue()
+        self._leases:  dict[str, int] = {}
+        self._lock     = threading.Lock()
+        self._done     = threading.Event()
+
+    def run(self, items: list[dict], on_result: Callable[[dict, bool, str], None]) -> list[dict]:
+        live = [ep for ep in self.endpoints if probe(ep.url)]
+        for ep in self.endpoints:
+            if ep not in live:
+                ep.alive = False
+                print(f"  [DISPATCH] {ep.url} not reachable — skipping")
+        if not live:
+            return list(items)
+
+        for item in items:
+            self._work.put(item)
+
+        workers = [threading.Thread(target=self._worker, args=(ep,), daemon=True)
+                   for ep in live for _ in range(ep.depth)]
+        for w in workers:
+            w.start()
+
+        pending = len(items)
+        while pending:
+            try:
+                item, ok, url = self._results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(w.is_alive() for w in workers):
+                    break  # every endpoint died with work still queued
+                continue
+            on_result(item, ok, url)
+            pending -= 1
+
+        self._done.set()
+        for w in workers:
+            w.join(timeout=1.0)
+
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._work.get_nowait())
+            except queue.Empty:
+                return leftover
+
+    def _worker(self, ep: Endpoint) -> None:
+        while ep.alive:
+            try:
+                item = self._work.get(timeout=0.5)
+            except queue.Empty:
+                if self._done.is_set():
+                    return
+                continue
+
+            with self._lock:
+                self._leases[item["id"]] = self._leases.get(item["id"], 0) + 1
+                leases = self._leases[item["id"]]
+
+            try:
+                ok = self.work_fn(item, ep.url)
+            except Exception as exc:
+                if is_endpoint_error(exc):
+                    self._endpoint_failed(ep, item, leases, exc)
+                    continue
+                print(f"  [ERR]   {item['id']} on {ep.url}: {type(exc).__name__}: {exc}")
+                ok = False
+
+            # The endpoint answered, whatever the item's outcome: it is healthy
+            with self._lock:
+                ep.consecutive_failures = 0
+                ep.completed += 1
+            self._results.put((item, ok, ep.url))
+
+    def _endpoint_failed(self, ep: Endpoint, item: dict, leases: int, exc: Exception) -> None:
+        with self._lock:
+            ep.consecutive_failures += 1
+            if ep.consecutive_failures >= self.max_endpoint_failures:
+                ep.alive = False
+                print(f"  [DISPATCH] {ep.url} marked dead: {type(exc).__name__}: {exc}")
+        if leases >= self.max_leases:
+            self._results.put((item, False, ep.url))
+        else:
+            print(f"  [DISPATCH] re-leasing {item['id']} (was on {ep.url})")
+            self._work.put(item)
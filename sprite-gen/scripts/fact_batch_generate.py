@@ -5,13 +5,22 @@ Reads queued facts from facts.db, generates pixel art via ComfyUI, post-processe
 each image (rembg + downscale), saves to src/assets/sprites/facts/<id>.png,
 and updates pixel_art_status to 'review' (pass) or 'failed' (error).
 
-GPU constraint: sequential generation (one at a time on RTX 3060).
-Checkpoint file: sprite-gen/scripts/fact_gen_state.json tracks completed/failed IDs.
+GPU constraint: one job at a time per ComfyUI endpoint by default. Pass --comfyui
+several times (optionally "URL,DEPTH") to spread the queue across GPU boxes via
+comfy_dispatch.py; the main thread stays the only DB/journal writer.
+Checkpoint journal: sprite-gen/scripts/fact_gen_state.jsonl tracks completed/failed IDs
+(append-only, see fact_gen_journal.py).
+
+Queue order comes from fact_scheduler.py: fair across category_l1, aged by
+time waiting, penalised per failure, optionally reserving a quota for a deck list.
 
 Usage:
     python fact_batch_generate.py [--limit 100] [--skip-qc]
+    python fact_batch_generate.py --deck-list release_ids.txt --deck-quota 0.5
+    python fact_batch_generate.py --comfyui http://gpu1:8188 --comfyui http://gpu2:8188,2
 """
 
+import hashlib
 import io
 import json
 import os
@@ -26,7 +35,8 @@ FACTS_DB     = PROJECT_DIR / "server" / "data" / "facts.db"
 OUTPUT_DIR   = SCRIPT_DIR.parent / "output" / "facts"
 SPRITES_DIR  = PROJECT_DIR / "src" / "assets" / "sprites" / "facts"
 HIRES_DIR    = PROJECT_DIR / "src" / "assets" / "sprites-hires" / "facts"
-STATE_FILE   = SCRIPT_DIR / "fact_gen_state.json"
+STATE_FILE   = SCRIPT_DIR / "fact_gen_state.jsonl"
+LEGACY_STATE = SCRIPT_DIR / "fact_gen_state.json"   # pre-journal checkpoint, imported once
 
 GAME_SIZE  = 64
 HIRES_SIZE = 256
@@ -36,6 +46,10 @@ SDXL_STEPS   = 30
 SDXL_CFG     = 7.0
 SDXL_SAMPLER = "euler_ancestral"
 
+# Key for seed derivation. Changing it reshuffles every fact's seed (and so
+# invalidates the generation cache) — only bump it deliberately.
+SEED_KEY = b"terra-miner/fact-sprite/v1"
+
 PROMPT_PREFIX = (
     "pixel art, 8-bit, game illustration, retro video game art style, "
     "clean pixel outlines, limited color palette, "
@@ -53,16 +67,11 @@ NEGATIVE = (
 # ── Import shared helpers from generate_sprite.py ─────────────────────────────
 
 sys.path.insert(0, str(SCRIPT_DIR))
-from generate_sprite import (
-    queue_prompt,
-    wait_for_completion,
-    download_image,
-    remove_background,
-    trim_transparent,
-    make_square,
-    downscale,
-    COMFYUI_URL,
-)
+from generate_sprite import COMFYUI_URL
+from comfy_dispatch import Dispatcher, parse_endpoint
+from fact_gen_journal import GenJournal
+from fact_scheduler import load_deck_ids, parse_deck_quota, parse_weights, schedule
+from sprite_pipeline import NoImageError, Pipeline, sprite_stages
 from PIL import Image
 
 
@@ -122,76 +131,55 @@ def build_fact_workflow(prompt: str, seed: int) -> dict:
     }
 
 
-def load_state() -> dict:
-    """Load checkpoint state: {completed: [...], failed: [...]}."""
-    if STATE_FILE.exists():
-        try:
-            return json.loads(STATE_FILE.read_text())
-        except Exception:
-            pass
-    return {"completed": [], "failed": [], "retry_counts": {}, "total_processed": 0}
-
-
-def save_state(state: dict) -> None:
-    """Persist checkpoint state atomically."""
-    import datetime
-    state["last_run"] = datetime.datetime.utcnow().isoformat() + "Z"
-    STATE_FILE.write_text(json.dumps(state, indent=2))
+def stable_seed(fact_id: str, variant: int = 0) -> int:
+    """
+    Deterministic seed for a fact, identical across processes and machines.
+    Keyed BLAKE2b of "<fact_id>:<variant>" truncated to 31 bits. fact_qc.py bumps
+    pixel_art_seed_variant when it rejects a sprite so the next run tries a new seed.
+    """
+    digest = hashlib.blake2b(f"{fact_id}:{variant}".encode("utf-8"),
+                             key=SEED_KEY, digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (2 ** 31)
 
 
-def stable_seed(fact_id: str) -> int:
-    """Deterministic seed derived from fact ID so the same fact always uses the same seed.
-    This ensures regeneration produces visually similar (not identical) results."""
-    return abs(hash(fact_id)) % (2 ** 31)
+def ensure_seed_columns(conn: sqlite3.Connection) -> None:
+    """Add the per-fact seed columns if the server migration has not yet run."""
+    names = {r[1] for r in conn.execute("PRAGMA table_info(facts)").fetchall()}
+    for column, ddl in [("pixel_art_seed", "INTEGER"),
+                        ("pixel_art_seed_variant", "INTEGER NOT NULL DEFAULT 0")]:
+        if column not in names:
+            conn.execute(f"ALTER TABLE facts ADD COLUMN {column} {ddl}")
+    conn.commit()
 
 
-def generate_one(fact: dict) -> bool:
+def generate_one(fact: dict, seed: int, base_url: str = COMFYUI_URL) -> bool:
     """
-    Generate, post-process, and save a single fact sprite.
-    Returns True on success, False on any error.
+    Generate, post-process, and save a single fact sprite on one ComfyUI endpoint.
+    Returns True on success, False if no image came back. Transport errors and
+    timeouts propagate so the dispatcher can re-lease the fact elsewhere.
+    Every step is a cached stage (sprite_pipeline.py): a fact whose prompt and
+    seed are unchanged is rebuilt from the cached rembg output, not the GPU.
     """
     fid    = fact["id"]
     prompt = fact["image_prompt"]
-    seed   = stable_seed(fid)
-
-    raw_out   = OUTPUT_DIR / f"{fid}_raw.png"
-    rembg_out = OUTPUT_DIR / f"{fid}_rembg.png"
-
-    print(f"  [GEN]   Queuing ComfyUI job (seed={seed})...")
-    workflow   = build_fact_workflow(prompt, seed)
-    prompt_id  = queue_prompt(workflow)
-    result     = wait_for_completion(prompt_id, timeout=300)
 
-    img_bytes = None
-    for node_out in result.get("outputs", {}).values():
-        if "images" in node_out:
-            info      = node_out["images"][0]
-            img_bytes = download_image(info["filename"], info.get("subfolder", ""))
-            break
-
-    if img_bytes is None:
+    hires_path = HIRES_DIR / f"{fid}.png"
+    game_path  = SPRITES_DIR / f"{fid}.png"
+
+    print(f"  [GEN]   {fid}: queuing ComfyUI job on {base_url} (seed={seed})...")
+    stages = sprite_stages(
+        build_fact_workflow(prompt, seed),
+        OUTPUT_DIR / f"{fid}_raw.png",
+        [(HIRES_SIZE, [hires_path]), (GAME_SIZE, [game_path])],
+        squared_path=OUTPUT_DIR / f"{fid}_rembg.png",
+        base_url=base_url,
+    )
+    try:
+        Pipeline(stages, log=lambda msg: print(f"{msg}  ({fid})")).run()
+    except NoImageError:
         print(f"  [ERR]   No image returned from ComfyUI")
         return False
 
-    raw_out.write_bytes(img_bytes)
-    print(f"  [REMBG] Removing background...")
-    rgba    = remove_background(img_bytes)
-    trimmed = trim_transparent(rgba)
-    squared = make_square(trimmed)
-
-    # Save intermediate rembg PNG
-    squared.save(str(rembg_out))
-
-    # Hi-res: 256×256 nearest-neighbor
-    hires      = downscale(squared, HIRES_SIZE)
-    hires_path = HIRES_DIR / f"{fid}.png"
-    hires.save(str(hires_path))
-
-    # Game-ready: 64×64 nearest-neighbor
-    game      = downscale(squared, GAME_SIZE)
-    game_path = SPRITES_DIR / f"{fid}.png"
-    game.save(str(game_path))
-
     print(f"  [SAVE]  {game_path.relative_to(PROJECT_DIR)}  &  {hires_path.relative_to(PROJECT_DIR)}")
     return True
 
@@ -204,77 +192,93 @@ def main() -> None:
     parser.add_argument("--reset", action="store_true",
                         help="Clear checkpoint state and start fresh (does not reset DB status)")
     parser.add_argument("--db", default=str(FACTS_DB))
+    parser.add_argument("--comfyui", action="append", default=[], metavar="URL[,DEPTH]",
+                        help=f"ComfyUI endpoint, repeatable (default {COMFYUI_URL})")
+    parser.add_argument("--category-weight", action="append", default=[], metavar="CAT=W",
+                        help="Fair-queuing weight for a category_l1 (repeatable, default 1)")
+    parser.add_argument("--deck-list", type=Path,
+                        help="File of fact IDs (JSON array or one per line) for a release")
+    parser.add_argument("--deck-quota", type=parse_deck_quota, default=None,
+                        help="Fraction of --limit reserved for --deck-list facts (0-1], default 1 with --deck-list)")
     args = parser.parse_args()
 
-    if args.reset and STATE_FILE.exists():
-        STATE_FILE.unlink()
+    weights  = parse_weights(args.category_weight)
+    deck_ids = load_deck_ids(args.deck_list) if args.deck_list else None
+    if args.deck_quota is None:
+        args.deck_quota = 1.0 if deck_ids else 0.0
+
+    if args.reset:
+        for f in (STATE_FILE, LEGACY_STATE):
+            if f.exists():
+                f.unlink()
         print("  Checkpoint state cleared.\n")
 
     for d in [OUTPUT_DIR, SPRITES_DIR, HIRES_DIR]:
         d.mkdir(parents=True, exist_ok=True)
 
-    state = load_state()
-    already_done = set(state.get("completed", [])) | set(state.get("permanent_failures", []))
+    journal = GenJournal(STATE_FILE, legacy_state=LEGACY_STATE)
 
     conn = sqlite3.connect(args.db)
     conn.row_factory = sqlite3.Row
     cur  = conn.cursor()
+    ensure_seed_columns(conn)
 
     rows = cur.execute("""
-        SELECT id, image_prompt
+        SELECT id, image_prompt, pixel_art_seed_variant,
+               category_l1, fun_score, updated_at
         FROM   facts
         WHERE  status = 'approved'
           AND  type = 'fact'
           AND  pixel_art_status IN ('queued', 'failed')
           AND  image_prompt IS NOT NULL
-        ORDER  BY fun_score DESC
-        LIMIT  ?
-    """, (args.limit,)).fetchall()
+    """).fetchall()
 
-    candidates = [dict(r) for r in rows if r["id"] not in already_done]
+    queue      = [dict(r) for r in rows if not journal.is_done(r["id"])]
+    candidates = schedule(queue, args.limit, journal.retry_counts, weights=weights,
+                          deck_ids=deck_ids, deck_quota=args.deck_quota)
     total = len(candidates)
     print(f"Terra Miner — Fact Art Batch Generator")
-    print(f"Queue: {total} facts  |  State: {len(state.get('completed', []))} done\n")
+    print(f"Queue: {total} facts  |  State: {len(journal.completed)} done\n")
 
-    for i, fact in enumerate(candidates, start=1):
-        fid = fact["id"]
-        print(f"\n[{i}/{total}] {fid}")
-        print(f"  Prompt: {fact['image_prompt'][:80]}...")
+    endpoints = [parse_endpoint(spec) for spec in (args.comfyui or [COMFYUI_URL])]
+    for fact in candidates:
+        fact["seed"] = stable_seed(fact["id"], fact["pixel_art_seed_variant"] or 0)
 
-        try:
-            success = generate_one(fact)
-        except Exception as exc:
-            print(f"  [ERR]   Unexpected: {type(exc).__name__}: {exc}")
-            success = False
+    finished = 0
 
+    def write_result(fact: dict, success: bool, url: str) -> None:
+        # Runs on the main thread only: the single writer for facts.db and the journal
+        nonlocal finished
+        finished += 1
+        fid        = fact["id"]
         new_status = "review" if success else "failed"
         cur.execute("""
             UPDATE facts
             SET    pixel_art_status = ?,
                    has_pixel_art    = ?,
+                   pixel_art_seed   = ?,
                    updated_at       = (unixepoch() * 1000)
             WHERE  id = ?
-        """, (new_status, 1 if success else 0, fid))
+        """, (new_status, 1 if success else 0, fact["seed"], fid))
         conn.commit()
 
         if success:
-            state.setdefault("completed", []).append(fid)
+            journal.record_success(fid)
         else:
-            state.setdefault("failed", []).append(fid)
-            state.setdefault("retry_counts", {})[fid] = \
-                state["retry_counts"].get(fid, 0) + 1
-            if state["retry_counts"][fid] >= 3:
-                state.setdefault("permanent_failures", []).append(fid)
-                state["failed"].remove(fid)
+            journal.record_failure(fid)
+        print(f"[{finished}/{total}] {fid}  {new_status.upper()}  ({url})")
 
-        state["total_processed"] = state.get("total_processed", 0) + 1
-        save_state(state)
-        print(f"  Status: {new_status.upper()}")
+    dispatcher = Dispatcher(endpoints,
+                            lambda fact, url: generate_one(fact, fact["seed"], base_url=url))
+    unleased = dispatcher.run(candidates, write_result)
+    if unleased:
+        print(f"\n  [WARN] No live ComfyUI endpoint left; {len(unleased)} facts stay queued.")
 
     conn.close()
+    journal.close()
 
-    done_count   = sum(1 for f in candidates if f["id"] in set(state.get("completed", [])))
-    failed_count = sum(1 for f in candidates if f["id"] in set(state.get("failed", [])))
+    done_count   = sum(1 for f in candidates if f["id"] in journal.completed)
+    failed_count = sum(1 for f in candidates if f["id"] in journal.failed)
     print(f"\n{'='*60}")
     print(f"  Batch complete: {done_count} generated, {failed_count} failed.")
     if failed_count:
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Fact Art Generation Journal
+Append-only checkpoint log for fact_batch_generate.py.
+
+Each finished fact appends one JSON line to fact_gen_state.jsonl, so a
+checkpoint costs the same at fact 10 as at fact 100,000. On load the journal
+is replayed into set/dict indexes; every COMPACT_EVERY appends (and on close)
+it is rewritten as a single snapshot line via temp file + rename.
+
+Journal records:
+    {"op": "snapshot", "completed": [...], "failed": [...], "retry_counts": {...}, "total_processed": n}
+    {"op": "ok",   "id": "<fact id>", "t": <unix seconds>}
+    {"op": "fail", "id": "<fact id>", "t": <unix seconds>}
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+
+MAX_RETRIES   = 3      # failures before a fact becomes a permanent failure
+COMPACT_EVERY = 1000   # appended records between snapshot rewrites
+
+
+class GenJournal:
+    """In-memory generation state backed by an append-only JSONL journal."""
+
+    def __init__(self, path: Path, legacy_state: Path | None = None):
+        self.path            = path
+        self.completed:    set[str]       = set()
+        self.failed:       set[str]       = set()
+        self.retry_counts: dict[str, int] = {}
+        self.total_processed = 0
+        self._appended       = 0
+
+        if path.exists():
+            self._replay()
+        elif legacy_state is not None and legacy_state.exists():
+            self._import_legacy(legacy_state)
+            self.compact()
+
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    @property
+    def permanent_failures(self) -> set[str]:
+        return {fid for fid, n in self.retry_counts.items()
+                if n >= MAX_RETRIES and fid not in self.completed}
+
+    def is_done(self, fid: str) -> bool:
+        """True if the fact succeeded or has exhausted its retries."""
+        return fid in self.completed or self.retry_counts.get(fid, 0) >= MAX_RETRIES
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def record_success(self, fid: str) -> None:
+        self._apply("ok", fid)
+        self._append({"op": "ok", "id": fid, "t": int(time.time())})
+
+    def record_failure(self, fid: str) -> int:
+        """Record a failed attempt and return the fact's new retry count."""
+        self._apply("fail", fid)
+        self._append({"op": "fail", "id": fid, "t": int(time.time())})
+        return self.retry_counts[fid]
+
+    def compact(self) -> None:
+        """Rewrite the journal as a single snapshot line (atomic rename)."""
+        snapshot = {
+            "op":              "snapshot",
+            "completed":       sorted(self.completed),
+            "failed":          sorted(self.failed),
+            "retry_counts":    self.retry_counts,
+            "total_processed": self.total_processed,
+        }
+        reopen = getattr(self, "_fh", None) is not None and not self._fh.closed
+        if reopen:
+            self._fh.close()
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(snapshot) + "\n", encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._appended = 0
+        if reopen:
+            self._fh = open(self.path, "a", encoding="utf-8")
+
+    def close(self) -> None:
+        if self._appended:
+            self.compact()
+        self._fh.close()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _apply(self, op: str, fid: str) -> None:
+        self.total_processed += 1
+        if op == "ok":
+            self.completed.add(fid)
+            self.failed.discard(fid)
+        else:
+            self.retry_counts[fid] = self.retry_counts.get(fid, 0) + 1
+            if self.retry_counts[fid] >= MAX_RETRIES:
+                self.failed.discard(fid)
+            else:
+                self.failed.add(fid)
+
+    def _append(self, record: dict) -> None:
+        self._fh.write(json.dumps(record) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._appended += 1
+        if self._appended >= COMPACT_EVERY:
+            self.compact()
+
+    def _replay(self) -> None:
+        data = self.path.read_bytes()
+        # Only newline-terminated records were fully written; a torn tail from an
+        # interrupted write is cut off, or the next append would land on its line
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+                f.flush()
+                os.fsync(f.fileno())
+        for line in data[:end].decode("utf-8", errors="replace").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # corrupt line; the rest of the journal still replays
+            op = record.get("op")
+            if op == "snapshot":
+                self.completed       = set(record.get("completed", []))
+                self.failed          = set(record.get("failed", []))
+                self.retry_counts    = dict(record.get("retry_counts", {}))
+                self.total_processed = record.get("total_processed", 0)
+            elif op in ("ok", "fail"):
+                self._apply(op, record["id"])
+                self._appended += 1
+
+    def _import_legacy(self, legacy_state: Path) -> None:
+        """Seed indexes from the old whole-file fact_gen_state.json."""
+        try:
+            state = json.loads(legacy_state.read_text())
+        except Exception:
+            return
+        self.completed       = set(state.get("completed", []))
+        self.failed          = set(state.get("failed", []))
+        self.retry_counts    = dict(state.get("retry_counts", {}))
+        self.total_processed = state.get("total_processed", 0)
+        for fid in state.get("permanent_failures", []):
+            self.retry_counts[fid] = max(self.retry_counts.get(fid, 0), MAX_RETRIES)
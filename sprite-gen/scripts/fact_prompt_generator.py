@@ -48,10 +48,122 @@ USER_TEMPLATE = (
     "Generate the FactImageSpec JSON for this fact."
 )
 
+# ── FactImageSpec parsing ─────────────────────────────────────────────────────
+
+# Required fields of a FactImageSpec and their expected JSON types.
+FACT_IMAGE_SPEC_SCHEMA = {
+    "visual_description": str,
+    "image_prompt":       str,
+}
+
+MAX_ATTEMPTS = 3   # total Claude calls per fact for retryable failures
+
+
+class SpecError(Exception):
+    """A Claude call that did not yield a valid FactImageSpec.
+
+    kind is one of: http, network, response, truncated, no_json, invalid_json, schema.
+    retryable is True when another call has a reasonable chance of succeeding.
+    """
+
+    def __init__(self, kind: str, message: str, retryable: bool):
+        super().__init__(message)
+        self.kind      = kind
+        self.retryable = retryable
+
+
+def extract_json_object(text: str) -> str | None:
+    """
+    Return the first balanced top-level JSON object in text, or None if the
+    text has no '{' at all. Braces inside JSON strings are ignored, so prose
+    or markdown fences around the object do not matter.
+    Raises SpecError(kind="truncated") if an object opens but never closes.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    depth     = 0
+    in_string = False
+    escaped   = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    raise SpecError("truncated", "JSON object never closed (response truncated?)", retryable=True)
+
+
+def validate_spec(spec: object) -> dict:
+    """Check a decoded object against FACT_IMAGE_SPEC_SCHEMA and return it."""
+    if not isinstance(spec, dict):
+        raise SpecError("schema", f"expected object, got {type(spec).__name__}", retryable=True)
+    for field, ftype in FACT_IMAGE_SPEC_SCHEMA.items():
+        value = spec.get(field)
+        if not isinstance(value, ftype):
+            raise SpecError("schema", f"field '{field}' missing or not {ftype.__name__}", retryable=True)
+        if isinstance(value, str) and not value.strip():
+            raise SpecError("schema", f"field '{field}' is empty", retryable=True)
+    return spec
+
+
+def parse_fact_image_spec(text: str) -> dict:
+    """Extract, decode and validate a FactImageSpec from raw model text."""
+    raw = extract_json_object(text)
+    if raw is None:
+        raise SpecError("no_json", "no JSON object in response", retryable=True)
+    try:
+        spec = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise SpecError("invalid_json", f"invalid JSON: {exc}", retryable=True) from exc
+    return validate_spec(spec)
+
+
+class ParseStats:
+    """Running counts of Claude calls and parse failures by kind."""
+
+    def __init__(self):
+        self.calls    = 0
+        self.failures = {}
+
+    def record(self, error: SpecError | None) -> None:
+        self.calls += 1
+        if error is not None:
+            self.failures[error.kind] = self.failures.get(error.kind, 0) + 1
+
+    @property
+    def parse_failures(self) -> int:
+        """Failures caused by the response body rather than the transport."""
+        return sum(n for kind, n in self.failures.items() if kind not in ("http", "network"))
+
+    @property
+    def parse_failure_rate(self) -> float:
+        return self.parse_failures / self.calls if self.calls else 0.0
+
+    def summary(self) -> str:
+        kinds = ", ".join(f"{k}={n}" for k, n in sorted(self.failures.items())) or "none"
+        return (f"{self.calls} calls, parse-failure rate {self.parse_failure_rate:.1%} "
+                f"(failures: {kinds})")
+
 # ── Claude API call ────────────────────────────────────────────────────────────
 
-def call_claude(fact: dict, api_key: str) -> dict | None:
-    """Call Claude API and return parsed FactImageSpec, or None on failure."""
+def call_claude(fact: dict, api_key: str) -> dict:
+    """Call Claude API and return a validated FactImageSpec. Raises SpecError on failure."""
+    import http.client
+    import urllib.error
     import urllib.request
 
     user_msg = USER_TEMPLATE.format(
@@ -81,16 +193,41 @@ def call_claude(fact: dict, api_key: str) -> dict | None:
     try:
         resp = urllib.request.urlopen(req, timeout=30)
         body = json.loads(resp.read())
-        text = body["content"][0]["text"].strip()
-        # Strip markdown fences if model adds them despite instructions
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        return json.loads(text)
-    except Exception as exc:
-        print(f"    Claude API error: {exc}")
-        return None
+    except urllib.error.HTTPError as exc:
+        # 429 and 5xx are transient; other 4xx (auth, bad request) will not fix themselves
+        retryable = exc.code == 429 or exc.code >= 500
+        raise SpecError("http", f"HTTP {exc.code}", retryable=retryable) from exc
+    except (OSError, http.client.HTTPException, json.JSONDecodeError) as exc:
+        # URLError, timeouts, connection resets, RemoteDisconnected, IncompleteRead
+        raise SpecError("network", f"{type(exc).__name__}: {exc}", retryable=True) from exc
+
+    content = body.get("content") if isinstance(body, dict) else None
+    if not isinstance(content, list) or not all(isinstance(block, dict) for block in content):
+        raise SpecError("response", f"unexpected response body: {str(body)[:200]}", retryable=True)
+    text = "".join(block.get("text") or "" for block in content)
+    try:
+        return parse_fact_image_spec(text)
+    except SpecError as exc:
+        if body.get("stop_reason") == "max_tokens":
+            raise SpecError("truncated", f"hit max_tokens={MAX_TOKENS}: {exc}", retryable=False) from exc
+        raise
+
+
+def request_spec(fact: dict, api_key: str, stats: ParseStats) -> dict | None:
+    """Call Claude up to MAX_ATTEMPTS times, retrying only retryable failures."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            spec = call_claude(fact, api_key)
+        except SpecError as exc:
+            stats.record(exc)
+            print(f"    Claude {exc.kind} error (attempt {attempt}/{MAX_ATTEMPTS}): {exc}")
+            if not exc.retryable:
+                return None
+            time.sleep(RATE_LIMIT_S * attempt)
+            continue
+        stats.record(None)
+        return spec
+    return None
 
 # ── Main ───────────────────────────────────────────────────────────────────────
 
@@ -102,6 +239,9 @@ def main() -> None:
                         help="Print prompts but do not write to DB or call Claude")
     parser.add_argument("--db", default=str(FACTS_DB),
                         help="Path to facts.db")
+    parser.add_argument("--max-parse-failure-rate", type=float, default=0.5,
+                        help="Abort once this fraction of Claude calls fail to parse "
+                             "(checked after 10 calls, default: 0.5)")
     args = parser.parse_args()
 
     api_key = os.environ.get("ANTHROPIC_API_KEY", "")
@@ -134,6 +274,7 @@ def main() -> None:
 
     ok = 0
     fail = 0
+    stats = ParseStats()
 
     for i, row in enumerate(rows, start=1):
         fact = dict(row)
@@ -144,10 +285,13 @@ def main() -> None:
             ok += 1
             continue
 
-        spec = call_claude(fact, api_key)
-        if spec is None or "visual_description" not in spec or "image_prompt" not in spec:
-            print(f"    FAIL: invalid spec returned")
+        spec = request_spec(fact, api_key, stats)
+        if spec is None:
+            print(f"    FAIL: no valid spec returned")
             fail += 1
+            if stats.calls >= 10 and stats.parse_failure_rate > args.max_parse_failure_rate:
+                print(f"\n  ABORT: {stats.summary()}")
+                break
             continue
 
         # Basic validation: image_prompt must start with "pixel art"
@@ -172,6 +316,8 @@ def main() -> None:
 
     print(f"\n{'='*60}")
     print(f"  Done: {ok} OK, {fail} failed out of {total} facts.")
+    if stats.calls:
+        print(f"  Claude: {stats.summary()}")
     if fail:
         sys.exit(1)
 
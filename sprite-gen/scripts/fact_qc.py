@@ -8,7 +8,8 @@ Gate 2: Transparency check — >= 20% of pixels must be non-transparent (alpha >
 Gate 3: Perceptual hash deduplication — reject if pHash distance < 12 vs any approved sprite.
 
 Sprites passing all gates: pixel_art_status -> 'approved'
-Sprites failing any gate:  pixel_art_status -> 'queued'  (re-queue for regeneration)
+Sprites failing any gate:  pixel_art_status -> 'queued'  (re-queue for regeneration;
+                           pixel_art_seed_variant is bumped so the next seed differs)
 
 Usage:
     python fact_qc.py [--batch 500] [--db path/to/facts.db]
@@ -120,6 +121,8 @@ def main() -> None:
     conn = sqlite3.connect(args.db)
     conn.row_factory = sqlite3.Row
     cur  = conn.cursor()
+    columns = {r[1] for r in cur.execute("PRAGMA table_info(facts)").fetchall()}
+    has_seed_variant = "pixel_art_seed_variant" in columns
 
     # Pre-load pHashes of all currently approved sprites
     approved_ids = [r["id"] for r in cur.execute(
@@ -184,6 +187,12 @@ def main() -> None:
                    updated_at       = (unixepoch() * 1000)
             WHERE  id = ?
         """, (new_status, 1 if new_status == "approved" else 0, fid))
+        if new_status == "queued" and has_seed_variant:
+            cur.execute("""
+                UPDATE facts
+                SET    pixel_art_seed_variant = pixel_art_seed_variant + 1
+                WHERE  id = ?
+            """, (fid,))
 
     conn.commit()
     conn.close()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Fact Art Scheduler
+Chooses which queued facts fact_batch_generate.py spends GPU time on.
+
+Within a category, facts are ordered by a priority score:
+    fun_score + AGING_PER_DAY * days_waiting - FAILURE_PENALTY * retries
+so long-waiting facts rise and facts that keep failing sink.
+
+Across categories (category_l1), picks use weighted fair queuing: each
+category has a virtual clock that advances by 1/weight per pick, and the
+category with the lowest clock goes next. Low-scoring categories therefore
+still get their share instead of starving behind the top fun_scores.
+
+An optional deck list (fact IDs for a release) can reserve a fraction of the
+run's limit; the remainder is filled from the whole queue.
+"""
+
+import heapq
+import json
+import time
+from pathlib import Path
+
+AGING_PER_DAY   = 0.25   # priority gained per day spent queued
+FAILURE_PENALTY = 2.0    # priority lost per recorded generation failure
+DEFAULT_WEIGHT  = 1.0
+
+
+def priority(fact: dict, retries: int, now_ms: int) -> float:
+    """Priority score for one fact (higher = generate sooner)."""
+    waited_days = max(0, now_ms - (fact.get("updated_at") or now_ms)) / 86_400_000
+    return (fact.get("fun_score") or 0) + AGING_PER_DAY * waited_days - FAILURE_PENALTY * retries
+
+
+def fair_pick(facts: list[dict], n: int, retry_counts: dict[str, int],
+              weights: dict[str, float] | None = None, now_ms: int | None = None) -> list[dict]:
+    """Pick up to n facts by weighted fair queuing across category_l1."""
+    if n <= 0 or not facts:
+        return []
+    weights = weights or {}
+    now_ms  = now_ms if now_ms is not None else int(time.time() * 1000)
+
+    # Per-category max-heaps of (-priority, id, fact); id breaks ties deterministically
+    queues: dict[str, list] = {}
+    for fact in facts:
+        cat   = fact.get("category_l1") or "General"
+        score = priority(fact, retry_counts.get(fact["id"], 0), now_ms)
+        queues.setdefault(cat, []).append((-score, fact["id"], fact))
+    for q in queues.values():
+        heapq.heapify(q)
+
+    clock = [(0.0, cat) for cat in sorted(queues)]
+    heapq.heapify(clock)
+
+    picked: list[dict] = []
+    while clock and len(picked) < n:
+        vtime, cat = heapq.heappop(clock)
+        _, _, fact = heapq.heappop(queues[cat])
+        picked.append(fact)
+        if queues[cat]:
+            weight = weights.get(cat, DEFAULT_WEIGHT)
+            heapq.heappush(clock, (vtime + 1.0 / weight, cat))
+    return picked
+
+
+def schedule(facts: list[dict], limit: int, retry_counts: dict[str, int],
+             weights: dict[str, float] | None = None,
+             deck_ids: set[str] | None = None, deck_quota: float = 0.0,
+             now_ms: int | None = None) -> list[dict]:
+    """
+    Order up to limit facts for this run.
+    If deck_ids is given, up to round(limit * deck_quota) slots (at least one,
+    at most limit) go to deck facts first; the rest are filled fairly from
+    everything not yet picked.
+    """
+    picked: list[dict] = []
+    if deck_ids and deck_quota > 0:
+        deck_facts = [f for f in facts if f["id"] in deck_ids]
+        slots = min(limit, max(1, round(limit * deck_quota)))
+        picked = fair_pick(deck_facts, slots, retry_counts, weights, now_ms)
+
+    taken = {f["id"] for f in picked}
+    rest  = [f for f in facts if f["id"] not in taken]
+    return picked + fair_pick(rest, limit - len(picked), retry_counts, weights, now_ms)
+
+
+def load_deck_ids(path: Path) -> set[str]:
+    """Read a deck list: a JSON array of fact IDs, or one ID per line."""
+    text = path.read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        return {str(x) for x in json.loads(text)}
+    return {line.strip() for line in text.splitlines() if line.strip() and not line.startswith("#")}
+
+
+def parse_deck_quota(text: str) -> float:
+    """argparse type for --deck-quota: a fraction of the limit in (0, 1]."""
+    quota = float(text)
+    if not 0 < quota <= 1:
+        raise ValueError(f"Deck quota must be in (0, 1], got {text!r}")
+    return quota
+
+
+def parse_weights(specs: list[str]) -> dict[str, float]:
+    """Parse repeated --category-weight CAT=W arguments."""
+    weights = {}
+    for spec in specs:
+        cat, _, w = spec.rpartition("=")
+        if not cat:
+            raise ValueError(f"Expected CATEGORY=WEIGHT, got {spec!r}")
+        weights[cat] = float(w)
+        if weights[cat] <= 0:
+            raise ValueError(f"Weight for {cat!r} must be positive")
+    return weights
@@ -2,8 +2,24 @@
 """
 Generate tile/block sprites for Terra Miner using ComfyUI SDXL pipeline.
 Tiles are full-bleed square textures with no transparency (no background removal).
+
+Blocks marked "seamless" in sprite-manifest.json (the tile_* textures) are
+made tileable on the raw 1024px output before downscaling (see tile_pipeline.py), and every block is
+then packed into one atlas per resolution (tiles/tiles_atlas.png + .json), so
+the renderer binds one texture for all tile types. Seamless tiles get
+wrapped-edge extrusion; every other frame is extruded by clamping.
+Blocks with an "autotile" mode also get their edge/corner variant set baked
+into the atlas as <name>_<index> frames (see autotile.py); the atlas meta maps
+each variant index to its neighbour mask.
+
+Usage:
+    python generate_blocks.py                      # generate, make seamless, pack atlases
+    python generate_blocks.py --seam heal          # offset-and-heal instead of edge-wrap blend
+    python generate_blocks.py --from-raw           # re-run post-processing on saved *_raw.png
+    python generate_blocks.py --from-raw --autotile blob47   # 47-variant blob sets instead of 16
 """
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -11,9 +27,6 @@ SCRIPT_DIR = Path(__file__).parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
 from generate_sprite import (
-    queue_prompt,
-    wait_for_completion,
-    download_image,
     build_sdxl_workflow,
     downscale,
     OUTPUT_DIR,
@@ -21,59 +34,22 @@ from generate_sprite import (
     HIRES_DIR,
     COMFYUI_URL,
 )
+from sprite_manifest import load_manifest
+from sprite_pipeline import Pipeline, block_stages
+from autotile import AUTOTILE_MODES, autotile_variants, variant_masks
+from tile_pipeline import EXTRUDE, SEAM_METHODS, make_seamless, pack_tile_atlas, seam_score
 from PIL import Image
-import io
-
-HIRES_SIZE = 256
-GAME_SIZE = 32
-
-BLOCKS = [
-    {
-        "name": "tile_dirt",
-        "prompt": "pixel art seamless dirt tile texture, earthy brown soil, small pebbles and roots, top-down game tile",
-        "seed": 401,
-    },
-    {
-        "name": "tile_soft_rock",
-        "prompt": "pixel art seamless soft rock tile texture, crumbly grey-brown stone, layered sediment, top-down game tile",
-        "seed": 402,
-    },
-    {
-        "name": "tile_stone",
-        "prompt": "pixel art seamless stone tile texture, solid grey granite block, rough surface, top-down game tile",
-        "seed": 403,
-    },
-    {
-        "name": "tile_hard_rock",
-        "prompt": "pixel art seamless hard rock tile texture, dark grey granite with faint crystal veins, dense and impenetrable-looking, top-down game tile",
-        "seed": 404,
-    },
-    {
-        "name": "tile_unbreakable",
-        "prompt": "pixel art seamless unbreakable void rock tile, near-black obsidian with faint purple shimmer, impenetrable, top-down game tile",
-        "seed": 405,
-    },
-    {
-        "name": "block_oxygen_cache",
-        "prompt": "pixel art game tile, glowing blue oxygen tank canister embedded in rock, sci-fi, centered icon",
-        "seed": 501,
-    },
-    {
-        "name": "block_upgrade_crate",
-        "prompt": "pixel art game tile, golden treasure chest crate with glowing star, centered icon, reward",
-        "seed": 502,
-    },
-    {
-        "name": "block_quiz_gate",
-        "prompt": "pixel art game tile, ancient glowing golden gate seal with question mark rune, mystical, centered icon",
-        "seed": 503,
-    },
-    {
-        "name": "block_exit_ladder",
-        "prompt": "pixel art game tile, wooden ladder going upward through rock ceiling, exit portal glow, centered icon",
-        "seed": 504,
-    },
-]
+
+ATLAS_NAME = "tiles_atlas"
+
+
+def tile_blocks(entries):
+    """The full-bleed tiles of a manifest: tile entries built without background removal."""
+    return [e for e in entries if e["category"] == "tiles" and not e["rembg"]]
+
+
+# Block definitions live in sprite-gen/sprite-manifest.json (see sprite_manifest.py)
+BLOCKS = tile_blocks(load_manifest())
 
 
 def ensure_output_dirs():
@@ -83,75 +59,152 @@ def ensure_output_dirs():
     (SPRITES_DIR / "tiles").mkdir(parents=True, exist_ok=True)
 
 
-def generate_block(block, index, total):
-    """Generate a single block sprite."""
+def block_sizes(block):
+    """(edge length, files) for the hi-res and game outputs; sizes come from the manifest entry."""
+    name = block["name"]
+    hires, game = block["hires_size"], block["game_size"]
+    return [(hires, [OUTPUT_DIR / f"{name}_{hires}.png", HIRES_DIR / "tiles" / f"{name}.png"]),
+            (game,  [OUTPUT_DIR / f"{name}_{game}.png", SPRITES_DIR / "tiles" / f"{name}.png"])]
+
+
+def seam_method_for(block, override=None):
+    """Seam method for a block: the --seam override, else its manifest "seamless" value."""
+    if not block.get("seamless") or override == "none":
+        return None
+    return override or block["seamless"]
+
+
+def postprocess_block(block, img, seam_method=None):
+    """Make a raw block tileable (if marked seamless), downscale and save both sizes."""
+    game_size = block["game_size"]
+    seam_method = seam_method_for(block, seam_method)
+    if seam_method:
+        # Scored at game size: that is the texture the renderer actually repeats
+        before = seam_score(downscale(img, game_size))
+        img = make_seamless(img, seam_method)
+        print(f"seam {before:.2f} -> {seam_score(downscale(img, game_size)):.2f}", end=" ")
+
+    # Downscale to each manifest size (convert to RGBA for downscale)
+    img_rgba = img.convert("RGBA")
+    for size, paths in block_sizes(block):
+        resized = downscale(img_rgba, size)
+        for path in paths:
+            resized.save(path, "PNG")
+
+
+def generate_block(block, index, total, seam_method=None):
+    """Generate a single block sprite (cached stages, see sprite_pipeline.py)."""
     name = block["name"]
     prompt = block["prompt"]
     seed = block["seed"]
 
     try:
-        print(f"[{index}/{total}] Generating {name}...", end=" ", flush=True)
-
-        # Build and queue workflow
-        workflow = build_sdxl_workflow(prompt, seed)
-        prompt_id = queue_prompt(workflow)
-
-        # Wait for completion
-        result = wait_for_completion(prompt_id, timeout=300)
-
-        # Extract filename/subfolder from history and download
-        img_bytes = None
-        for node_output in result.get("outputs", {}).values():
-            if "images" in node_output:
-                img_info = node_output["images"][0]
-                img_bytes = download_image(img_info["filename"], img_info.get("subfolder", ""))
-                break
-        if img_bytes is None:
-            raise RuntimeError("No image returned from ComfyUI")
-
-        # Load as PIL Image (RGB, no background removal)
-        img = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-
-        # Save raw
-        raw_path = OUTPUT_DIR / f"{name}_raw.png"
-        img.save(raw_path, "PNG")
-
-        # Downscale to 256x256 (convert to RGBA for downscale)
-        img_rgba = img.convert("RGBA")
-        hires_img = downscale(img_rgba, HIRES_SIZE)
-        hires_path_output = OUTPUT_DIR / f"{name}_256.png"
-        hires_path_sprite = HIRES_DIR / "tiles" / f"{name}.png"
-        hires_img.save(hires_path_output, "PNG")
-        hires_img.save(hires_path_sprite, "PNG")
-
-        # Downscale to 32x32
-        game_img = downscale(img_rgba, GAME_SIZE)
-        game_path_output = OUTPUT_DIR / f"{name}_32.png"
-        game_path_sprite = SPRITES_DIR / "tiles" / f"{name}.png"
-        game_img.save(game_path_output, "PNG")
-        game_img.save(game_path_sprite, "PNG")
-
-        print("OK")
+        print(f"[{index}/{total}] Generating {name}...", flush=True)
+
+        seam_method = seam_method_for(block, seam_method)
+        game_path = SPRITES_DIR / "tiles" / f"{name}.png"
+        stages = block_stages(
+            build_sdxl_workflow(prompt, seed),
+            # Raw is saved before seam processing, so --from-raw can redo it
+            OUTPUT_DIR / f"{name}_raw.png",
+            block_sizes(block),
+            seamless=make_seamless if seam_method else None,
+            seam_params={"method": seam_method},
+        )
+        Pipeline(stages).run()
+
+        if seam_method:
+            print(f"  seam score {seam_score(Image.open(game_path)):.2f}")
+        print("  OK")
         return True
     except Exception as e:
-        print(f"FAILED: {e}")
+        print(f"  FAILED: {e}")
         return False
 
 
+def reprocess_block(block, index, total, seam_method=None):
+    """Re-run post-processing on a previously saved raw image (no ComfyUI)."""
+    name = block["name"]
+    raw_path = OUTPUT_DIR / f"{name}_raw.png"
+    print(f"[{index}/{total}] Reprocessing {name}...", end=" ", flush=True)
+    if not raw_path.exists():
+        print(f"SKIPPED: {raw_path.name} not found")
+        return False
+    postprocess_block(block, Image.open(raw_path).convert("RGB"), seam_method)
+    print("OK")
+    return True
+
+
+def pack_atlases(extrude=EXTRUDE, autotile_mode=None, seam_method=None, blocks=None):
+    """
+    Pack every block that exists on disk, plus the autotile variants of blocks
+    that have an "autotile" mode, into one atlas per resolution.
+    blocks are the manifest's tile entries (default BLOCKS, from the default manifest).
+    autotile_mode overrides the mode of blocks that have one ("none" disables variants).
+    Only tiles made seamless (seam_method_for, with the --seam override) are
+    wrap-extruded; every other frame is clamped, so its gutters do not pick up
+    the opposite edge.
+    """
+    for root in (SPRITES_DIR, HIRES_DIR):
+        tiles_dir = root / "tiles"
+        tiles, clamp, autotile_meta = {}, set(), {}
+        for block in BLOCKS if blocks is None else blocks:
+            path = tiles_dir / f"{block['name']}.png"
+            if not path.exists():
+                continue
+            base = Image.open(path).convert("RGBA")
+            tiles[block["name"]] = base
+            if not seam_method_for(block, seam_method):
+                clamp.add(block["name"])
+
+            mode = block.get("autotile") and (autotile_mode or block["autotile"])
+            if not mode or mode == "none":
+                continue
+            for index, (_, variant) in enumerate(autotile_variants(base, mode)):
+                frame = f"{block['name']}_{index:02d}"
+                tiles[frame] = variant
+                clamp.add(frame)
+            autotile_meta[block["name"]] = {"mode": mode, "masks": variant_masks(mode)}
+
+        if not tiles:
+            print(f"SKIP atlas in {tiles_dir}: no tiles found")
+            continue
+        json_path = pack_tile_atlas(tiles, tiles_dir / f"{ATLAS_NAME}.png", extrude=extrude,
+                                    clamp=clamp, extra_meta={"autotile": autotile_meta})
+        print(f"Atlas: {json_path} ({len(tiles)} frames, {len(tiles) - len(clamp)} wrap-extruded, "
+              f"{len(clamp)} clamped)")
+
+
 def main():
     """Generate all block sprites."""
+    parser = argparse.ArgumentParser(description="Generate Terra Miner block/tile sprites")
+    parser.add_argument("--seam", choices=[*SEAM_METHODS, "none"],
+                        help="Seamless method for seamless blocks (default: each block's manifest setting)")
+    parser.add_argument("--from-raw", action="store_true",
+                        help="Skip ComfyUI; re-run post-processing on saved *_raw.png files")
+    parser.add_argument("--extrude", type=int, default=EXTRUDE,
+                        help=f"Atlas edge extrusion in pixels (default {EXTRUDE})")
+    parser.add_argument("--no-atlas", action="store_true", help="Do not pack the tile atlases")
+    parser.add_argument("--autotile", choices=[*AUTOTILE_MODES, "none"],
+                        help="Variant set for autotiled blocks (default: each block's own setting)")
+    args = parser.parse_args()
+
     ensure_output_dirs()
 
     total = len(BLOCKS)
     successful = 0
     failed = 0
 
+    step = reprocess_block if args.from_raw else generate_block
     for index, block in enumerate(BLOCKS, 1):
-        if generate_block(block, index, total):
+        if step(block, index, total, args.seam):
             successful += 1
         else:
             failed += 1
 
+    if not args.no_atlas:
+        pack_atlases(args.extrude, args.autotile, args.seam)
+
     print(f"\n--- Summary ---")
     print(f"Total: {total}, Successful: {successful}, Failed: {failed}")
 
@@ -12,10 +12,15 @@ Usage:
     python generate_sprite.py --prompt "pixel art miner" --name miner_idle --category characters --size 64
     python generate_sprite.py --prompt "pixel art crystal" --name crystal_green --category items --size 32
     python generate_sprite.py --prompt "pixel art dirt tile" --name dirt --category tiles --size 32
+
+Every step is a cached stage (sprite_pipeline.py): re-running with only a new
+--size or --hires reuses the cached background-removed square.
 """
 
 import argparse
+import hashlib
 import json
+import os
 import urllib.request
 import urllib.parse
 import time
@@ -24,12 +29,13 @@ from pathlib import Path
 from PIL import Image
 from rembg import remove
 
-COMFYUI_URL = "http://localhost:8188"
+COMFYUI_URL = os.environ.get("COMFYUI_URL", "http://localhost:8188")
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent.parent
 OUTPUT_DIR = SCRIPT_DIR.parent / "output"
 SPRITES_DIR = PROJECT_DIR / "src" / "assets" / "sprites"
 HIRES_DIR = PROJECT_DIR / "src" / "assets" / "sprites-hires"
+CACHE_DIR = OUTPUT_DIR / "cache"
 
 VALID_CATEGORIES = ["characters", "items", "tiles", "ui"]
 
@@ -42,22 +48,22 @@ NEGATIVE_PROMPT = (
 )
 
 
-def queue_prompt(workflow: dict) -> str:
+def queue_prompt(workflow: dict, base_url: str = COMFYUI_URL) -> str:
     """Submit a workflow to ComfyUI and return the prompt_id."""
     data = json.dumps({"prompt": workflow}).encode("utf-8")
     req = urllib.request.Request(
-        f"{COMFYUI_URL}/prompt",
+        f"{base_url}/prompt",
         data=data,
         headers={"Content-Type": "application/json"},
     )
-    return json.loads(urllib.request.urlopen(req).read())["prompt_id"]
+    return json.loads(urllib.request.urlopen(req, timeout=30).read())["prompt_id"]
 
 
-def wait_for_completion(prompt_id: str, timeout: int = 300) -> dict:
+def wait_for_completion(prompt_id: str, timeout: int = 300, base_url: str = COMFYUI_URL) -> dict:
     """Poll until prompt completes."""
     start = time.time()
     while time.time() - start < timeout:
-        resp = urllib.request.urlopen(f"{COMFYUI_URL}/history/{prompt_id}")
+        resp = urllib.request.urlopen(f"{base_url}/history/{prompt_id}", timeout=30)
         history = json.loads(resp.read())
         if prompt_id in history:
             return history[prompt_id]
@@ -65,12 +71,49 @@ def wait_for_completion(prompt_id: str, timeout: int = 300) -> dict:
     raise TimeoutError(f"Prompt {prompt_id} timed out after {timeout}s")
 
 
-def download_image(filename: str, subfolder: str) -> bytes:
+def download_image(filename: str, subfolder: str, base_url: str = COMFYUI_URL) -> bytes:
     """Download generated image bytes from ComfyUI."""
     params = urllib.parse.urlencode({
         "filename": filename, "subfolder": subfolder, "type": "output"
     })
-    return urllib.request.urlopen(f"{COMFYUI_URL}/view?{params}").read()
+    return urllib.request.urlopen(f"{base_url}/view?{params}", timeout=60).read()
+
+
+def workflow_key(workflow: dict) -> str:
+    """Content address of a workflow: sha256 of its canonical JSON (prompt, seed, params)."""
+    canonical = json.dumps(workflow, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def generate_image(workflow: dict, timeout: int = 300,
+                   cache_dir: Path | None = CACHE_DIR,
+                   base_url: str = COMFYUI_URL) -> tuple[bytes | None, bool]:
+    """
+    Return (raw image bytes, from_cache) for a workflow.
+    Identical workflows (same prompt, seed and sampler settings) are served from
+    cache_dir/<workflow_key>.png instead of being re-run on the GPU.
+    Pass cache_dir=None to always generate.
+    """
+    cache_path = cache_dir / f"{workflow_key(workflow)}.png" if cache_dir else None
+    if cache_path is not None and cache_path.exists():
+        return cache_path.read_bytes(), True
+
+    prompt_id = queue_prompt(workflow, base_url)
+    result = wait_for_completion(prompt_id, timeout=timeout, base_url=base_url)
+
+    img_bytes = None
+    for node_output in result.get("outputs", {}).values():
+        if "images" in node_output:
+            img_info = node_output["images"][0]
+            img_bytes = download_image(img_info["filename"], img_info.get("subfolder", ""), base_url)
+            break
+
+    if img_bytes is not None and cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(".tmp")
+        tmp.write_bytes(img_bytes)
+        tmp.replace(cache_path)
+    return img_bytes, False
 
 
 def build_sdxl_workflow(prompt: str, seed: int = 42) -> dict:
@@ -182,61 +225,28 @@ def main():
     print(f"  Hi-res: {args.hires}x{args.hires}  |  Game: {args.size}x{args.size}")
     print(f"{'=' * 60}")
 
-    # Step 1: Generate via ComfyUI
-    print("  [1/5] Generating with SDXL + pixel-art-xl LoRA...")
-    workflow = build_sdxl_workflow(args.prompt, seed=args.seed)
-    prompt_id = queue_prompt(workflow)
-    result = wait_for_completion(prompt_id, timeout=180)
+    # generate → rembg → trim → square → downscale, each stage cached by content
+    # key (see sprite_pipeline.py): changing only --size reuses the cached square
+    from sprite_pipeline import NoImageError, Pipeline, sprite_stages
 
-    # Get the image
-    img_bytes = None
-    for node_output in result.get("outputs", {}).values():
-        if "images" in node_output:
-            img_info = node_output["images"][0]
-            img_bytes = download_image(img_info["filename"], img_info.get("subfolder", ""))
-            break
+    hires_paths = [OUTPUT_DIR / f"{args.name}_{args.hires}.png"]
+    game_paths = [OUTPUT_DIR / f"{args.name}_{args.size}.png"]
+    if not args.no_copy:
+        hires_paths.append(hires_cat_dir / f"{args.name}.png")
+        game_paths.append(sprites_cat_dir / f"{args.name}.png")
 
-    if img_bytes is None:
+    workflow = build_sdxl_workflow(args.prompt, seed=args.seed)
+    stages = sprite_stages(workflow, OUTPUT_DIR / f"{args.name}_raw.png",
+                           [(args.hires, hires_paths), (args.size, game_paths)], timeout=180)
+    try:
+        Pipeline(stages).run()
+    except NoImageError:
         print("  ERROR: No image generated")
         return
 
-    # Save raw to output dir
-    raw_path = OUTPUT_DIR / f"{args.name}_raw.png"
-    raw_path.write_bytes(img_bytes)
-    print(f"  [1/5] Raw: {raw_path.name} ({len(img_bytes) // 1024} KB)")
-
-    # Step 2: Remove background
-    print("  [2/5] Removing background...")
-    rgba_img = remove_background(img_bytes)
-
-    # Step 3: Trim and square
-    print("  [3/5] Trimming and centering...")
-    trimmed = trim_transparent(rgba_img)
-    squared = make_square(trimmed)
-
-    # Step 4: High-res version (512x512)
-    print(f"  [4/5] Scaling to {args.hires}x{args.hires} (hi-res)...")
-    hires = downscale(squared, args.hires)
-    hires_out = OUTPUT_DIR / f"{args.name}_{args.hires}.png"
-    hires.save(hires_out)
-    print(f"         Saved: {hires_out.name}")
-
-    # Step 5: Game-ready version
-    print(f"  [5/5] Scaling to {args.size}x{args.size} (game-ready)...")
-    game_ready = downscale(squared, args.size)
-    game_out = OUTPUT_DIR / f"{args.name}_{args.size}.png"
-    game_ready.save(game_out)
-    print(f"         Saved: {game_out.name}")
-
-    # Copy to project assets
-    if not args.no_copy:
-        hires_asset = hires_cat_dir / f"{args.name}.png"
-        game_asset = sprites_cat_dir / f"{args.name}.png"
-        hires.save(hires_asset)
-        game_ready.save(game_asset)
-        print(f"\n  Assets written:")
-        print(f"    Hi-res:     src/assets/sprites-hires/{args.category}/{args.name}.png")
-        print(f"    Game-ready: src/assets/sprites/{args.category}/{args.name}.png")
+    print(f"\n  Written:")
+    for path in hires_paths + game_paths:
+        print(f"    {path.relative_to(PROJECT_DIR)}")
 
     print(f"\n{'=' * 60}")
     print(f"  Done! Working files in: sprite-gen/output/")
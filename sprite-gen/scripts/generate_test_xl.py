@@ -1,12 +1,34 @@
 #!/usr/bin/env python3
-"""Test SDXL + pixel-art-xl LoRA sprite generation."""
+"""
+Test SDXL + pixel-art-xl LoRA sprite generation.
 
+Exploration mode sweeps seeds × LoRA strength × CFG × steps for one test
+prompt and writes labelled contact sheets plus per-config timings, to find
+the cheapest steps/CFG that still looks right:
+
+    python generate_test_xl.py --explore mineral_crystal \
+        --seeds 42,43,44 --lora 0.7,0.9 --cfg 4,5.5,7 --steps 12,20,30
+
+Jobs are queued on ComfyUI up to --batch at a time, so the GPU never idles
+between configs. Timings come from ComfyUI's execution_start/execution_success
+timestamps. The first job of each run also pays for loading the model, so it
+is marked as warmup and left out of the averages. Re-running with the same
+prompt keeps finished images and only queues new grid points. A network error
+on one grid point is reported and skipped; the rest of the grid still runs.
+"""
+
+import argparse
+import http.client
+import itertools
 import json
 import urllib.request
 import urllib.parse
 import time
+from collections import deque
 from pathlib import Path
 
+from PIL import Image, ImageDraw, ImageFont
+
 COMFYUI_URL = "http://localhost:8188"
 OUTPUT_DIR = Path(__file__).parent.parent / "output"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -39,7 +61,8 @@ def download_image(filename: str, subfolder: str, output_path: Path):
     print(f"  Saved: {output_path.name} ({output_path.stat().st_size / 1024:.1f} KB)")
 
 
-def build_sdxl_lora_workflow(prompt: str, negative: str, seed: int = 42) -> dict:
+def build_sdxl_lora_workflow(prompt: str, negative: str, seed: int = 42,
+                             lora_strength: float = 0.9, cfg: float = 7.0, steps: int = 30) -> dict:
     """SDXL + pixel-art-xl LoRA workflow at 1024x1024."""
     return {
         "1": {
@@ -52,8 +75,8 @@ def build_sdxl_lora_workflow(prompt: str, negative: str, seed: int = 42) -> dict
                 "model": ["1", 0],
                 "clip": ["1", 1],
                 "lora_name": "pixel-art-xl.safetensors",
-                "strength_model": 0.9,
-                "strength_clip": 0.9
+                "strength_model": lora_strength,
+                "strength_clip": lora_strength
             }
         },
         "3": {
@@ -76,8 +99,8 @@ def build_sdxl_lora_workflow(prompt: str, negative: str, seed: int = 42) -> dict
                 "negative": ["4", 0],
                 "latent_image": ["5", 0],
                 "seed": seed,
-                "steps": 30,
-                "cfg": 7.0,
+                "steps": steps,
+                "cfg": cfg,
                 "sampler_name": "euler_ancestral",
                 "scheduler": "normal",
                 "denoise": 1.0
@@ -94,23 +117,198 @@ def build_sdxl_lora_workflow(prompt: str, negative: str, seed: int = 42) -> dict
     }
 
 
+PROMPTS = {
+    "miner_character": "pixel art, game sprite, miner character with pickaxe and hard hat, side view, full body, transparent background, centered, retro game style, 16-bit",
+    "mineral_crystal": "pixel art, game item icon, glowing crystal mineral, transparent background, centered, simple, retro game style",
+    "relic_artifact":  "pixel art, game item icon, ancient relic artifact, golden, mysterious, transparent background, centered, retro game style",
+}
+NEGATIVE = "3d render, realistic, photograph, blurry, watermark, text, signature, low quality, deformed, complex background"
+
+EXPLORE_DIR = OUTPUT_DIR / "explore"
+THUMB_SIZE  = 192
+LABEL_W     = 170
+HEADER_H    = 22
+
+
+# ── Exploration grid ──────────────────────────────────────────────────────────
+
+def config_name(seed: int, lora: float, cfg: float, steps: int) -> str:
+    return f"s{seed}_l{lora:g}_c{cfg:g}_n{steps}"
+
+
+def execution_seconds(result: dict) -> float | None:
+    """Sampling time of a finished job from ComfyUI's status message timestamps (ms)."""
+    stamps = {}
+    for msg in result.get("status", {}).get("messages", []):
+        if len(msg) == 2 and isinstance(msg[1], dict) and "timestamp" in msg[1]:
+            stamps[msg[0]] = msg[1]["timestamp"]
+    if "execution_start" in stamps and "execution_success" in stamps:
+        return (stamps["execution_success"] - stamps["execution_start"]) / 1000
+    return None
+
+
+def first_image(result: dict) -> dict | None:
+    for node_output in result.get("outputs", {}).values():
+        for img in node_output.get("images", []):
+            return img
+    return None
+
+
+def run_grid(name: str, configs: list[tuple], out_dir: Path, batch: int, timeout: int) -> dict:
+    """Queue every config not already on disk, keeping up to `batch` jobs queued. Returns timings."""
+    timings_path = out_dir / "timings.json"
+    timings = json.loads(timings_path.read_text()) if timings_path.exists() else {}
+    todo = deque(c for c in configs if not (out_dir / f"{config_name(*c)}.png").exists())
+    print(f"{name}: {len(configs)} configs, {len(configs) - len(todo)} already done, {len(todo)} to queue")
+
+    in_flight: deque[tuple[tuple, str, float]] = deque()
+    # The first job of this run loads the model, even when timings.json already has entries
+    warmup = True
+    while todo or in_flight:
+        while todo and len(in_flight) < batch:
+            config = todo.popleft()
+            seed, lora, cfg, steps = config
+            workflow = build_sdxl_lora_workflow(PROMPTS[name], NEGATIVE, seed, lora, cfg, steps)
+            try:
+                in_flight.append((config, queue_prompt(workflow), time.time()))
+            except (OSError, http.client.HTTPException) as e:
+                print(f"  {config_name(*config)}: ERROR queueing: {type(e).__name__}: {e}")
+        if not in_flight:
+            continue
+
+        # ComfyUI runs its queue in order, so the oldest job finishes first
+        config, prompt_id, queued_at = in_flight.popleft()
+        key = config_name(*config)
+        first, warmup = warmup, False
+        try:
+            result = wait_for_completion(prompt_id, timeout=timeout * (len(in_flight) + 1))
+            img = first_image(result)
+            if img is None:
+                print(f"  {key}: ERROR no image returned")
+                continue
+            download_image(img["filename"], img.get("subfolder", ""), out_dir / f"{key}.png")
+        except (OSError, http.client.HTTPException) as e:  # TimeoutError, URLError, resets
+            print(f"  {key}: ERROR {type(e).__name__}: {e}")
+            continue
+        seconds = execution_seconds(result)
+        seed, lora, cfg, steps = config
+        timings[key] = {"seed": seed, "lora": lora, "cfg": cfg, "steps": steps,
+                        "seconds": seconds, "warmup": first}
+        print(f"  {key}: {seconds:.1f}s" if seconds is not None else f"  {key}: (no timing)")
+        timings_path.write_text(json.dumps(timings, indent=2))
+    return timings
+
+
+def _font(size: int):
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def contact_sheet(out_dir: Path, title: str, seeds: list[int], rows: list[tuple[float, int]],
+                  lora: float, timings: dict) -> Path | None:
+    """One sheet per LoRA strength: a row per (cfg, steps), a column per seed."""
+    font = _font(13)
+    sheet = Image.new("RGB", (LABEL_W + len(seeds) * THUMB_SIZE,
+                              2 * HEADER_H + len(rows) * THUMB_SIZE), (32, 32, 36))
+    draw = ImageDraw.Draw(sheet)
+    draw.text((8, 4), f"{title} - LoRA {lora:g}", fill=(255, 255, 255), font=font)
+    for col, seed in enumerate(seeds):
+        draw.text((LABEL_W + col * THUMB_SIZE + 8, HEADER_H + 4), f"seed {seed}", fill=(200, 200, 200), font=font)
+
+    placed = 0
+    for row, (cfg, steps) in enumerate(rows):
+        y = 2 * HEADER_H + row * THUMB_SIZE
+        times = []
+        for col, seed in enumerate(seeds):
+            key = config_name(seed, lora, cfg, steps)
+            path = out_dir / f"{key}.png"
+            if not path.exists():
+                continue
+            thumb = Image.open(path).convert("RGB").resize((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+            sheet.paste(thumb, (LABEL_W + col * THUMB_SIZE, y))
+            placed += 1
+            t = timings.get(key, {})
+            if t.get("seconds") is not None and not t.get("warmup"):
+                times.append(t["seconds"])
+        label = f"steps {steps}\ncfg {cfg:g}"
+        if times:
+            label += f"\n{sum(times) / len(times):.1f}s avg"
+        draw.multiline_text((8, y + 8), label, fill=(255, 255, 255), font=font, spacing=4)
+    if not placed:
+        return None
+    path = out_dir / f"contact_l{lora:g}.png"
+    sheet.save(path, "PNG")
+    return path
+
+
+def summarize(timings: dict) -> list[dict]:
+    """Mean seconds per (lora, cfg, steps) across seeds, cheapest first (warmup excluded)."""
+    groups: dict[tuple, list[float]] = {}
+    for t in timings.values():
+        if t.get("seconds") is not None and not t.get("warmup"):
+            groups.setdefault((t["lora"], t["cfg"], t["steps"]), []).append(t["seconds"])
+    rows = [{"lora": lora, "cfg": cfg, "steps": steps, "mean_seconds": round(sum(v) / len(v), 2), "n": len(v)}
+            for (lora, cfg, steps), v in groups.items()]
+    return sorted(rows, key=lambda r: (r["mean_seconds"], r["steps"]))
+
+
+def _floats(text: str) -> list[float]:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+
+def _ints(text: str) -> list[int]:
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def explore(args) -> None:
+    out_dir = EXPLORE_DIR / args.explore
+    out_dir.mkdir(parents=True, exist_ok=True)
+    configs = list(itertools.product(args.seeds, args.lora, args.cfg, args.steps))
+    print("SDXL + pixel-art-xl LoRA exploration grid")
+    print("=" * 50)
+
+    timings = run_grid(args.explore, configs, out_dir, args.batch, args.timeout)
+
+    rows = list(itertools.product(args.cfg, args.steps))
+    for lora in args.lora:
+        path = contact_sheet(out_dir, args.explore, args.seeds, rows, lora, timings)
+        if path:
+            print(f"  Contact sheet: {path.name}")
+
+    summary = summarize(timings)
+    (out_dir / "summary.json").write_text(json.dumps(summary, indent=2))
+    print("\nMean time per config (cheapest first):")
+    for r in summary:
+        print(f"  steps {r['steps']:>3}  cfg {r['cfg']:>4g}  lora {r['lora']:>4g}  {r['mean_seconds']:>6.1f}s  (n={r['n']})")
+    print(f"\nAll outputs in: {out_dir}")
+
+
+# ── Single test run ───────────────────────────────────────────────────────────
+
 def main():
+    parser = argparse.ArgumentParser(description="SDXL + pixel-art-xl LoRA test generation")
+    parser.add_argument("--explore", choices=sorted(PROMPTS), metavar="PROMPT",
+                        help=f"Sweep a config grid for one test prompt ({', '.join(PROMPTS)})")
+    parser.add_argument("--seeds", type=_ints, default=[42, 43, 44])
+    parser.add_argument("--lora", type=_floats, default=[0.9], help="LoRA strengths, comma-separated")
+    parser.add_argument("--cfg", type=_floats, default=[5.0, 7.0])
+    parser.add_argument("--steps", type=_ints, default=[12, 20, 30])
+    parser.add_argument("--batch", type=int, default=4, help="Jobs kept queued on ComfyUI at once")
+    parser.add_argument("--timeout", type=int, default=180, help="Seconds allowed per job")
+    args = parser.parse_args()
+
+    if args.explore:
+        explore(args)
+        return
+
     print("SDXL + pixel-art-xl LoRA Test")
     print("=" * 50)
 
-    prompts = [
-        ("pixel art, game sprite, miner character with pickaxe and hard hat, side view, full body, transparent background, centered, retro game style, 16-bit",
-         "miner_character"),
-        ("pixel art, game item icon, glowing crystal mineral, transparent background, centered, simple, retro game style",
-         "mineral_crystal"),
-        ("pixel art, game item icon, ancient relic artifact, golden, mysterious, transparent background, centered, retro game style",
-         "relic_artifact"),
-    ]
-    negative = "3d render, realistic, photograph, blurry, watermark, text, signature, low quality, deformed, complex background"
-
-    for prompt, name in prompts:
+    for name, prompt in PROMPTS.items():
         print(f"\nGenerating: {name}...")
-        workflow = build_sdxl_lora_workflow(prompt, negative, seed=42)
+        workflow = build_sdxl_lora_workflow(prompt, NEGATIVE, seed=42)
         try:
             prompt_id = queue_prompt(workflow)
             print(f"  Queued: {prompt_id}")
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Sprite Manifest Runner
+Builds the ComfyUI sprites declared in sprite-gen/sprite-manifest.json and
+only the ones that are new or changed since the last build.
+
+Manifest entry (unset keys fall back to the manifest's "defaults"):
+    {
+      "name": "mineral_blue", "category": "items",
+      "prompt": "...", "seed": 201,
+      "game_size": 32, "hires_size": 256,
+      "rembg": true,                 # false for full-bleed tiles
+      "seamless": "blend",           # tiles only: "blend" | "heal"
+      "autotile": "bitmask16"        # tiles only: baked into tiles_atlas
+    }
+
+The last successful build of every entry is recorded as a hash of its
+resolved fields in sprite_manifest_state.json. An entry is rebuilt when its
+hash differs or one of its asset files is missing; entries that disappeared
+from the manifest are reported (their assets are left in place). Builds go
+through sprite_pipeline.py, so even a rebuilt entry only re-runs the stages
+its change touches, and are spread over ComfyUI endpoints by comfy_dispatch.py
+(one job per endpoint unless "URL,DEPTH" says otherwise).
+
+Usage:
+    python sprite_manifest.py                 # build added/changed entries
+    python sprite_manifest.py --dry-run       # list what would be built
+    python sprite_manifest.py --only tile_dirt --force
+    python sprite_manifest.py --comfyui http://gpu1:8188 --comfyui http://gpu2:8188,2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+MANIFEST_PATH = SCRIPT_DIR.parent / "sprite-manifest.json"
+STATE_PATH    = SCRIPT_DIR / "sprite_manifest_state.json"
+
+REQUIRED   = ("name", "category", "prompt", "seed", "game_size")
+BUILD_KEYS = ("category", "prompt", "seed", "game_size", "hires_size", "rembg", "seamless")
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+
+def load_manifest(path: Path = MANIFEST_PATH) -> list[dict]:
+    """Read the manifest and return its entries with defaults applied."""
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    defaults = {"hires_size": 256, "rembg": True, "seamless": None, "autotile": None,
+                **raw.get("defaults", {})}
+    entries, seen = [], set()
+    for i, item in enumerate(raw.get("sprites", [])):
+        entry = {**defaults, **item}
+        missing = [k for k in REQUIRED if entry.get(k) in (None, "")]
+        if missing:
+            raise ValueError(f"{path.name}: sprite #{i} ({item.get('name', '?')}) is missing {missing}")
+        if entry["name"] in seen:
+            raise ValueError(f"{path.name}: duplicate sprite name {entry['name']!r}")
+        if entry["seamless"] is True:
+            entry["seamless"] = "blend"
+        if entry["rembg"] and (entry["seamless"] or entry["autotile"]):
+            raise ValueError(f"{path.name}: {entry['name']}: seamless/autotile need rembg: false")
+        seen.add(entry["name"])
+        entries.append(entry)
+    return entries
+
+
+def entry_hash(entry: dict) -> str:
+    """Hash of the fields that change the generated assets (autotile only affects the atlas)."""
+    canonical = json.dumps({k: entry.get(k) for k in BUILD_KEYS}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def asset_paths(entry: dict) -> dict[str, Path]:
+    """Shipped asset files of an entry: {'hires': ..., 'game': ...}."""
+    from generate_sprite import HIRES_DIR, SPRITES_DIR
+    return {
+        "hires": HIRES_DIR / entry["category"] / f"{entry['name']}.png",
+        "game":  SPRITES_DIR / entry["category"] / f"{entry['name']}.png",
+    }
+
+
+def load_state(path: Path = STATE_PATH) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("built", {})
+    except (json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def save_state(built: dict[str, str], path: Path = STATE_PATH) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps({"built": dict(sorted(built.items()))}, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def diff(entries: list[dict], built: dict[str, str]) -> tuple[list[dict], list[dict], list[str]]:
+    """Split entries into (added, changed) against the built state; also return removed names."""
+    added, changed = [], []
+    for entry in entries:
+        previous = built.get(entry["name"])
+        if previous is None:
+            added.append(entry)
+        elif previous != entry_hash(entry) or not all(p.exists() for p in asset_paths(entry).values()):
+            changed.append(entry)
+    names = {e["name"] for e in entries}
+    return added, changed, sorted(n for n in built if n not in names)
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+def entry_stages(entry: dict, base_url: str | None = None) -> list:
+    """Pipeline stages for one manifest entry (sprite_pipeline.py)."""
+    from generate_sprite import OUTPUT_DIR, build_sdxl_workflow
+    from sprite_pipeline import block_stages, sprite_stages
+
+    name   = entry["name"]
+    assets = asset_paths(entry)
+    sizes  = [(entry["hires_size"], [OUTPUT_DIR / f"{name}_{entry['hires_size']}.png", assets["hires"]]),
+              (entry["game_size"],  [OUTPUT_DIR / f"{name}_{entry['game_size']}.png", assets["game"]])]
+    workflow = build_sdxl_workflow(entry["prompt"], entry["seed"])
+    raw_path = OUTPUT_DIR / f"{name}_raw.png"
+
+    if entry["rembg"]:
+        return sprite_stages(workflow, raw_path, sizes, base_url=base_url)
+    seamless = None
+    if entry["seamless"]:
+        from tile_pipeline import make_seamless
+        seamless = make_seamless
+    return block_stages(workflow, raw_path, sizes, seamless=seamless,
+                        seam_params={"method": entry["seamless"]}, base_url=base_url)
+
+
+def build_entry(entry: dict, base_url: str | None = None) -> bool:
+    """Build one entry. Transport errors propagate (the dispatcher re-leases)."""
+    from sprite_pipeline import NoImageError, Pipeline
+    try:
+        Pipeline(entry_stages(entry, base_url), log=lambda msg: print(f"{msg}  ({entry['name']})")).run()
+    except NoImageError:
+        print(f"  [ERR]   {entry['name']}: no image returned from ComfyUI")
+        return False
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build new/changed sprites from sprite-manifest.json")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH)
+    parser.add_argument("--state", type=Path, default=STATE_PATH)
+    parser.add_argument("--only", action="append", default=[], metavar="NAME",
+                        help="Restrict to these entries (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Rebuild selected entries even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Print the diff and exit")
+    parser.add_argument("--comfyui", action="append", default=[], metavar="URL[,DEPTH]",
+                        help="ComfyUI endpoint, repeatable (default $COMFYUI_URL or localhost)")
+    args = parser.parse_args()
+
+    manifest = entries = load_manifest(args.manifest)
+    if args.only:
+        unknown = set(args.only) - {e["name"] for e in entries}
+        if unknown:
+            parser.error(f"Unknown entries: {', '.join(sorted(unknown))}")
+        entries = [e for e in entries if e["name"] in args.only]
+
+    built = load_state(args.state)
+    added, changed, removed = diff(entries, built)
+    if args.force:
+        todo = entries
+    else:
+        todo = added + changed
+
+    print(f"Manifest: {len(entries)} entries — {len(added)} added, {len(changed)} changed, "
+          f"{len(entries) - len(added) - len(changed)} unchanged")
+    for entry in added:
+        print(f"  + {entry['name']}")
+    for entry in changed:
+        print(f"  ~ {entry['name']}")
+    if not args.only:
+        for name in removed:
+            print(f"  - {name} (no longer in manifest; assets left in place)")
+
+    if args.dry_run or not todo:
+        if not args.only and removed and not args.dry_run:
+            save_state({k: v for k, v in built.items() if k not in removed}, args.state)
+        return
+
+    from comfy_dispatch import Dispatcher, parse_endpoint
+    from generate_sprite import COMFYUI_URL
+
+    endpoints = [parse_endpoint(spec) for spec in (args.comfyui or [COMFYUI_URL])]
+    for entry in todo:
+        entry["id"] = entry["name"]  # Dispatcher leases by "id"
+
+    if not args.only:
+        for name in removed:
+            built.pop(name, None)
+    failed: list[str] = []
+
+    def on_result(entry: dict, ok: bool, url: str) -> None:
+        # Runs on this thread only, so the state file has a single writer
+        if ok:
+            built[entry["name"]] = entry_hash(entry)
+            save_state(built, args.state)
+            print(f"  [OK]    {entry['name']}  ({url})")
+        else:
+            failed.append(entry["name"])
+            print(f"  [FAIL]  {entry['name']}  ({url})")
+
+    leftover = Dispatcher(endpoints, lambda entry, url: build_entry(entry, url)).run(todo, on_result)
+    failed += [e["name"] for e in leftover]
+
+    if any(e["category"] == "tiles" and e["name"] not in failed for e in todo):
+        from generate_blocks import pack_atlases, tile_blocks
+        pack_atlases(blocks=tile_blocks(manifest))
+
+    print(f"\nBuilt {len(todo) - len(failed)}/{len(todo)}" + (f" — failed: {', '.join(failed)}" if failed else ""))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Sprite Pipeline DAG
+Content-addressed, per-stage cached runner for the generate → rembg → trim →
+square → downscale → save sequence shared by generate_sprite.py,
+batch_regenerate.py, generate_blocks.py and fact_batch_generate.py.
+
+Each Stage declares its inputs (upstream stage names), params, a version and,
+for sinks, the files it writes. A stage's key is
+    sha256(name, version, params, keys of its inputs)
+so keys are known before anything runs. Evaluation is lazy and pulls from
+the targets backwards: a stage whose key is already in the cache is loaded
+instead of run, and its inputs are never touched. Changing only the game
+size therefore re-keys the downscale and save stages, loads the cached
+squared image and never reaches rembg or the GPU.
+
+Sinks (stages with `outputs`) are skipped when every output still has the
+digest recorded for the sink's key.
+
+Stage values are cached under CACHE_DIR/stages/<key>.<ext> by codec:
+    "png"    PIL images (lossless, mode kept)
+    "bytes"  raw bytes
+    "none"   not cached (sinks, or stages that cache themselves)
+`runtime` kwargs (endpoint URL, timeouts) are passed to fn but not hashed.
+"""
+
+import hashlib
+import io
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from PIL import Image
+
+from generate_sprite import (
+    generate_image,
+    remove_background,
+    trim_transparent,
+    make_square,
+    downscale,
+    CACHE_DIR,
+)
+
+STAGE_CACHE_DIR = CACHE_DIR / "stages"
+CODECS          = ("png", "bytes", "none")
+
+
+class NoImageError(RuntimeError):
+    """ComfyUI finished the job but returned no image."""
+
+
+@dataclass
+class Stage:
+    name:    str
+    fn:      Callable[..., Any]                    # fn(*input values, **params, **runtime)
+    inputs:  tuple[str, ...] = ()
+    params:  dict = field(default_factory=dict)
+    version: int = 1                               # bump when fn's output changes for the same params
+    codec:   str = "png"
+    outputs: tuple[Path, ...] = ()                 # files written by a sink stage
+    runtime: dict = field(default_factory=dict)    # passed to fn, excluded from the key
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class Pipeline:
+    """A DAG of Stages evaluated lazily against a content-addressed cache."""
+
+    def __init__(self, stages: list[Stage], cache_dir: Path = STAGE_CACHE_DIR,
+                 log: Callable[[str], None] | None = print):
+        self.stages    = {s.name: s for s in stages}
+        self.cache_dir = cache_dir
+        self.log       = log or (lambda _msg: None)
+        self.status:  dict[str, str] = {}     # name -> "ran" | "cached" | "skipped"
+        self._keys:   dict[str, str] = {}
+        self._values: dict[str, Any] = {}
+
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+        for s in stages:
+            if s.codec not in CODECS:
+                raise ValueError(f"Stage {s.name}: unknown codec {s.codec!r}")
+            for dep in s.inputs:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage {s.name}: unknown input {dep!r}")
+        for s in stages:
+            self.key(s.name)  # rejects cycles up front
+
+    # ── Keys ──────────────────────────────────────────────────────────────────
+
+    def key(self, name: str, _path: tuple[str, ...] = ()) -> str:
+        if name in self._keys:
+            return self._keys[name]
+        if name in _path:
+            raise ValueError(f"Cycle in pipeline: {' -> '.join(_path + (name,))}")
+        stage = self.stages[name]
+        recipe = json.dumps({
+            "stage":   stage.name,
+            "version": stage.version,
+            "params":  stage.params,
+            "inputs":  [self.key(dep, _path + (name,)) for dep in stage.inputs],
+        }, sort_keys=True, default=str)
+        self._keys[name] = hashlib.sha256(recipe.encode("utf-8")).hexdigest()
+        return self._keys[name]
+
+    # ── Evaluation ────────────────────────────────────────────────────────────
+
+    def run(self, targets: list[str] | None = None) -> dict[str, str]:
+        """Bring targets (default: every stage nothing depends on) up to date."""
+        if targets is None:
+            used = {dep for s in self.stages.values() for dep in s.inputs}
+            targets = [n for n in self.stages if n not in used]
+        for name in targets:
+            stage = self.stages[name]
+            if stage.outputs and self._outputs_current(stage):
+                self.status[name] = "skipped"
+                self.log(f"  [SKIP]  {name}: outputs up to date")
+                continue
+            self.value(name)
+        return dict(self.status)
+
+    def value(self, name: str) -> Any:
+        """Value of one stage: memoized, else from cache, else computed from its inputs."""
+        if name in self._values:
+            return self._values[name]
+        stage = self.stages[name]
+
+        cached = self._load(stage)
+        if cached is not None:
+            self.status[name] = "cached"
+            self.log(f"  [CACHE] {name}")
+            self._values[name] = cached
+            return cached
+
+        args = [self.value(dep) for dep in stage.inputs]
+        self.log(f"  [RUN]   {name}")
+        result = stage.fn(*args, **stage.params, **stage.runtime)
+        self.status[name] = "ran"
+        self._store(stage, result)
+        if stage.outputs:
+            self._stamp(stage)
+        self._values[name] = result
+        return result
+
+    # ── Cache ─────────────────────────────────────────────────────────────────
+
+    def _path(self, stage: Stage) -> Path:
+        return self.cache_dir / f"{self.key(stage.name)}.{stage.codec}"
+
+    def _load(self, stage: Stage) -> Any:
+        if stage.codec == "none" or not self._path(stage).exists():
+            return None
+        data = self._path(stage).read_bytes()
+        if stage.codec == "bytes":
+            return data
+        img = Image.open(io.BytesIO(data))
+        img.load()
+        return img
+
+    def _store(self, stage: Stage, value: Any) -> None:
+        if stage.codec == "none" or value is None:
+            return
+        if stage.codec == "bytes":
+            _atomic_write(self._path(stage), value)
+        else:
+            buf = io.BytesIO()
+            value.save(buf, "PNG")
+            _atomic_write(self._path(stage), buf.getvalue())
+
+    def _stamp_path(self, stage: Stage) -> Path:
+        return self.cache_dir / f"{self.key(stage.name)}.outputs.json"
+
+    def _stamp(self, stage: Stage) -> None:
+        _atomic_write(self._stamp_path(stage), json.dumps(
+            {str(p): _digest(p) for p in stage.outputs if p.exists()}).encode("utf-8"))
+
+    def _outputs_current(self, stage: Stage) -> bool:
+        stamp = self._stamp_path(stage)
+        if not stamp.exists():
+            return False
+        recorded = json.loads(stamp.read_text())
+        return all(p.exists() and recorded.get(str(p)) == _digest(p) for p in stage.outputs)
+
+
+# ── Stage functions ───────────────────────────────────────────────────────────
+
+def _generate(workflow: dict, timeout: int = 300, **runtime) -> bytes:
+    """Run a ComfyUI workflow (served from generate_image's workflow cache when possible)."""
+    img_bytes, _ = generate_image(workflow, timeout=timeout, **runtime)
+    if img_bytes is None:
+        raise NoImageError("No image returned from ComfyUI")
+    return img_bytes
+
+
+def _save_bytes(data: bytes, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+def _save_images(img: Image.Image, paths: list[Path]) -> None:
+    for path in paths:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        img.save(path, "PNG")
+
+
+def _to_rgb(img_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(img_bytes)).convert("RGB")
+
+
+# ── Stage graphs ──────────────────────────────────────────────────────────────
+
+def _by_size(sizes: list[tuple[int, list[Path]]]) -> dict[int, list[Path]]:
+    """Merge (size, paths) pairs so equal sizes share one downscale stage."""
+    merged: dict[int, list[Path]] = {}
+    for size, paths in sizes:
+        merged.setdefault(size, []).extend(paths)
+    return merged
+
+
+def sprite_stages(workflow: dict, raw_path: Path, sizes: list[tuple[int, list[Path]]],
+                  squared_path: Path | None = None, timeout: int = 300,
+                  base_url: str | None = None) -> list[Stage]:
+    """
+    generate → save raw → rembg → trim → square → one downscale + save per size.
+    sizes pairs each target edge length with the files that size is written to.
+    """
+    runtime = {"base_url": base_url} if base_url else {}
+    stages = [
+        Stage("generate", _generate, params={"workflow": workflow},
+              codec="none", runtime={"timeout": timeout, **runtime}),
+        Stage("save_raw", _save_bytes, ("generate",), {"path": raw_path},
+              codec="none", outputs=(raw_path,)),
+        Stage("rembg",    remove_background, ("generate",)),
+        Stage("trim",     trim_transparent,  ("rembg",)),
+        Stage("square",   make_square,       ("trim",)),
+    ]
+    if squared_path is not None:
+        stages.append(Stage("save_square", _save_images, ("square",), {"paths": [squared_path]},
+                            codec="none", outputs=(squared_path,)))
+    for size, paths in _by_size(sizes).items():
+        stages += [
+            Stage(f"downscale_{size}", downscale, ("square",), {"target_size": size}),
+            Stage(f"save_{size}", _save_images, (f"downscale_{size}",), {"paths": paths},
+                  codec="none", outputs=tuple(paths)),
+        ]
+    return stages
+
+
+def block_stages(workflow: dict, raw_path: Path, sizes: list[tuple[int, list[Path]]],
+                 seamless: Callable[[Image.Image], Image.Image] | None = None,
+                 seam_params: dict | None = None, timeout: int = 300,
+                 base_url: str | None = None) -> list[Stage]:
+    """
+    generate → save raw → RGB → (seamless) → one downscale + save per size.
+    Tiles are full-bleed, so there is no rembg/trim/square.
+    """
+    runtime = {"base_url": base_url} if base_url else {}
+    stages = [
+        Stage("generate", _generate, params={"workflow": workflow},
+              codec="none", runtime={"timeout": timeout, **runtime}),
+        Stage("save_raw", _save_bytes, ("generate",), {"path": raw_path},
+              codec="none", outputs=(raw_path,)),
+        Stage("rgb", _to_rgb, ("generate",)),
+    ]
+    source = "rgb"
+    if seamless is not None:
+        # version 2: "heal" no longer restores the seamed pixels where the cross meets the borders
+        stages.append(Stage("seamless", seamless, ("rgb",), dict(seam_params or {}), version=2))
+        source = "seamless"
+    for size, paths in _by_size(sizes).items():
+        stages += [
+            Stage(f"downscale_{size}", lambda img, target_size: downscale(img.convert("RGBA"), target_size),
+                  (source,), {"target_size": size}),
+            Stage(f"save_{size}", _save_images, (f"downscale_{size}",), {"paths": paths},
+                  codec="none", outputs=tuple(paths)),
+        ]
+    return stages
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Terra Miner — Tile Post-Processing
+Makes block textures tileable and packs them into one texture atlas.
+
+Seamless tiling (applied to the raw SDXL output, before downscaling):
+  blend  edge-wrap blend: cross-fade the tile with a copy rolled by half its
+         size, weighted towards the copy near the borders. The copy's borders
+         are the original's interior, so opposite edges match.
+  heal   offset-and-heal: roll by half so the seams form a cross in the middle,
+         then feather a narrow band around the cross towards the blend result
+         rolled by half. That is tileable and continuous everywhere, and near
+         the centre equals the original (unrolled) pixels; the band keeps the
+         same weight on opposite borders, so the wrap stays continuous.
+
+Tile atlas: every tile sits in a fixed grid cell, surrounded by EXTRUDE pixels
+copied from its wrapped-around opposite edge (correct for seamless tiles under
+linear filtering and sub-pixel camera positions) plus PADDING transparent
+pixels. Tiles that are not seamless (block_* sprites, autotile edge variants,
+see autotile.py) are extruded by clamping instead. Pages are capped at MAX_PAGE_SIZE; the atlas
+is written as a Phaser 3 multi-atlas (this.load.multiatlas(key, json, path)).
+"""
+
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SEAM_METHODS = ("blend", "heal")
+HEAL_BAND    = 0.125  # heal: feather half-width as a fraction of tile size
+EXTRUDE      = 1      # pixels of wrapped edge copied around each atlas cell
+PADDING      = 1      # transparent gap between extruded cells
+MAX_PAGE_SIZE = 2048  # safe max texture size for low-end mobile GPUs
+
+
+# ── Seamless tiling ───────────────────────────────────────────────────────────
+
+def _edge_ramp(n: int) -> np.ndarray:
+    """0 at both borders, 1 at the centre (linear)."""
+    x = np.arange(n, dtype=np.float64)
+    return np.minimum(x, n - 1 - x) / ((n - 1) / 2)
+
+
+def _seam_ramp(n: int, band: float) -> np.ndarray:
+    """1 on the centre seam of a half-rolled axis, falling to 0 band*n away."""
+    x = np.arange(n, dtype=np.float64) + 0.5
+    width = max(1.0, band * n)
+    return np.clip(1.0 - np.abs(x - n / 2) / width, 0.0, 1.0)
+
+
+def make_seamless(img: Image.Image, method: str = "blend", band: float = HEAL_BAND) -> Image.Image:
+    """Return a tileable copy of img (mode preserved for RGB/RGBA)."""
+    if method not in SEAM_METHODS:
+        raise ValueError(f"Unknown seam method {method!r}; expected one of {SEAM_METHODS}")
+    mode = img.mode if img.mode in ("RGB", "RGBA") else "RGB"
+    px = np.asarray(img.convert(mode), dtype=np.float64)
+    h, w = px.shape[:2]
+
+    # One axis at a time; blending two x-tileable images keeps the result x-tileable
+    out = px
+    for axis, ramp in ((1, _edge_ramp(w)[None, :, None]), (0, _edge_ramp(h)[:, None, None])):
+        rolled = np.roll(out, out.shape[axis] // 2, axis=axis)
+        out = out * ramp + rolled * (1.0 - ramp)
+    if method == "heal":
+        # Restoring px itself in the band would bring its seams back where the
+        # cross meets the borders; the rolled blend is px in the middle and
+        # tileable at the ends
+        shifted = np.roll(px, (h // 2, w // 2), axis=(0, 1))
+        healed = np.roll(out, (h // 2, w // 2), axis=(0, 1))
+        mask = np.maximum(_seam_ramp(h, band)[:, None], _seam_ramp(w, band)[None, :])[..., None]
+        out = shifted * (1.0 - mask) + healed * mask
+
+    return Image.fromarray(np.clip(np.round(out), 0, 255).astype(np.uint8), mode)
+
+
+def seam_score(img: Image.Image) -> float:
+    """
+    Mean colour step across the wrap-around edges divided by the mean step
+    between neighbouring interior pixels (floored at one colour level, so
+    flat tiles are not penalised). <= ~1.0 means no visible seam.
+    """
+    px = np.asarray(img.convert("RGB"), dtype=np.float64)
+    interior = (np.abs(np.diff(px, axis=0)).mean() + np.abs(np.diff(px, axis=1)).mean()) / 2
+    wrap = (np.abs(px[0] - px[-1]).mean() + np.abs(px[:, 0] - px[:, -1]).mean()) / 2
+    return float(wrap / max(interior, 1.0))
+
+
+# ── Tile atlas ────────────────────────────────────────────────────────────────
+
+def _extrude(img: Image.Image, n: int, wrap: bool = True) -> Image.Image:
+    """Surround img with n pixels from its opposite edges (wrap) or its own edges (clamp)."""
+    if n <= 0:
+        return img
+    px = np.asarray(img.convert("RGBA"))
+    return Image.fromarray(np.pad(px, ((n, n), (n, n), (0, 0)), mode="wrap" if wrap else "edge"), "RGBA")
+
+
+def _next_pow2(n: int) -> int:
+    return 1 << max(0, math.ceil(math.log2(n)))
+
+
+def pack_tile_atlas(tiles: dict[str, Image.Image], out_path: Path,
+                    extrude: int = EXTRUDE, padding: int = PADDING,
+                    clamp: set[str] | None = None, max_size: int = MAX_PAGE_SIZE,
+                    extra_meta: dict | None = None) -> Path:
+    """
+    Pack equally sized tiles into power-of-two grid pages of at most max_size.
+    Tiles named in clamp are edge-extruded instead of wrap-extruded.
+    Writes out_path (single page) or <stem>-<i>.png pages, plus
+    out_path.with_suffix('.json'); returns the JSON path.
+    """
+    if not tiles:
+        raise ValueError("No tiles to pack")
+    sizes = {im.size for im in tiles.values()}
+    if len(sizes) != 1:
+        raise ValueError(f"Tiles must share one size, got {sorted(sizes)}")
+    tw, th = sizes.pop()
+    cell_w, cell_h = tw + 2 * extrude + padding, th + 2 * extrude + padding
+    if cell_w > max_size or cell_h > max_size:
+        raise ValueError(f"Tile cell {cell_w}×{cell_h} exceeds max page size {max_size}")
+    clamp = clamp or set()
+
+    # Near-square grid, widened to use the spare width of the power-of-two page
+    names = sorted(tiles)
+    cols = min(math.ceil(math.sqrt(len(names))), max_size // cell_w)
+    page_w = _next_pow2(cols * cell_w)
+    cols = min(page_w, max_size) // cell_w
+    rows_per_page = max_size // cell_h
+    per_page = cols * rows_per_page
+    chunks = [names[i:i + per_page] for i in range(0, len(names), per_page)]
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    textures = []
+    for p, chunk in enumerate(chunks):
+        rows = math.ceil(len(chunk) / cols)
+        page_h = _next_pow2(rows * cell_h)
+        page = Image.new("RGBA", (page_w, page_h), (0, 0, 0, 0))
+        frames = []
+        for i, name in enumerate(chunk):
+            cx, cy = (i % cols) * cell_w, (i // cols) * cell_h
+            page.paste(_extrude(tiles[name], extrude, wrap=name not in clamp), (cx, cy))
+            frames.append({
+                "filename":         name,
+                "frame":            {"x": cx + extrude, "y": cy + extrude, "w": tw, "h": th},
+                "rotated":          False,
+                "trimmed":          False,
+                "spriteSourceSize": {"x": 0, "y": 0, "w": tw, "h": th},
+                "sourceSize":       {"w": tw, "h": th},
+            })
+        image = out_path.name if len(chunks) == 1 else f"{out_path.stem}-{p}.png"
+        page.save(out_path.parent / image, "PNG")
+        textures.append({
+            "image":  image,
+            "format": "RGBA8888",
+            "size":   {"w": page_w, "h": page_h},
+            "scale":  1,
+            "frames": frames,
+        })
+
+    json_path = out_path.with_suffix(".json")
+    json_path.write_text(json.dumps({
+        "textures": textures,
+        "meta": {
+            "app":     "sprite-gen/scripts/tile_pipeline.py",
+            "version": "1.0",
+            "extrude": extrude,
+            "padding": padding,
+            **(extra_meta or {}),
+        },
+    }, indent=2))
+    return json_path
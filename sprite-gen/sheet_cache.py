@@ -0,0 +1,117 @@
+"""
+sheet_cache.py
+--------------
+Incremental rebuild cache for stitch_miner_sheet.py --incremental.
+
+A cache directory holds:
+  manifest.json        build key, the fixed palette, per-strip source sha256
+                       and the digest of each output written from it
+  frames/<strip>.npz   that strip's frames, quantized, as indices + alpha
+
+On a rebuild only strips whose source file hash changed are re-read,
+re-cropped and re-indexed against the stored palette; every other strip's
+frames are read back from its blob. Because the palette is fixed (first
+build, or --palette), unchanged frames come out bit-identical, and a run
+with no changed strip and an intact output skips writing altogether.
+Changing the build key (frame size, colour count) or the palette drops
+every cached strip.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from palette import from_indices, to_indices
+
+MANIFEST_VERSION = 1
+
+
+def file_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class SheetCache:
+    """Per-strip quantized frame blobs keyed by source content hash."""
+
+    def __init__(self, cache_dir: Path, key: dict):
+        self.dir = cache_dir
+        self.key = key
+        self.palette: np.ndarray | None = None
+        self.strips: dict[str, str] = {}
+        self.outputs: dict[str, str] = {}
+
+        manifest_path = cache_dir / 'manifest.json'
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        if manifest.get('version') == MANIFEST_VERSION and manifest.get('key') == key:
+            if manifest.get('palette'):
+                self.palette = np.array(manifest['palette'], dtype=np.uint8)
+            self.strips = manifest.get('strips', {})
+            self.outputs = manifest.get('outputs', {})
+
+    # ── Palette ───────────────────────────────────────────────────────────────
+
+    def set_palette(self, palette: np.ndarray) -> None:
+        """Fix the palette; a different one than the cached palette invalidates every strip."""
+        if self.palette is not None and np.array_equal(self.palette, palette):
+            return
+        self.palette = np.asarray(palette, dtype=np.uint8)
+        self.strips.clear()
+        self.outputs.clear()
+
+    # ── Frames ────────────────────────────────────────────────────────────────
+
+    def _blob(self, strip: str) -> Path:
+        return self.dir / 'frames' / f'{strip}.npz'
+
+    def get(self, strip: str, digest: str) -> list[Image.Image] | None:
+        """Cached quantized frames for strip, or None if its source changed."""
+        if self.strips.get(strip) != digest or not self._blob(strip).exists():
+            return None
+        with np.load(self._blob(strip)) as blob:
+            return [from_indices(idx, alpha, self.palette)
+                    for idx, alpha in zip(blob['indices'], blob['alpha'])]
+
+    def put(self, strip: str, digest: str, frames: list[Image.Image]) -> list[Image.Image]:
+        """Quantize raw frames against the fixed palette, store them and return the result."""
+        if self.palette is None:
+            raise RuntimeError('SheetCache.put() before set_palette()')
+        indexed = [to_indices(f, self.palette) for f in frames]
+        indices = np.stack([i for i, _ in indexed])
+        alpha = np.stack([a for _, a in indexed])
+
+        self._blob(strip).parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._blob(strip).with_suffix('.npz.tmp')
+        with open(tmp, 'wb') as fh:
+            np.savez(fh, indices=indices, alpha=alpha)
+        os.replace(tmp, self._blob(strip))
+        self.strips[strip] = digest
+        return [from_indices(i, a, self.palette) for i, a in indexed]
+
+    # ── Outputs ───────────────────────────────────────────────────────────────
+
+    def output_current(self, path: Path, layout: str) -> bool:
+        """True if path is exactly what the last build with this layout wrote."""
+        return path.exists() and self.outputs.get(layout) == file_digest(path)
+
+    def record_output(self, path: Path, layout: str) -> None:
+        self.outputs[layout] = file_digest(path)
+
+    def save(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.dir / 'manifest.json', json.dumps({
+            'version': MANIFEST_VERSION,
+            'key': self.key,
+            'palette': self.palette.tolist() if self.palette is not None else None,
+            'strips': self.strips,
+            'outputs': self.outputs,
+        }, indent=2).encode())
@@ -2,21 +2,80 @@
 stitch_miner_sheet.py
 ---------------------
 Stitches individual animation strip PNGs into a single horizontal
-miner_sheet.png compatible with Phaser's spritesheet loader.
+miner_sheet.png compatible with Phaser's spritesheet loader, or (--atlas)
+bin-packs the frames into power-of-two pages with a Phaser multi-atlas JSON.
 
 Usage:
   python stitch_miner_sheet.py --strips_dir /tmp/miner_strips --out src/assets/sprites/characters/miner_sheet.png
   python stitch_miner_sheet.py --strips_dir /tmp/miner_strips --out src/assets/sprites-hires/characters/miner_sheet.png --hires
+  python stitch_miner_sheet.py --strips_dir /tmp/miner_strips --out src/assets/sprites-hires/characters/miner_atlas.png --hires --atlas
+  python stitch_miner_sheet.py --spec sprite-gen/sheets/*.json [--jobs N]
+
+Sheets are quantized to 16 colours with PIL's median cut, as they always have
+been; --quantizer kmeans opts in to palette.py's alpha-weighted k-means.
+--palette FILE shares one palette across sheets: it is built (k-means) and
+saved on first use, then reused, and cannot be combined with
+--quantizer mediancut. --incremental and --spec need such a fixed palette,
+so they use k-means too.
+--bench-palette prints time and ΔE for both quantizers on the game+hires sheets.
+
+--incremental keeps per-strip source hashes and quantized frame blobs under
+output/cache/sheets/ (see sheet_cache.py) and fixes the palette at the first
+build, so after editing one strip only that strip is re-cropped and
+re-indexed; an unchanged tree with an intact output is a no-op.
+
+Atlas frame names are <strip>_<index>, e.g. walk_down_0 … walk_down_5.
+In atlas mode walk_right/mine_right are not stored as pixels: their frames are
+aliases of walk_left/mine_left with "flipX": true. Phaser ignores that key and
+draws an alias unmirrored: game code must set sprite.flipX = true while it plays
+a *_right animation. Pass --bake-mirrors for consumers that cannot flip at runtime.
 
 Frame layout (see PHASE-29-CHARACTER-ANIMATION.md §29.1.1):
   idle (4) | walk_down (6) | walk_up (6) | walk_left (6) | walk_right (6) |
   mine_down (6) | mine_left (6) | mine_right (6) | hurt_fall (6) = 52 total
+
+Other characters and enemies: --spec
+------------------------------------
+The miner layout above is just the default SheetSpec. Any other character is
+described by a JSON spec (see sheets/miner.json):
+
+  {
+    "name": "miner",
+    "frame": {"w": 32, "h": 48},
+    "hires_scale": 8,
+    "source": "hires",
+    "strips_dir": "sprite-gen/output/strips/miner",
+    "strips": [["idle", 4], ["walk_left", 6], ["walk_right", 6], ...],
+    "mirrors": {"walk_right": "walk_left"},
+    "out": "src/assets/sprites/characters/miner_sheet.png",
+    "hires_out": "src/assets/sprites-hires/characters/miner_sheet.png",
+    "atlas": false
+  }
+
+Relative paths are resolved against the repository root; specs should only
+use relative ones, so they build on every checkout (strips are generated into
+sprite-gen/output/strips/<name>/ by default). Every strip is read
+once, at the "source" resolution (<strip>_hires.png for "hires", <strip>.png
+for "game"); the other resolution is derived by nearest-neighbour scaling, and
+both sheets are written from that one load. Characters build in parallel
+(--jobs, default one per core) through the incremental cache, so a character
+whose strips and outputs are unchanged is skipped without decoding anything.
 """
 
 import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable
 from PIL import Image
 
+from atlas_packer import MAX_PAGE_SIZE, pack, write_atlas
+from palette import (apply_palette, benchmark, build_palette, load_palette,
+                     quantize_kmeans, quantize_mediancut, save_palette)
+from sheet_cache import SheetCache, file_digest
+
 FRAME_W = 32
 FRAME_H = 48
 HIRES_SCALE = 8  # 32→256, 48→384
@@ -34,7 +93,88 @@ STRIPS = [
     ('hurt_fall',  6),
 ]
 
+# Strips that are horizontal mirrors of another strip
+MIRRORS = {
+    'walk_right': 'walk_left',
+    'mine_right': 'mine_left',
+}
+
 TOTAL_FRAMES = sum(count for _, count in STRIPS)
+PALETTE_COLORS = 16
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CACHE_ROOT = Path(__file__).parent / 'output' / 'cache' / 'sheets'
+
+
+@dataclass
+class SheetSpec:
+    """Layout and outputs of one character's sheet."""
+    name: str
+    strips: list[tuple[str, int]]
+    mirrors: dict[str, str] = field(default_factory=dict)
+    frame_w: int = FRAME_W
+    frame_h: int = FRAME_H
+    hires_scale: int = HIRES_SCALE
+    source: str = 'hires'             # resolution the strips are read at: 'hires' or 'game'
+    strips_dir: Path | None = None
+    out: Path | None = None           # game-resolution output
+    hires_out: Path | None = None     # hi-res output
+    atlas: bool = False
+    trim: bool = True
+    bake_mirrors: bool = False
+    max_page: int = MAX_PAGE_SIZE
+    palette: Path | None = None       # shared palette file (optional)
+
+    @property
+    def total_frames(self) -> int:
+        return sum(count for _, count in self.strips)
+
+
+MINER = SheetSpec('miner', STRIPS, MIRRORS)
+
+
+def load_spec(path: Path) -> SheetSpec:
+    """Read a JSON character spec; relative paths resolve against the repo root."""
+    raw = json.loads(path.read_text())
+
+    def resolve(key: str) -> Path | None:
+        value = raw.get(key)
+        if value is None:
+            return None
+        p = Path(value)
+        return p if p.is_absolute() else REPO_ROOT / p
+
+    strips = [(s['name'], int(s['frames'])) if isinstance(s, dict) else (s[0], int(s[1]))
+              for s in raw['strips']]
+    mirrors = dict(raw.get('mirrors', {}))
+    names = {name for name, _ in strips}
+    for mirror, source in mirrors.items():
+        if mirror not in names or source not in names:
+            raise ValueError(f'{path}: mirror {mirror!r} -> {source!r} names an unknown strip')
+        if source in mirrors:
+            raise ValueError(f'{path}: mirror source {source!r} is itself a mirror')
+    if raw.get('source', 'hires') not in ('hires', 'game'):
+        raise ValueError(f'{path}: source must be "hires" or "game"')
+    if raw.get('out') is None and raw.get('hires_out') is None:
+        raise ValueError(f'{path}: needs "out" and/or "hires_out"')
+
+    frame = raw.get('frame', {})
+    return SheetSpec(
+        name=raw.get('name', path.stem),
+        strips=strips,
+        mirrors=mirrors,
+        frame_w=int(frame.get('w', FRAME_W)),
+        frame_h=int(frame.get('h', FRAME_H)),
+        hires_scale=int(raw.get('hires_scale', HIRES_SCALE)),
+        source=raw.get('source', 'hires'),
+        strips_dir=resolve('strips_dir'),
+        out=resolve('out'),
+        hires_out=resolve('hires_out'),
+        atlas=bool(raw.get('atlas', False)),
+        trim=bool(raw.get('trim', True)),
+        bake_mirrors=bool(raw.get('bake_mirrors', False)),
+        max_page=int(raw.get('max_page', MAX_PAGE_SIZE)),
+        palette=resolve('palette'),
+    )
 
 
 def load_strip(path: Path, frame_count: int, w: int, h: int) -> list[Image.Image]:
@@ -52,63 +192,374 @@ def mirror_frames(frames: list[Image.Image]) -> list[Image.Image]:
     return [f.transpose(Image.FLIP_LEFT_RIGHT) for f in frames]
 
 
-def stitch(strips_dir: Path, out_path: Path, hires: bool = False) -> None:
-    w = FRAME_W * (HIRES_SCALE if hires else 1)
-    h = FRAME_H * (HIRES_SCALE if hires else 1)
+def frame_size(hires: bool, spec: SheetSpec = MINER) -> tuple[int, int]:
+    scale = spec.hires_scale if hires else 1
+    return spec.frame_w * scale, spec.frame_h * scale
 
-    all_frames: list[Image.Image] = []
 
-    for name, count in STRIPS:
-        if name == 'walk_right':
-            # Mirror walk_left instead of loading a separate file
-            left_path = strips_dir / ('walk_left_hires.png' if hires else 'walk_left.png')
-            left_frames = load_strip(left_path, 6, w, h)
-            all_frames.extend(mirror_frames(left_frames))
-            continue
+def mirror_aliases(spec: SheetSpec = MINER) -> dict[str, str]:
+    """Frame-name map for mirrored strips: {'walk_right_0': 'walk_left_0', ...}."""
+    counts = dict(spec.strips)
+    return {f'{name}_{i}': f'{source}_{i}'
+            for name, source in spec.mirrors.items() for i in range(counts[name])}
 
-        if name == 'mine_right':
-            # Mirror mine_left instead of loading a separate file
-            left_path = strips_dir / ('mine_left_hires.png' if hires else 'mine_left.png')
-            left_frames = load_strip(left_path, 6, w, h)
-            all_frames.extend(mirror_frames(left_frames))
-            continue
 
-        suffix = '_hires' if hires else ''
-        strip_path = strips_dir / f'{name}{suffix}.png'
-        if not strip_path.exists():
-            raise FileNotFoundError(f'Missing strip: {strip_path}')
+def strip_path(strips_dir: Path, name: str, hires: bool) -> Path:
+    path = strips_dir / f'{name}{"_hires" if hires else ""}.png'
+    if not path.exists():
+        raise FileNotFoundError(f'Missing strip: {path}')
+    return path
 
-        frames = load_strip(strip_path, count, w, h)
-        all_frames.extend(frames)
 
-    assert len(all_frames) == TOTAL_FRAMES, \
-        f'Expected {TOTAL_FRAMES} frames, got {len(all_frames)}'
+def _in_order(strip_frames: dict[str, list[Image.Image]], bake_mirrors: bool,
+              spec: SheetSpec = MINER) -> list[tuple[str, Image.Image]]:
+    """Flatten per-strip frames into spec order, mirroring mirror sources if baked."""
+    all_frames: list[tuple[str, Image.Image]] = []
+    for name, _ in spec.strips:
+        if name in spec.mirrors:
+            if not bake_mirrors:
+                continue
+            frames = mirror_frames(strip_frames[spec.mirrors[name]])
+        else:
+            frames = strip_frames[name]
+        all_frames.extend((f'{name}_{i}', frame) for i, frame in enumerate(frames))
 
-    # Stitch horizontally
-    sheet = Image.new('RGBA', (w * TOTAL_FRAMES, h), (0, 0, 0, 0))
-    for i, frame in enumerate(all_frames):
-        sheet.paste(frame, (i * w, 0))
+    expected = spec.total_frames if bake_mirrors else spec.total_frames - len(mirror_aliases(spec))
+    assert len(all_frames) == expected, \
+        f'Expected {expected} frames, got {len(all_frames)}'
+    return all_frames
+
+
+def load_frames(strips_dir: Path, hires: bool = False, bake_mirrors: bool = True,
+                spec: SheetSpec = MINER) -> list[tuple[str, Image.Image]]:
+    """
+    Load the spec's frames in stitching order as (name, frame) pairs.
+    With bake_mirrors=False the mirrored strips are skipped (see mirror_aliases).
+    """
+    w, h = frame_size(hires, spec)
+    # Mirrored strips reuse their source strip instead of loading a separate file
+    strip_frames = {name: load_strip(strip_path(strips_dir, name, hires), count, w, h)
+                    for name, count in spec.strips if name not in spec.mirrors}
+    return _in_order(strip_frames, bake_mirrors, spec)
+
+
+def make_quantizer(method: str = 'mediancut', palette_path: Path | None = None,
+                   frames: list[tuple[str, Image.Image]] | None = None) -> Callable[[Image.Image], Image.Image]:
+    """
+    Return an RGBA -> RGBA quantizer. With palette_path, a shared palette is
+    loaded from it (or built from `frames` and saved there if it does not exist yet).
+    """
+    if palette_path is not None:
+        if palette_path.exists():
+            palette = load_palette(palette_path)
+        else:
+            palette = build_palette([f for _, f in frames or []], PALETTE_COLORS)
+            save_palette(palette, palette_path)
+            print(f'Saved palette: {palette_path}  ({len(palette)} colors)')
+        return lambda img: apply_palette(img, palette)
+    if method == 'kmeans':
+        return lambda img: quantize_kmeans(img, PALETTE_COLORS)
+    return lambda img: quantize_mediancut(img, PALETTE_COLORS)
+
+
+# ── Incremental cache ─────────────────────────────────────────────────────────
+
+def _cache_for(spec: SheetSpec, out_path: Path, hires: bool, cache_dir: Path | None = None) -> SheetCache:
+    cache_dir = cache_dir or CACHE_ROOT / f'{out_path.stem}{"_hires" if hires else ""}'
+    return SheetCache(cache_dir, {'frame_size': list(frame_size(hires, spec)), 'colors': PALETTE_COLORS})
+
+
+def open_cache(strips_dir: Path, out_path: Path, hires: bool = False,
+               cache_dir: Path | None = None, palette_path: Path | None = None,
+               spec: SheetSpec = MINER) -> SheetCache:
+    """
+    Open the incremental cache for one output and fix its palette: --palette if
+    given, else the palette cached by the previous build, else a fresh k-means
+    palette over all frames (saved to palette_path when that is set).
+    """
+    cache = _cache_for(spec, out_path, hires, cache_dir)
+    if palette_path is not None and palette_path.exists():
+        cache.set_palette(load_palette(palette_path))
+    elif cache.palette is None:
+        frames = load_frames(strips_dir, hires, spec=spec)
+        cache.set_palette(build_palette([f for _, f in frames], PALETTE_COLORS))
+        if palette_path is not None:
+            save_palette(cache.palette, palette_path)
+            print(f'Saved palette: {palette_path}  ({len(cache.palette)} colors)')
+    return cache
+
+
+def load_frames_cached(strips_dir: Path, hires: bool, cache: SheetCache, bake_mirrors: bool = True,
+                       spec: SheetSpec = MINER) -> tuple[list[tuple[str, Image.Image]], list[str]]:
+    """
+    Like load_frames, but frames come back already quantized to the cache
+    palette and only strips whose source changed are re-read and re-indexed.
+    Returns (frames, names of rebuilt strips).
+    """
+    w, h = frame_size(hires, spec)
+    strip_frames: dict[str, list[Image.Image]] = {}
+    rebuilt: list[str] = []
+    for name, count in spec.strips:
+        if name in spec.mirrors:
+            continue  # quantizing is per pixel, so flipping cached frames is exact
+        path = strip_path(strips_dir, name, hires)
+        digest = file_digest(path)
+        frames = cache.get(name, digest)
+        if frames is None:
+            frames = cache.put(name, digest, load_strip(path, count, w, h))
+            rebuilt.append(name)
+        strip_frames[name] = frames
+    return _in_order(strip_frames, bake_mirrors, spec), rebuilt
 
-    # Quantize to 16 colors (preserves alpha)
-    # Note: PIL quantize drops alpha; workaround: quantize RGB then restore alpha
-    rgb = sheet.convert('RGB')
-    quantized_rgb = rgb.quantize(colors=16, method=Image.Quantize.MEDIANCUT)
-    quantized_rgb = quantized_rgb.convert('RGB')
-    alpha = sheet.split()[3]
-    quantized_rgba = Image.merge('RGBA', (*quantized_rgb.split(), alpha))
+
+# ── Output ────────────────────────────────────────────────────────────────────
+
+def _write_sheet(frames: list[tuple[str, Image.Image]], out_path: Path, hires: bool,
+                 spec: SheetSpec = MINER,
+                 quantizer: Callable[[Image.Image], Image.Image] | None = None) -> str:
+    """Stitch frames into one row and save it; returns a summary line."""
+    w, h = frame_size(hires, spec)
+    sheet = Image.new('RGBA', (w * len(frames), h), (0, 0, 0, 0))
+    for i, (_, frame) in enumerate(frames):
+        sheet.paste(frame, (i * w, 0))
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    quantized_rgba.save(out_path, 'PNG')
-    print(f'Saved: {out_path}  ({sheet.width}×{sheet.height} px, {TOTAL_FRAMES} frames)')
+    (quantizer(sheet) if quantizer else sheet).save(out_path, 'PNG')
+    return f'Saved: {out_path}  ({sheet.width}×{sheet.height} px, {len(frames)} frames)'
+
+
+def _write_atlas(frames: list[tuple[str, Image.Image]], out_path: Path, trim: bool, max_size: int,
+                 bake_mirrors: bool, spec: SheetSpec = MINER,
+                 quantizer: Callable[[Image.Image], Image.Image] | None = None) -> tuple[Path, str]:
+    """Pack frames into atlas pages and save them; returns (json path, summary line)."""
+    aliases = {} if bake_mirrors else mirror_aliases(spec)
+    pages = pack(frames, trim=trim, max_size=max_size)
+    json_path = write_atlas(pages, out_path, postprocess=quantizer, flip_aliases=aliases)
+    sizes = ', '.join(f'{p.width}×{p.height}' for p in pages)
+    return json_path, (f'Saved: {json_path}  ({len(pages)} page(s): {sizes}, '
+                       f'{len(frames)} packed + {len(aliases)} flipped alias frames)')
+
+
+def _atlas_layout(out_path: Path, trim: bool, max_size: int, bake_mirrors: bool) -> str:
+    return f'atlas:{out_path.resolve()}:trim={trim}:max={max_size}:bake={bake_mirrors}'
+
+
+def stitch(strips_dir: Path, out_path: Path, hires: bool = False,
+           quantizer: Callable[[Image.Image], Image.Image] | None = None,
+           cache: SheetCache | None = None) -> None:
+    """
+    Write the single-row sheet. With a cache, only changed strips are re-read
+    and re-quantized (see sheet_cache.py); quantizer is ignored in that case.
+    """
+    if cache is not None:
+        all_frames, rebuilt = load_frames_cached(strips_dir, hires, cache)
+        layout = f'sheet:{out_path.resolve()}'
+        if not rebuilt and cache.output_current(out_path, layout):
+            print(f'Up to date: {out_path}')
+            return
+        quantizer = None
+    else:
+        all_frames = load_frames(strips_dir, hires)
+        quantizer = quantizer or make_quantizer()
+
+    print(_write_sheet(all_frames, out_path, hires, quantizer=quantizer))
+    if cache is not None:
+        cache.record_output(out_path, layout)
+        cache.save()
+        print(f'  re-stitched strips: {", ".join(rebuilt) or "none (output was stale)"}')
+
+
+def build_atlas(strips_dir: Path, out_path: Path, hires: bool = False,
+                trim: bool = True, max_size: int = MAX_PAGE_SIZE,
+                bake_mirrors: bool = False,
+                quantizer: Callable[[Image.Image], Image.Image] | None = None,
+                cache: SheetCache | None = None) -> None:
+    """
+    Bin-pack all frames into power-of-two pages plus a Phaser multi-atlas JSON.
+    Mirrored strips become flipX aliases unless bake_mirrors is set.
+    With a cache, frames arrive pre-quantized and only changed strips are re-read.
+    """
+    if cache is not None:
+        frames, rebuilt = load_frames_cached(strips_dir, hires, cache, bake_mirrors=bake_mirrors)
+        layout = _atlas_layout(out_path, trim, max_size, bake_mirrors)
+        if not rebuilt and cache.output_current(out_path.with_suffix('.json'), layout):
+            print(f'Up to date: {out_path.with_suffix(".json")}')
+            return
+        quantizer = None
+    else:
+        frames = load_frames(strips_dir, hires, bake_mirrors=bake_mirrors)
+        quantizer = quantizer or make_quantizer()
+
+    json_path, summary = _write_atlas(frames, out_path, trim, max_size, bake_mirrors, quantizer=quantizer)
+    print(summary)
+    if cache is not None:
+        cache.record_output(json_path, layout)
+        cache.save()
+        print(f'  re-stitched strips: {", ".join(rebuilt) or "none (output was stale)"}')
+
+
+# ── Spec-driven builds ────────────────────────────────────────────────────────
+
+def load_strip_pair(path: Path, count: int, spec: SheetSpec) -> dict[bool, list[Image.Image]]:
+    """
+    Read one strip at the spec's source resolution and derive the other one
+    by nearest-neighbour scaling. Returns {hires: frames} for both resolutions.
+    """
+    src_hires = spec.source == 'hires'
+    frames = load_strip(path, count, *frame_size(src_hires, spec))
+    other = frame_size(not src_hires, spec)
+    return {src_hires: frames,
+            not src_hires: [f.resize(other, Image.NEAREST) for f in frames]}
+
+
+def build_character(spec: SheetSpec, cache_root: Path = CACHE_ROOT) -> str:
+    """
+    Build every output of one spec through the incremental cache.
+    Each changed strip is decoded once and feeds both resolutions; a spec
+    with no changed strip and intact outputs is skipped. Returns a report.
+    """
+    if spec.strips_dir is None:
+        raise ValueError(f'{spec.name}: spec has no strips_dir')
+    src_hires = spec.source == 'hires'
+    sources = {name: strip_path(spec.strips_dir, name, src_hires)
+               for name, _ in spec.strips if name not in spec.mirrors}
+    digests = {name: file_digest(path) for name, path in sources.items()}
+    counts = dict(spec.strips)
+
+    targets = [(hires, out) for hires, out in ((False, spec.out), (True, spec.hires_out)) if out]
+    caches: dict[bool, SheetCache] = {}
+    layouts: dict[bool, str] = {}
+    for hires, out in targets:
+        cache = _cache_for(spec, out, hires, cache_root / f'{spec.name}{"_hires" if hires else ""}')
+        if spec.palette is not None and spec.palette.exists():
+            cache.set_palette(load_palette(spec.palette))
+        caches[hires] = cache
+        layouts[hires] = (_atlas_layout(out, spec.trim, spec.max_page, spec.bake_mirrors) if spec.atlas
+                          else f'sheet:{out.resolve()}')
+
+    stale = {name for name, digest in digests.items()
+             if any(c.strips.get(name) != digest for c in caches.values())}
+    if not stale and all(caches[h].palette is not None
+                         and caches[h].output_current(out.with_suffix('.json') if spec.atlas else out, layouts[h])
+                         for h, out in targets):
+        return f'{spec.name}: up to date'
+
+    # First build of a resolution needs every strip for its palette
+    needs_palette = any(c.palette is None for c in caches.values())
+    loaded = {name: load_strip_pair(sources[name], counts[name], spec)
+              for name in (digests if needs_palette else sorted(stale))}
+
+    lines = [f'{spec.name}: re-stitched {", ".join(sorted(stale)) or "nothing (outputs were stale)"}']
+    for hires, out in targets:
+        cache = caches[hires]
+        if cache.palette is None:
+            raw = _in_order({name: pair[hires] for name, pair in loaded.items()}, True, spec)
+            cache.set_palette(build_palette([f for _, f in raw], PALETTE_COLORS))
+            if spec.palette is not None:
+                # One shared palette file: the first resolution built defines it for both
+                save_palette(cache.palette, spec.palette)
+                for other in caches.values():
+                    if other.palette is None:
+                        other.set_palette(cache.palette)
+
+        strip_frames = {}
+        for name, digest in digests.items():
+            frames = cache.get(name, digest)
+            strip_frames[name] = frames if frames is not None else cache.put(name, digest, loaded[name][hires])
+        frames = _in_order(strip_frames, spec.bake_mirrors or not spec.atlas, spec)
+
+        if spec.atlas:
+            path, summary = _write_atlas(frames, out, spec.trim, spec.max_page, spec.bake_mirrors, spec)
+        else:
+            path, summary = out, _write_sheet(frames, out, hires, spec)
+        cache.record_output(path, layouts[hires])
+        cache.save()
+        lines.append('  ' + summary)
+    return '\n'.join(lines)
+
+
+def build_specs(specs: list[SheetSpec], jobs: int | None = None, cache_root: Path = CACHE_ROOT) -> int:
+    """Build specs in parallel, one process per character. Returns the number of failures."""
+    names = [s.name for s in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f'Duplicate spec names: {sorted(n for n in set(names) if names.count(n) > 1)}')
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = {pool.submit(build_character, spec, cache_root): spec.name for spec in specs}
+        for future in as_completed(futures):
+            try:
+                print(future.result())
+            except Exception as exc:
+                failures += 1
+                print(f'{futures[future]}: FAILED — {type(exc).__name__}: {exc}')
+    return failures
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--strips_dir', type=Path, required=True)
-    parser.add_argument('--out', type=Path, required=True)
+    parser.add_argument('--strips_dir', type=Path)
+    parser.add_argument('--out', type=Path)
     parser.add_argument('--hires', action='store_true', help='Build 256px hi-res sheet')
+    parser.add_argument('--atlas', action='store_true',
+                        help='Bin-pack into power-of-two pages + Phaser atlas JSON instead of one row')
+    parser.add_argument('--no-trim', action='store_true',
+                        help='Atlas: keep full frame bounds instead of trimming transparent borders')
+    parser.add_argument('--max-page', type=int, default=MAX_PAGE_SIZE,
+                        help=f'Atlas: max page width/height (default {MAX_PAGE_SIZE})')
+    parser.add_argument('--bake-mirrors', action='store_true',
+                        help='Atlas: store mirrored *_right frames as pixels instead of flipX aliases')
+    parser.add_argument('--quantizer', choices=['kmeans', 'mediancut'],
+                        help='Palette method (default: PIL median cut; --incremental uses k-means)')
+    parser.add_argument('--palette', type=Path,
+                        help='Shared palette JSON; built from this sheet if missing, reused otherwise')
+    parser.add_argument('--bench-palette', action='store_true',
+                        help='Print quantizer time/ΔE on the game and hires sheets and exit')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse cached quantized frames; only re-stitch strips whose PNG changed')
+    parser.add_argument('--cache-dir', type=Path,
+                        help='Incremental cache directory (default output/cache/sheets/<out stem>[_hires])')
+    parser.add_argument('--spec', type=Path, nargs='+',
+                        help='Character spec JSON file(s); builds game + hires outputs for each')
+    parser.add_argument('--jobs', type=int, help='Spec mode: worker processes (default: CPU count)')
     args = parser.parse_args()
-    stitch(args.strips_dir, args.out, args.hires)
+
+    if args.spec:
+        specs = [load_spec(p) for p in args.spec]
+        raise SystemExit(1 if build_specs(specs, args.jobs, args.cache_dir or CACHE_ROOT) else 0)
+    if args.strips_dir is None:
+        parser.error('--strips_dir is required (or use --spec)')
+
+    if args.bench_palette:
+        sheets = []
+        for hires in (False, True):
+            frames = load_frames(args.strips_dir, hires)
+            w, h = frame_size(hires)
+            sheet = Image.new('RGBA', (w * len(frames), h), (0, 0, 0, 0))
+            for i, (_, frame) in enumerate(frames):
+                sheet.paste(frame, (i * w, 0))
+            sheets.append(sheet)
+        print(json.dumps(benchmark(sheets, PALETTE_COLORS), indent=2))
+        return
+
+    if args.out is None:
+        parser.error('--out is required (or use --spec)')
+    if args.palette and args.quantizer == 'mediancut':
+        parser.error('--palette builds a k-means palette; it cannot be used with --quantizer mediancut')
+    if args.incremental:
+        if args.quantizer == 'mediancut':
+            parser.error('--incremental needs a fixed palette; it cannot be used with --quantizer mediancut')
+        cache = open_cache(args.strips_dir, args.out, args.hires, args.cache_dir, args.palette)
+        quantizer = None
+    else:
+        cache = None
+        quantizer = make_quantizer(args.quantizer or 'mediancut', args.palette,
+                                   load_frames(args.strips_dir, args.hires) if args.palette else None)
+    if args.atlas:
+        build_atlas(args.strips_dir, args.out, args.hires, trim=not args.no_trim,
+                    max_size=args.max_page, bake_mirrors=args.bake_mirrors,
+                    quantizer=quantizer, cache=cache)
+    else:
+        stitch(args.strips_dir, args.out, args.hires, quantizer=quantizer, cache=cache)
 
 
 if __name__ == '__main__':
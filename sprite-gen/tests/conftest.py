@@ -0,0 +1,9 @@
+"""Put sprite-gen/ and sprite-gen/scripts/ on sys.path, as the scripts expect to run from there."""
+
+import sys
+from pathlib import Path
+
+SPRITE_GEN = Path(__file__).resolve().parent.parent
+for path in (SPRITE_GEN, SPRITE_GEN / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,150 @@
+"""Dispatcher against fake ComfyUI servers on local ports."""
+
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from comfy_dispatch import Dispatcher, Endpoint
+
+
+class FakeComfy:
+    """A local server answering /system_stats and POST /prompt.
+
+    mode: "ok", "down" (every /prompt is a 503) or "stall" (sleeps past the
+    client timeout). Items whose workflow is "bad" get a 400, as ComfyUI
+    answers an invalid workflow.
+    """
+
+    def __init__(self, mode: str = "ok"):
+        self.mode = mode
+        self.prompts: list[str] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._reply(200, {"system": {}})
+
+            def do_POST(self):
+                item = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.prompts.append(item["id"])
+                if fake.mode == "stall":
+                    time.sleep(0.5)
+                    return self._reply(200, {})
+                if fake.mode == "down":
+                    return self._reply(503, {"error": "unavailable"})
+                if item["workflow"] == "bad":
+                    return self._reply(400, {"error": "invalid prompt"})
+                self._reply(200, {"prompt_id": item["id"]})
+
+            def _reply(self, code, body):
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # the client timed out first
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def servers():
+    made = []
+
+    def make(mode="ok"):
+        made.append(FakeComfy(mode))
+        return made[-1]
+
+    yield make
+    for s in made:
+        s.close()
+
+
+def submit(item: dict, base_url: str) -> bool:
+    req = urllib.request.Request(f"{base_url}/prompt", data=json.dumps(item).encode(),
+                                 headers={"Content-Type": "application/json"})
+    urllib.request.urlopen(req, timeout=0.2).read()
+    return True
+
+
+def run(endpoints, items, **kwargs):
+    results = {}
+    leftover = Dispatcher(endpoints, submit, **kwargs).run(
+        items, lambda item, ok, url: results.setdefault(item["id"], (ok, url)))
+    return results, leftover
+
+
+def items(n, bad=()):
+    return [{"id": f"f{i}", "workflow": "bad" if i in bad else "ok"} for i in range(n)]
+
+
+def test_spreads_work_across_endpoints(servers):
+    a, b = servers(), servers()
+    endpoints = [Endpoint(a.url, depth=2), Endpoint(b.url)]
+    results, leftover = run(endpoints, items(20))
+    assert not leftover
+    assert len(results) == 20 and all(ok for ok, _ in results.values())
+    assert a.prompts and b.prompts
+    assert sum(ep.completed for ep in endpoints) == 20
+
+
+def test_unreachable_endpoint_is_skipped(servers):
+    a, dead = servers(), servers()
+    dead.close()
+    endpoints = [Endpoint(a.url), Endpoint(dead.url)]
+    results, leftover = run(endpoints, items(5))
+    assert not leftover and all(ok for ok, _ in results.values())
+    assert not endpoints[1].alive
+
+
+def test_failing_endpoint_is_dropped_and_its_work_re_leased(servers):
+    a, down = servers(), servers("down")
+    endpoints = [Endpoint(a.url), Endpoint(down.url)]
+    results, leftover = run(endpoints, items(10))
+    assert not leftover
+    assert all(ok and url == a.url for ok, url in results.values())
+    assert not endpoints[1].alive
+
+
+def test_stalled_endpoint_is_dropped_and_its_work_re_leased(servers):
+    a, stalled = servers(), servers("stall")
+    endpoints = [Endpoint(a.url), Endpoint(stalled.url)]
+    # An item may time out on the stalled server more than once before it is dropped
+    results, leftover = run(endpoints, items(10), max_leases=10)
+    assert not leftover
+    assert all(ok and url == a.url for ok, url in results.values())
+    assert not endpoints[1].alive
+
+
+def test_rejected_items_fail_without_killing_endpoints(servers):
+    a, b = servers(), servers()
+    endpoints = [Endpoint(a.url), Endpoint(b.url)]
+    bad = {1, 3, 5, 7}
+    results, leftover = run(endpoints, items(10, bad=bad))
+    assert not leftover
+    assert {fid for fid, (ok, _) in results.items() if not ok} == {f"f{i}" for i in bad}
+    assert all(ep.alive for ep in endpoints)
+    # A 400 is the item's fault: it is not re-leased to another endpoint
+    assert sorted(a.prompts + b.prompts) == sorted(f"f{i}" for i in range(10))
+
+
+def test_all_endpoints_dead_returns_unleased_items(servers):
+    down = servers("down")
+    results, leftover = run([Endpoint(down.url)], items(6), max_endpoint_failures=2)
+    assert len(results) + len(leftover) == 6
+    assert leftover
@@ -0,0 +1,38 @@
+import json
+
+from fact_gen_journal import GenJournal
+
+
+def test_replay_cuts_torn_tail_before_appending(tmp_path):
+    path = tmp_path / "fact_gen_state.jsonl"
+    journal = GenJournal(path)
+    journal.record_success("a")
+    journal.record_success("b")
+    journal._fh.close()  # simulate a crash: no compaction on close
+
+    # Tear the last record mid-line
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+
+    journal = GenJournal(path)
+    assert journal.completed == {"a"}
+    journal.record_success("c")
+    journal._fh.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == ["a", "c"]
+    assert GenJournal(path).completed == {"a", "c"}
+
+
+def test_replay_keeps_complete_journal(tmp_path):
+    path = tmp_path / "fact_gen_state.jsonl"
+    journal = GenJournal(path)
+    journal.record_success("a")
+    journal.record_failure("b")
+    journal._fh.close()
+    size = path.stat().st_size
+
+    journal = GenJournal(path)
+    assert path.stat().st_size == size
+    assert journal.completed == {"a"} and journal.retry_counts == {"b": 1}
+    journal._fh.close()
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from tile_pipeline import SEAM_METHODS, make_seamless, seam_score
+
+
+def gradient(size: int = 1024) -> Image.Image:
+    """Worst case for wrapping: the left/right and top/bottom edges are 255 levels apart.
+    Full SDXL size, so one level spans several pixels and rounding stays below 0.1."""
+    y, x = np.mgrid[0:size, 0:size] * (255 / (size - 1))
+    return Image.fromarray(np.stack([x, y, (x + y) / 2], axis=-1).astype(np.uint8), "RGB")
+
+
+@pytest.mark.parametrize("method", SEAM_METHODS)
+def test_make_seamless_removes_the_wrap_seam(method):
+    img = gradient()
+    assert seam_score(img) > 100
+    assert seam_score(make_seamless(img, method)) < 0.1
+
+
+def test_heal_leaves_no_step_where_the_cross_meets_the_borders():
+    px = np.asarray(make_seamless(gradient(), "heal"), dtype=int)
+    band = slice(480, 545)  # HEAL_BAND around the centre cross
+    assert np.abs(px[0, band] - px[-1, band]).max() <= 3
+    assert np.abs(px[band, 0] - px[band, -1]).max() <= 3
+    assert np.abs(np.diff(px[:, band], axis=1)).max() <= 3
+    assert np.abs(np.diff(px[band, :], axis=0)).max() <= 3
+
+
+def test_make_seamless_keeps_mode_and_size():
+    img = gradient(64).convert("RGBA")
+    for method in SEAM_METHODS:
+        out = make_seamless(img, method)
+        assert out.mode == "RGBA" and out.size == img.size